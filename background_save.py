@@ -0,0 +1,79 @@
+#    Pyrectory (background_save.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+from collections import deque
+
+from gi.repository import GLib
+
+
+class BackgroundSaver:
+    """
+    Run the writes of a save on a worker thread, so a large directory or a slow disk
+    does not block the main loop.
+
+    Jobs run one at a time, in the order they were submitted, so journal appends keep
+    their order. Each job works on data the caller will not modify anymore, usually a
+    snapshot of the entries (the Entry records of a StoreIndex are never modified, copying
+    the list of them is enough). The worker thread is not a daemon: quitting waits for
+    the writes in flight.
+    """
+
+    def __init__(self):
+        self._jobs = deque()  # (job, on_done) tuples not started yet
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, job, on_done)->None:
+        """
+        Args:
+            job (callable): Function doing the writes, called without arguments on the worker thread.
+            on_done (callable): Called on the main loop once the job is over, with None or the exception it raised.
+        """
+        with self._lock:
+            self._jobs.append((job, on_done))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="background-save")
+                self._thread.start()
+
+    def is_busy(self)->bool:
+        """
+        Returns:
+            bool: True while a job is waiting or running.
+        """
+        with self._lock:
+            return self._thread is not None
+
+    def _work(self)->None:
+        while True:
+            with self._lock:
+                if not self._jobs:
+                    self._thread = None
+                    return
+                job, on_done = self._jobs.popleft()
+            try:
+                job()
+            except Exception as error:
+                # Any error is reported, the worker goes on with the next job so later saves are not stuck
+                GLib.idle_add(self._report, on_done, error)
+            else:
+                GLib.idle_add(self._report, on_done, None)
+
+    def _report(self, on_done, error)->bool:
+        on_done(error)
+        return False
@@ -0,0 +1,162 @@
+#    Pyrectory (batch_validator.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+import csv
+import io
+import mmap
+import os
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+import csv_func
+import misc
+from row_index import RowIndex
+
+# Target size of the byte ranges validated by each task
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# Always empty, so misc.is_entry_info_valid() only checks the fields of the rows
+NO_NAMES = set()
+
+
+def split_file(filepath:str, chunk_size:int=CHUNK_SIZE)->list:
+    """
+    Cut a directory file into byte ranges holding whole rows.
+
+    A range ends after a newline that is not inside a quoted field: the quotes before
+    it must be even in number, as quotes inside a field are doubled. When the file has
+    an up to date row index file, ranges end at the row starts it lists instead.
+
+    Args:
+        filepath (str): Path of the directory file.
+        chunk_size (int): Target size of the ranges, in bytes.
+
+    Returns:
+        list: (start, end, first_line_number) tuples covering the file, in file order.
+    """
+    file_size = os.path.getsize(filepath)
+    if file_size == 0:
+        return []
+
+    chunks = []
+    with open(filepath, "rb") as csv_file, mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        row_index = RowIndex.load(filepath, data)
+        start = 0
+        line_number = 1
+        while start < file_size:
+            end = min(start + chunk_size, file_size)
+            if row_index is not None:
+                offsets = row_index.offsets
+                end = offsets[min(bisect_left(offsets, end), len(offsets) - 1)]
+            else:
+                quote_count = data[start:end].count(b'"')
+                while end < file_size:
+                    newline_position = data.find(b"\n", end)
+                    if newline_position == -1:
+                        end = file_size
+                        break
+                    quote_count += data[end:newline_position + 1].count(b'"')
+                    end = newline_position + 1
+                    if quote_count % 2 == 0:
+                        break
+            chunks.append((start, end, line_number))
+            line_number += data[start:end].count(b"\n")
+            start = end
+        if row_index is not None:
+            row_index.close()
+    return chunks
+
+
+def validate_chunk(filepath:str, start:int, end:int, first_line_number:int)->tuple:
+    """
+    Check the rows of a byte range on their own, leaving the name uniqueness rule to the caller.
+
+    Returns:
+        tuple: (row_count, errors, names, name_line_numbers, field_errors), where row_count counts the rows
+               that are not blank, errors are (line_number, message) tuples for the rows that are not entries
+               or have an empty name, names and name_line_numbers list the other rows, and field_errors maps
+               positions in names to the message of rows breaking the phone or e-mail rules.
+    """
+    with open(filepath, "rb") as csv_file:
+        csv_file.seek(start)
+        text = csv_file.read(end - start).decode("utf-8")
+
+    row_count = 0
+    errors = []
+    names = []
+    name_line_numbers = []
+    field_errors = {}
+    csv_reader = csv.reader(io.StringIO(text), delimiter=';', dialect='excel', lineterminator='\n')
+    line_offset = first_line_number - 1
+    for row in csv_reader:
+        if not row:
+            # Blank line
+            continue
+        row_count += 1
+        if not csv_func.is_entry_row_valid(row):
+            errors.append((line_offset + csv_reader.line_num, misc.NOT_AN_ENTRY_MESSAGE))
+            continue
+
+        message = misc.is_entry_info_valid(NO_NAMES, None, row[0], row[1], row[2], True)["message_info"]
+        if not row[0]:
+            # Reported before the name is compared to the others
+            errors.append((line_offset + csv_reader.line_num, message))
+            continue
+        if message:
+            field_errors[len(names)] = message
+        names.append(row[0])
+        name_line_numbers.append(line_offset + csv_reader.line_num)
+    return row_count, errors, names, name_line_numbers, field_errors
+
+
+def validate_file(filepath:str, jobs:int=None, chunk_size:int=CHUNK_SIZE)->list:
+    """
+    Check every row of a directory file with the rules of misc.get_row_error(), on several processes.
+
+    The file is cut into byte ranges validated in parallel; names are then compared
+    across the whole file in file order, so the report is the same as checking the rows
+    one by one.
+
+    Args:
+        filepath (str): Path of the directory file.
+        jobs (int, optional): Number of worker processes, the number of processors if None.
+        chunk_size (int): Target size of the byte ranges, in bytes.
+
+    Returns:
+        tuple: (report, row_count), report listing (line_number, message) tuples for each invalid row,
+               in file order, and row_count counting the rows that are not blank.
+    """
+    chunks = split_file(filepath, chunk_size)
+    report = []
+    row_count = 0
+    seen_names = set()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(validate_chunk, [filepath] * len(chunks), *zip(*chunks)) if chunks else []
+        for chunk_row_count, errors, names, name_line_numbers, field_errors in results:
+            row_count += chunk_row_count
+            report.extend(errors)
+            for position, name in enumerate(names):
+                if name in seen_names:
+                    report.append((name_line_numbers[position], misc.DUPLICATE_NAME_MESSAGE))
+                else:
+                    seen_names.add(name)
+                    if position in field_errors:
+                        report.append((name_line_numbers[position], field_errors[position]))
+    report.sort()
+    return report, row_count
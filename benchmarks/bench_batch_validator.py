@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_batch_validator.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Compare the parallel batch validator with checking the rows one by one, for a
+# growing number of worker processes, and check they report the same lines.
+# Usage: bench_batch_validator.py [ROWS]   (default: 1000000)
+# Runs without a display.
+
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_validator
+import csv_func
+import misc
+
+DEFAULT_ROW_COUNT = 1_000_000
+SEED = 89
+
+
+def write_directory(filepath:str, row_count:int, rng:random.Random)->None:
+    # Mostly valid rows, with duplicate names, bad phones and e-mails, and quoted fields
+    with open(filepath, "w", encoding="utf-8") as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=';', dialect='excel', lineterminator='\n')
+        for number in range(row_count):
+            name = f"Name {rng.randrange(row_count)}" if rng.random() < 0.01 else f"Name; {number}"
+            phone = f"0{rng.randrange(10**9):09d}" if rng.random() < 0.99 else "12-34"
+            email = f"user.{number}@example.com" if rng.random() < 0.99 else "user@"
+            csv_writer.writerow([name, phone, email, "☆" if rng.random() < 0.1 else ""])
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROW_COUNT
+    with tempfile.TemporaryDirectory() as temp_directory:
+        filepath = os.path.join(temp_directory, "directory.csv")
+        write_directory(filepath, row_count, random.Random(SEED))
+
+        start = time.perf_counter()
+        names = set()
+        expected = []
+        for line_number, row, bytes_read in csv_func.iter_content_csv(filepath):
+            if row:
+                message = misc.get_row_error(row, names)
+                if message:
+                    expected.append((line_number, message))
+        sequential_time = time.perf_counter() - start
+        print(f"{'jobs':>10} {'time (s)':>10} {'rows/s':>10} {'speedup':>8}")
+        print(f"{'one by one':>10} {sequential_time:>10.2f} {row_count / sequential_time:>10.0f} {1:>8.2f}")
+
+        jobs = 1
+        while jobs <= os.cpu_count():
+            start = time.perf_counter()
+            report, validated_row_count = batch_validator.validate_file(filepath, jobs)
+            elapsed_time = time.perf_counter() - start
+            assert report == expected and validated_row_count == row_count, (jobs, len(report), len(expected))
+            print(f"{jobs:>10} {elapsed_time:>10.2f} {row_count / elapsed_time:>10.0f} {sequential_time / elapsed_time:>8.2f}")
+            jobs *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_compressed_csv.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Compare opening (parsing every row) and saving a directory file stored as plain text,
+# gzip and xz at several compression levels, on a throttled disk.
+# Usage: bench_compressed_csv.py [ROWS] [--bandwidths 10,100,1000]   (default: 1000000 rows)
+# The disk is simulated: open and save are timed on the local disk (files in the page cache),
+# then the time to move the bytes of the file at each bandwidth, in MB/s, is added. Transfer
+# and (de)compression are counted one after the other, so the times are upper bounds, as a
+# real slow link would overlap them in part.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv_func
+
+import directory_generator
+
+DEFAULT_ROW_COUNT = 1_000_000
+DEFAULT_BANDWIDTHS = "10,100,1000"
+
+# (file extension, compression level) of each variant timed
+VARIANTS = ((".csv", None), (".csv.gz", 1), (".csv.gz", 6), (".csv.gz", 9), (".csv.xz", 0), (".csv.xz", 6))
+
+
+def time_variant(rows:list, filepath:str, compression_level:int)->tuple:
+    """
+    Returns:
+        tuple: (save_seconds, open_seconds, file_size) of the directory file written with the rows.
+    """
+    start = time.perf_counter()
+    csv_func.replace_content_csv(filepath, rows, compression_level)
+    save_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    row_count = sum(1 for line_number, row, bytes_read in csv_func.iter_content_csv(filepath))
+    open_seconds = time.perf_counter() - start
+    assert row_count == len(rows)
+    return save_seconds, open_seconds, os.path.getsize(filepath)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time open and save of plain and compressed directory files on a throttled disk.")
+    parser.add_argument("rows", nargs="?", type=int, default=DEFAULT_ROW_COUNT, help="number of rows (default: 1000000)")
+    parser.add_argument("--bandwidths", default=DEFAULT_BANDWIDTHS, help="comma-separated disk bandwidths in MB/s")
+    args = parser.parse_args()
+    bandwidths = [float(bandwidth) for bandwidth in args.bandwidths.split(",")]
+    rows = list(directory_generator.generate_rows(args.rows))
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_directory:
+        for extension, compression_level in VARIANTS:
+            filepath = os.path.join(temp_directory, "directory" + extension)
+            save_seconds, open_seconds, file_size = time_variant(rows, filepath, compression_level)
+            label = extension + ("" if compression_level is None else f" -{compression_level}")
+            results.append((label, save_seconds, open_seconds, file_size))
+            print(f"{label:>12}: {file_size / 1e6:8.1f} MB, save {save_seconds:6.2f} s, open {open_seconds:6.2f} s "
+                  f"(local disk)", file=sys.stderr)
+
+    print(f"{args.rows} rows, open / save in seconds with the disk at each bandwidth")
+    print(f"{'':>12} {'MB':>8}" + "".join(f"{f'{bandwidth:g} MB/s':>18}" for bandwidth in bandwidths))
+    for label, save_seconds, open_seconds, file_size in results:
+        transfer_seconds = [file_size / 1e6 / bandwidth for bandwidth in bandwidths]
+        print(f"{label:>12} {file_size / 1e6:8.1f}" + "".join(
+            f"{open_seconds + seconds:8.2f} /{save_seconds + seconds:8.2f}" for seconds in transfer_seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_directory.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Measure what scripts using the headless directory core pay: the import time of
+# the directory module against GTK, and the memory taken by each entry, kept as
+# an Entry record against the list of strings the entry list rows used to be.
+# Usage: bench_directory.py [ROWS]   (default: 200000)
+# Runs without a display, the GTK import is only timed if PyGObject is installed.
+
+import csv
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+APP_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIRECTORY)
+
+import csv_func
+from directory import Directory
+from entry import Entry
+
+DEFAULT_ROW_COUNT = 200_000
+IMPORT_RUNS = 5
+SEED = 89
+
+
+def time_import(statement:str)->float:
+    """
+    Returns:
+        float: The best time taken by a fresh interpreter to run the import statement, in milliseconds, None if it fails.
+    """
+    best_time = None
+    for _ in range(IMPORT_RUNS):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", statement], cwd=APP_DIRECTORY, capture_output=True)
+        elapsed_time = (time.perf_counter() - start) * 1000
+        if result.returncode != 0:
+            return None
+        best_time = elapsed_time if best_time is None else min(best_time, elapsed_time)
+    return best_time
+
+
+def measure_rows(filepath:str, make_row)->float:
+    """
+    Returns:
+        float: Bytes allocated per row to keep every row of the file, including its strings.
+    """
+    tracemalloc.start()
+    rows = [make_row(row) for line_number, row, bytes_read in csv_func.iter_content_csv(filepath)]
+    allocated_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return allocated_size / len(rows)
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROW_COUNT
+    rng = random.Random(SEED)
+
+    baseline_time = time_import("pass")
+    for name, statement in (("directory", "import directory"),
+                            ("gtk", "import gi; gi.require_version('Gtk', '3.0'); from gi.repository import Gtk")):
+        import_time = time_import(statement)
+        if import_time is None:
+            print(f"import {name:>10}: n/a")
+        else:
+            print(f"import {name:>10}: {import_time - baseline_time:8.1f} ms over a bare interpreter")
+
+    with tempfile.TemporaryDirectory() as temp_directory:
+        filepath = os.path.join(temp_directory, "directory.csv")
+        with open(filepath, "w", encoding="utf-8") as csv_file:
+            csv_writer = csv.writer(csv_file, delimiter=';', dialect='excel', lineterminator='\n')
+            for number in range(row_count):
+                csv_writer.writerow([f"Name {number}", f"0{rng.randrange(10**9):09d}",
+                                     f"user.{number}@example.com", "☆" if rng.random() < 0.1 else ""])
+
+        print(f"{'rows':>10} {'list (B/row)':>13} {'Entry (B/row)':>14} {'load (rows/s)':>14}")
+        list_size = measure_rows(filepath, list)
+        entry_size = measure_rows(filepath, Entry.from_row)
+
+        start = time.perf_counter()
+        directory = Directory()
+        directory.load(filepath)
+        load_time = time.perf_counter() - start
+        print(f"{row_count:>10} {list_size:>13.1f} {entry_size:>14.1f} {row_count / load_time:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_exporters.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Export a synthetic directory file in every format, plain and compressed, streaming
+# the rows from the file, and report the throughput of each (MB of exported text per
+# second, before compression) and the size written. Then check that the memory
+# allocated by an export does not grow with the number of rows (tracemalloc peak).
+# Usage: bench_exporters.py [ROWS]   (default: 1000000)
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import csv_func
+import exporters
+
+import directory_generator
+
+DEFAULT_ROW_COUNT = 1_000_000
+
+# Row counts the memory check is run with, as fractions of ROWS
+MEMORY_CHECK_FRACTIONS = (0.05, 0.25)
+
+
+def iter_file_rows(filepath:str):
+    for line_number, row, bytes_read in csv_func.iter_content_csv(filepath):
+        yield row
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROW_COUNT
+
+    with tempfile.TemporaryDirectory() as temp_directory:
+        filepath = os.path.join(temp_directory, "directory.csv")
+        directory_generator.write_directory(filepath, row_count)
+        print(f"{row_count} rows, {os.path.getsize(filepath) / 1e6:.1f} MB directory file")
+
+        print(f"{'format':>8} {'compression':>11} {'seconds':>8} {'MB/s':>8} {'MB':>8} {'written MB':>10}")
+        output_filepath = os.path.join(temp_directory, "export")
+        for export_format in exporters.EXPORT_FORMATS:
+            for compression in (None, *exporters.COMPRESSIONS):
+                counts = exporters.export_rows(iter_file_rows(filepath), output_filepath, export_format, compression)
+                seconds = max(counts["seconds"], 1e-9)
+                print(f"{export_format:>8} {compression or 'none':>11} {seconds:8.2f} {counts['bytes'] / 1e6 / seconds:8.1f} "
+                      f"{counts['bytes'] / 1e6:8.1f} {counts['written'] / 1e6:10.1f}")
+
+        # The rows are read from the file as they are exported, so the peak should not depend on their number
+        for export_format in exporters.EXPORT_FORMATS:
+            peaks = []
+            for fraction in MEMORY_CHECK_FRACTIONS:
+                rows = (row for number, row in zip(range(int(row_count * fraction)), iter_file_rows(filepath)))
+                tracemalloc.start()
+                exporters.export_rows(rows, output_filepath, export_format, "gzip")
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            print(f"{export_format:>8} peak allocated: " + ", ".join(
+                f"{int(row_count * fraction)} rows {peak / 1024 / 1024:.1f} MiB" for fraction, peak in zip(MEMORY_CHECK_FRACTIONS, peaks)))
+
+
+if __name__ == "__main__":
+    main()
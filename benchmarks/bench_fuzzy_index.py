@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_fuzzy_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Compare fuzzy name lookups through the symmetric-delete index against computing the edit
+# distance to every name, and check they find the same rows.
+# Usage: bench_fuzzy_index.py [ROWS...]   (default: 10000 100000)
+# Runs without a display.
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entry import Entry
+from fuzzy_index import FuzzyNameIndex, edit_distance
+
+DEFAULT_DIRECTORY_SIZES = (10_000, 100_000)
+QUERIES_PER_DISTANCE = 20
+SEED = 89
+
+
+def make_typo(rng, name):
+    position = rng.randrange(len(name))
+    return name[:position] + rng.choice(string.ascii_lowercase) + name[position + 1:]
+
+
+def main():
+    directory_sizes = [int(argument) for argument in sys.argv[1:]] or DEFAULT_DIRECTORY_SIZES
+    rng = random.Random(SEED)
+    print(f"{'rows':>10} {'distance':>9} {'linear scan (ms)':>18} {'index (ms)':>12} {'build (s)':>10}")
+    for size in directory_sizes:
+        names = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(6, 14))) for _ in range(size)]
+
+        start = time.perf_counter()
+        entry_fuzzy_index = FuzzyNameIndex()
+        for row_id, name in enumerate(names):
+            entry_fuzzy_index.add(row_id, Entry(name, "", ""))
+        build_time = time.perf_counter() - start
+
+        for max_distance in 1, 2:
+            scan_time = index_time = 0.0
+            for _ in range(QUERIES_PER_DISTANCE):
+                query = make_typo(rng, rng.choice(names))
+
+                start = time.perf_counter()
+                expected = sorted((distance, row_id) for row_id, distance in
+                                  ((row_id, edit_distance(query, name, max_distance)) for row_id, name in enumerate(names))
+                                  if distance <= max_distance)
+                scan_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                found = entry_fuzzy_index.search(query, max_distance)
+                index_time += time.perf_counter() - start
+
+                assert found == expected, (query, max_distance, len(found), len(expected))
+
+            print(f"{size:>10} {max_distance:>9} {scan_time / QUERIES_PER_DISTANCE * 1000:>18.2f} "
+                  f"{index_time / QUERIES_PER_DISTANCE * 1000:>12.2f} {build_time:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_name_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Compare the latency of adding one entry (validation included) with and
+# without the name index, as the directory grows. Runs without a display.
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import misc
+import store_index
+
+DIRECTORY_SIZES = (1_000, 10_000, 100_000, 200_000)
+ADDS_PER_SIZE = 200
+
+
+def make_row(number:int)->list:
+    return [f"Contact {number}", f"0{number:09d}", f"contact{number}@example.com", "☆" if number % 10 == 0 else ""]
+
+
+def time_adds(entry_list:list, checked_against, indexes, first_number:int)->float:
+    """
+    Returns:
+        float: Mean latency of one add, in microseconds.
+    """
+    start = time.perf_counter()
+    for number in range(first_number, first_number + ADDS_PER_SIZE):
+        row = make_row(number)
+        validity = misc.is_entry_info_valid(checked_against, None, row[0], row[1], row[2], True)
+        assert validity["is_valid"], validity["message_info"]
+        entry_list.append(row)
+        if indexes is not None:
+            indexes.insert(len(indexes), row)
+    return (time.perf_counter() - start) / ADDS_PER_SIZE * 1_000_000
+
+
+def main():
+    print(f"{'rows':>10} {'list scan (us/add)':>20} {'name index (us/add)':>20}")
+    for size in DIRECTORY_SIZES:
+        rows = [make_row(number) for number in range(size)]
+
+        # Without the index: every add copies every name
+        scan_rows = list(rows)
+        scan_latency = time_adds(scan_rows, scan_rows, None, size)
+
+        # With the index: constant time duplicate check
+        entry_store_index = store_index.StoreIndex()
+        entry_name_index = store_index.NameIndex()
+        entry_store_index.add_index(entry_name_index)
+        indexed_rows = []
+        for row in rows:
+            indexed_rows.append(row)
+            entry_store_index.insert(len(entry_store_index), row)
+        index_latency = time_adds(indexed_rows, entry_name_index, entry_store_index, size)
+
+        problems = entry_store_index.check_consistency(indexed_rows)
+        assert not problems, problems
+        print(f"{size:>10} {scan_latency:>20.1f} {index_latency:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_paged_csv.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Measure how long a large directory file takes to show its first screen through
+# the paged reader behind the read-only view, on first open (row index built and
+# written) and on reopen (row index file mapped), how much memory it keeps, then
+# the cost of scrolling to random places.
+# Usage: bench_paged_csv.py [ROWS]   (default: 1000000)
+# The memory is the resident set size of the process, read from /proc (Linux only).
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paged_csv import PagedCsvFile
+
+DEFAULT_ROW_COUNT = 1_000_000
+SCREEN_ROW_COUNT = 40
+JUMP_COUNT = 1000
+SEED = 89
+
+
+def get_resident_size()->int:
+    """
+    Returns:
+        int: The resident set size of the process, in kB, 0 if it cannot be read.
+    """
+    try:
+        with open("/proc/self/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROW_COUNT
+    rng = random.Random(SEED)
+
+    with tempfile.TemporaryDirectory() as temp_directory:
+        filepath = os.path.join(temp_directory, "directory.csv")
+        with open(filepath, "w", encoding="utf-8") as csv_file:
+            for number in range(row_count):
+                csv_file.write(f"Name {number};0{rng.randrange(10**9):09d};user.{number}@example.com;"
+                               f"{'☆' if rng.random() < 0.1 else ''}\n")
+        file_size = os.path.getsize(filepath)
+
+        resident_size = get_resident_size()
+        for label in "first open", "reopen":
+            start = time.perf_counter()
+            pages = PagedCsvFile(filepath)
+            index_time = time.perf_counter() - start
+            first_screen = [pages.get_row(row_number) for row_number in range(min(SCREEN_ROW_COUNT, len(pages)))]
+            first_screen_time = time.perf_counter() - start
+            print(f"{label:>10}: index {index_time * 1000:.0f} ms, first screen {first_screen_time * 1000:.0f} ms"
+                  f"{' (row index rebuilt)' if pages.row_index.is_rebuilt else ''}")
+            if label == "first open":
+                pages.close()
+        print(f"{len(pages)} rows, {file_size / 1024 / 1024:.0f} MiB, {pages.page_count()} pages")
+
+        start = time.perf_counter()
+        for _ in range(JUMP_COUNT):
+            first_row_number = rng.randrange(max(len(pages) - SCREEN_ROW_COUNT, 1))
+            screen = [pages.get_row(row_number) for row_number in range(first_row_number, first_row_number + SCREEN_ROW_COUNT)]
+        jump_time = (time.perf_counter() - start) / JUMP_COUNT
+        print(f"random screen: {jump_time * 1000:.2f} ms, {pages.cached_page_count()} pages cached, "
+              f"resident size grew by {(get_resident_size() - resident_size) / 1024:.1f} MiB")
+        pages.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_phone_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Compare phone prefix (area code) and suffix (last digits) lookups through the
+# phone index against a linear scan, and check they find the same rows.
+# Usage: bench_phone_index.py [ROWS...]   (default: 100000 1000000 5000000)
+# Runs without a display.
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import misc
+from entry import Entry
+from phone_index import PhoneIndex
+
+DEFAULT_DIRECTORY_SIZES = (100_000, 1_000_000, 5_000_000)
+QUERIES_PER_MODE = 50
+SEED = 89
+
+
+def main():
+    directory_sizes = [int(argument) for argument in sys.argv[1:]] or DEFAULT_DIRECTORY_SIZES
+    rng = random.Random(SEED)
+    print(f"{'rows':>10} {'mode':>8} {'digits':>7} {'linear scan (ms)':>18} {'index (ms)':>12} {'build (s)':>10}")
+    for size in directory_sizes:
+        phones = [f"0{rng.randrange(10**9):09d}" for _ in range(size)]
+
+        start = time.perf_counter()
+        entry_phone_index = PhoneIndex()
+        for row_id, phone in enumerate(phones):
+            entry_phone_index.add(row_id, Entry("", phone, ""))
+        entry_phone_index.search_prefix("0")  # Merge the pending keys
+        entry_phone_index.search_suffix("0")
+        build_time = time.perf_counter() - start
+
+        for phone_match, mode_name, digit_count in ((misc.PHONE_MATCH_PREFIX, "prefix", 4),
+                                                    (misc.PHONE_MATCH_SUFFIX, "suffix", 5)):
+            scan_time = index_time = 0.0
+            for _ in range(QUERIES_PER_MODE):
+                phone = rng.choice(phones)
+                digits = phone[:digit_count] if phone_match == misc.PHONE_MATCH_PREFIX else phone[-digit_count:]
+
+                start = time.perf_counter()
+                if phone_match == misc.PHONE_MATCH_PREFIX:
+                    expected = [row_id for row_id, phone in enumerate(phones) if phone.startswith(digits)]
+                else:
+                    expected = [row_id for row_id, phone in enumerate(phones) if phone.endswith(digits)]
+                scan_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                found = entry_phone_index.search(digits, phone_match)
+                index_time += time.perf_counter() - start
+
+                assert found == expected, (digits, mode_name, len(found), len(expected))
+
+            print(f"{size:>10} {mode_name:>8} {digit_count:>7} {scan_time / QUERIES_PER_MODE * 1000:>18.2f} "
+                  f"{index_time / QUERIES_PER_MODE * 1000:>12.3f} {build_time:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
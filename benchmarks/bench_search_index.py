@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_search_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Check the search index against the linear misc.search() on random queries,
+# with adds, edits and removes in between, and compare their latency.
+# Runs without a display.
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import misc
+import search_index
+import store_index
+
+DIRECTORY_SIZES = (10_000, 100_000)
+QUERIES_PER_SIZE = 200
+SEED = 89
+
+FIRST_NAMES = ("Jean", "Marie", "Ahmed", "Zoë", "Søren", "Li", "Ana", "José", "Oğuz", "Chloé")
+LAST_NAMES = ("Martin", "Bernard", "Dubois", "Nguyễn", "Müller", "Smith", "García", "Kowalski")
+DOMAINS = ("example.com", "mail.org", "acme.fr")
+
+
+def make_row(rng:random.Random, number:int)->list:
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return [f"{first_name} {last_name} {number}",
+            "".join(rng.choice("0123456789") for _ in range(10)),
+            f"{first_name.lower()}.{number}@{rng.choice(DOMAINS)}",
+            "☆" if rng.random() < 0.1 else ""]
+
+
+def make_query(rng:random.Random, rows:list)->tuple:
+    search_by = rng.choice((misc.SEARCH_BY_NAME, misc.SEARCH_BY_PHONE, misc.SEARCH_BY_EMAIL, misc.SEARCH_BY_FAVORITE))
+    if search_by == misc.SEARCH_BY_FAVORITE:
+        return rng.choice(("☆", "")), search_by
+    value = rng.choice(rows)[search_by]
+    start = rng.randrange(len(value))
+    return value[start:start + rng.randint(1, 8)], search_by
+
+
+def main():
+    rng = random.Random(SEED)
+    print(f"{'rows':>10} {'query':>12} {'count':>6} {'linear scan (ms)':>18} {'index (ms)':>12}")
+    for size in DIRECTORY_SIZES:
+        entry_store_index = store_index.StoreIndex()
+        entry_search_index = search_index.SearchIndex(entry_store_index)
+        entry_store_index.add_index(entry_search_index)
+        rows = []
+        for number in range(size):
+            rows.append(make_row(rng, number))
+            entry_store_index.insert(len(entry_store_index), rows[-1])
+
+        # Edits and removes, to exercise the incremental updates
+        for _ in range(size // 100):
+            position = rng.randrange(len(rows))
+            rows[position] = make_row(rng, size + position)
+            entry_store_index.update(position, rows[position])
+            position = rng.randrange(len(rows))
+            del rows[position]
+            entry_store_index.delete(position)
+
+        # Query kind -> [count, scan time, index time]
+        timings = {"short": [0, 0.0, 0.0], "long": [0, 0.0, 0.0], "favorite": [0, 0.0, 0.0]}
+        for _ in range(QUERIES_PER_SIZE):
+            search_criteria, search_by = make_query(rng, rows)
+            if search_by == misc.SEARCH_BY_FAVORITE:
+                timing = timings["favorite"]
+            else:
+                timing = timings["long" if len(search_criteria) >= search_index.GRAM_LENGTH else "short"]
+            timing[0] += 1
+
+            start = time.perf_counter()
+            expected = []
+            misc.search(search_criteria, search_by, rows, expected)
+            timing[1] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            found = entry_search_index.search_rows(search_criteria, search_by)
+            timing[2] += time.perf_counter() - start
+
+            found = [row[:] for row in found]
+            assert found == expected, (search_criteria, search_by, len(found), len(expected))
+
+        problems = entry_store_index.check_consistency(rows)
+        assert not problems, problems
+        for kind, (count, scan_time, index_time) in timings.items():
+            if count:
+                print(f"{size:>10} {kind:>12} {count:>6} {scan_time / count * 1000:>18.2f} {index_time / count * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
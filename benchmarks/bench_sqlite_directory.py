@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_sqlite_directory.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Compare the CSV file with the in-memory directory against the SQLite backend:
+# opening a directory, searching it, and saving a single edit, which rewrites
+# the whole CSV file but is one small transaction in the database.
+# Usage: bench_sqlite_directory.py [ROWS]   (default: 200000)
+
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import misc
+from directory import Directory
+from entry import Entry
+from sqlite_directory import SqliteDirectory
+
+DEFAULT_ROW_COUNT = 200_000
+SEARCH_RUNS = 20
+SEED = 89
+
+# (label, search criteria, search by)
+QUERIES = (
+    ("short name", "7", misc.SEARCH_BY_NAME),
+    ("long name", "Name 1234", misc.SEARCH_BY_NAME),
+    ("e-mail", "user.99", misc.SEARCH_BY_EMAIL),
+    ("favorite", "☆", misc.SEARCH_BY_FAVORITE),
+)
+
+
+def time_call(function, runs:int=1)->float:
+    """
+    Returns:
+        float: The best time taken by the function, in milliseconds.
+    """
+    best_time = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        elapsed_time = (time.perf_counter() - start) * 1000
+        best_time = elapsed_time if best_time is None else min(best_time, elapsed_time)
+    return best_time
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROW_COUNT
+    rng = random.Random(SEED)
+
+    with tempfile.TemporaryDirectory() as temp_directory:
+        csv_filepath = os.path.join(temp_directory, "directory.csv")
+        database_filepath = os.path.join(temp_directory, "directory.sqlite")
+        with open(csv_filepath, "w", encoding="utf-8") as csv_file:
+            csv_writer = csv.writer(csv_file, delimiter=';', dialect='excel', lineterminator='\n')
+            for number in range(row_count):
+                csv_writer.writerow([f"Name {number}", f"0{rng.randrange(10**9):09d}",
+                                     f"user.{number}@example.com", "☆" if rng.random() < 0.1 else ""])
+
+        database = SqliteDirectory(database_filepath)
+        import_time = time_call(lambda: database.import_csv(csv_filepath))
+        database.close()
+        print(f"{row_count} rows, imported into SQLite in {import_time:.0f} ms")
+
+        directory = Directory()
+        csv_open_time = time_call(lambda: directory.load(csv_filepath))
+        database_open_time = time_call(lambda: SqliteDirectory(database_filepath).close())
+        database = SqliteDirectory(database_filepath)
+        database_read_time = time_call(lambda: sum(1 for _ in database.iter_rows()))
+        print(f"{'':>12} {'CSV (ms)':>10} {'SQLite (ms)':>12}")
+        print(f"{'open':>12} {csv_open_time:>10.1f} {database_open_time:>12.1f}")
+        print(f"{'read all':>12} {csv_open_time:>10.1f} {database_read_time:>12.1f}")
+
+        print(f"{'search':>12} {'CSV (ms)':>10} {'SQLite (ms)':>12} {'matches':>8}")
+        for label, search_criteria, search_by in QUERIES:
+            matches = directory.search(search_criteria, search_by)
+            if len(database.search(search_criteria, search_by)) != len(matches):
+                raise SystemExit(f"Backends disagree on {label!r}")
+            csv_time = time_call(lambda: directory.search(search_criteria, search_by), SEARCH_RUNS)
+            database_time = time_call(lambda: database.search(search_criteria, search_by), SEARCH_RUNS)
+            print(f"{label:>12} {csv_time:>10.2f} {database_time:>12.2f} {len(matches):>8}")
+
+        # One edit, then saving it
+        directory.edit(0, Entry("Edited", "0123", "edited@example.com", True))
+        csv_save_time = time_call(lambda: directory.save(csv_filepath))
+        first_entry_id = next(database.iter_rows())[0]
+        database_save_time = time_call(lambda: database.edit(first_entry_id, Entry("Edited", "0123", "edited@example.com", True)))
+        print(f"{'save edit':>12} {csv_save_time:>10.2f} {database_save_time:>12.2f}")
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
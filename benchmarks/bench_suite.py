@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_suite.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Time the core operations on synthetic directories of several sizes, headless,
+# and compare two runs.
+#   bench_suite.py run [--sizes 10000,100000] [--operations load,save] [-o results.json]
+#   bench_suite.py compare BASELINE.json CURRENT.json [--threshold 0.1]
+# Each operation runs in its own interpreter, so its peak memory (resident set size,
+# from getrusage) is its own. Directories are generated once per size and seed and kept
+# in --data-directory. compare exits with status 1 when an operation got slower or
+# bigger than the threshold allows.
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIRECTORY)
+
+import csv_func
+import duplicate_finder
+import misc
+from entry import Entry
+from sort_index import SortKeyIndex
+from store_index import NameIndex, StoreIndex
+
+import directory_generator
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.10
+
+# Number of entries checked by the add operation
+ADD_COUNT = 1000
+
+# (search criteria, search by) of the search operation, matching part of the generated rows
+SEARCH_QUERIES = (
+    ("Marie", misc.SEARCH_BY_NAME),
+    ("0123", misc.SEARCH_BY_PHONE),
+    ("@acme.test", misc.SEARCH_BY_EMAIL),
+    ("☆", misc.SEARCH_BY_FAVORITE),
+)
+
+
+def run_load(filepath:str, rows:list)->int:
+    return len(csv_func.get_content_csv(filepath))
+
+
+def run_save(filepath:str, rows:list)->int:
+    with tempfile.TemporaryDirectory() as temp_directory:
+        csv_func.write_content_csv(os.path.join(temp_directory, "directory.csv"), rows)
+    return len(rows)
+
+
+def run_search(filepath:str, rows:list)->int:
+    search_results = []
+    for search_criteria, search_by in SEARCH_QUERIES:
+        misc.search(search_criteria, search_by, rows, search_results)
+    return len(rows) * len(SEARCH_QUERIES)
+
+
+def run_add(filepath:str, rows:list)->int:
+    # The name index is built as on load, then each new entry is checked against it and added
+    name_index = NameIndex()
+    for row_id, row in enumerate(rows):
+        name_index.add(row_id, Entry.from_row(row))
+    for number in range(ADD_COUNT):
+        entry = Entry(f"New entry {number}", "0123456789", f"new.{number}@example.com", False)
+        if misc.is_entry_info_valid(name_index, None, entry.name, entry.phone, entry.email, True)["is_valid"] \
+                and not misc.entry_already_exists(entry.name, name_index):
+            name_index.add(len(rows) + number, entry)
+    return len(rows) + ADD_COUNT
+
+
+def run_sort(filepath:str, rows:list)->int:
+    # Each column is sorted by twice, the second sort reuses the keys computed by the first
+    store_index = StoreIndex()
+    sort_index = SortKeyIndex(store_index)
+    store_index.add_index(sort_index)
+    for row in rows:
+        store_index.insert(len(store_index), row)
+    for column in range(csv_func.ENTRY_FIELD_COUNT):
+        store_index.reorder(sort_index.get_order(column))
+        store_index.reorder(sort_index.get_order(column, is_descending=True))
+    return len(rows) * csv_func.ENTRY_FIELD_COUNT * 2
+
+
+def run_duplicates(filepath:str, rows:list)->int:
+    duplicate_finder.find_duplicates([(row[0], row[1], row[2]) for row in rows])
+    return len(rows)
+
+
+def run_validate(filepath:str, rows:list)->int:
+    names = set()
+    for row in rows:
+        misc.get_row_error(row, names)
+    return len(rows)
+
+
+# Operation name -> function taking the directory file and its rows, returning the number of rows processed
+OPERATIONS = {
+    "load": run_load,
+    "save": run_save,
+    "search": run_search,
+    "add": run_add,
+    "sort": run_sort,
+    "duplicates": run_duplicates,
+    "validate": run_validate,
+}
+
+
+def get_peak_memory()->int:
+    """
+    Returns:
+        int: The peak resident set size of this process, in kB.
+    """
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, in kB elsewhere
+    return peak_memory // 1024 if sys.platform == "darwin" else peak_memory
+
+
+def run_one(operation:str, filepath:str, repeat:int)->dict:
+    """
+    Time one operation over a directory file, in this process.
+
+    Returns:
+        dict: The measures of the operation, the best of repeat runs.
+    """
+    rows = csv_func.get_content_csv(filepath) if operation != "load" else None
+    best_time = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        processed_count = OPERATIONS[operation](filepath, rows)
+        elapsed_time = time.perf_counter() - start
+        best_time = elapsed_time if best_time is None else min(best_time, elapsed_time)
+    return {"seconds": best_time, "rows_per_second": processed_count / max(best_time, 1e-9),
+            "peak_memory_kb": get_peak_memory()}
+
+
+def run(args)->int:
+    sizes = [int(size) for size in args.sizes.split(",")]
+    operations = args.operations.split(",")
+    for operation in operations:
+        if operation not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {operation!r}, expected one of {', '.join(OPERATIONS)}")
+    os.makedirs(args.data_directory, exist_ok=True)
+
+    results = []
+    for size in sizes:
+        filepath = os.path.join(args.data_directory, f"directory-{size}-{args.seed}.csv")
+        if not os.path.exists(filepath):
+            print(f"Generating {size} rows...", file=sys.stderr)
+            directory_generator.write_directory(filepath + ".tmp", size, args.seed)
+            os.replace(filepath + ".tmp", filepath)
+
+        for operation in operations:
+            # Large directories are timed once, they take long enough to be stable
+            repeat = args.repeat if size < 1_000_000 else 1
+            process = subprocess.run([sys.executable, os.path.abspath(__file__), "run-one", operation, filepath, str(repeat)],
+                                     capture_output=True, text=True)
+            if process.returncode != 0:
+                print(f"{operation} on {size} rows failed:\n{process.stderr}", file=sys.stderr)
+                continue
+            result = {"operation": operation, "rows": size, **json.loads(process.stdout)}
+            results.append(result)
+            print(f"{operation:>10} {size:>10} rows: {result['seconds']:9.3f} s {result['rows_per_second']:12.0f} rows/s "
+                  f"{result['peak_memory_kb'] / 1024:8.1f} MiB", file=sys.stderr)
+
+    report = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    return 0
+
+
+def compare(args)->int:
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = {(result["operation"], result["rows"]): result for result in json.load(baseline_file)["results"]}
+    with open(args.current, encoding="utf-8") as current_file:
+        current = json.load(current_file)["results"]
+
+    regression_count = 0
+    print(f"{'operation':>10} {'rows':>10} {'time':>8} {'memory':>8}")
+    for result in current:
+        base_result = baseline.get((result["operation"], result["rows"]))
+        if base_result is None:
+            continue
+        time_change = result["seconds"] / max(base_result["seconds"], 1e-9) - 1
+        memory_change = result["peak_memory_kb"] / max(base_result["peak_memory_kb"], 1) - 1
+        flags = []
+        if time_change > args.threshold:
+            flags.append("SLOWER")
+        if memory_change > args.threshold:
+            flags.append("BIGGER")
+        regression_count += bool(flags)
+        print(f"{result['operation']:>10} {result['rows']:>10} {time_change:>+8.1%} {memory_change:>+8.1%} {' '.join(flags)}")
+
+    print(f"{regression_count} regression(s) above {args.threshold:.0%}")
+    return 1 if regression_count else 0
+
+
+def get_parser()->argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the core operations of Pyrectory.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparser = subparsers.add_parser("run", help="time every operation on every size")
+    subparser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                           help="comma-separated row counts (default: 10k to 10M)")
+    subparser.add_argument("--operations", default=",".join(OPERATIONS), help="comma-separated operations (default: all)")
+    subparser.add_argument("--seed", type=int, default=directory_generator.DEFAULT_SEED, help="generator seed")
+    subparser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per operation, the best is kept")
+    subparser.add_argument("--data-directory", default=os.path.join(tempfile.gettempdir(), "pyrectory-bench"),
+                           help="where the generated directories are kept")
+    subparser.add_argument("-o", "--output", default="-", help="JSON output file (default: standard output)")
+    subparser.set_defaults(function=run)
+
+    subparser = subparsers.add_parser("compare", help="flag regressions between two runs")
+    subparser.add_argument("baseline", help="JSON output of the reference run")
+    subparser.add_argument("current", help="JSON output of the run to check")
+    subparser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                           help="relative increase in time or memory counted as a regression (default: 0.1)")
+    subparser.set_defaults(function=compare)
+    return parser
+
+
+def main()->int:
+    # Internal: time one operation in a fresh interpreter, called by run
+    if len(sys.argv) == 5 and sys.argv[1] == "run-one":
+        print(json.dumps(run_one(sys.argv[2], sys.argv[3], int(sys.argv[4]))))
+        return 0
+    args = get_parser().parse_args()
+    return args.function(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/bench_ui_factory.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Compare the latency and memory cost of opening a dialog 1,000 times by
+# re-reading the Glade file, as Pyrectory used to, and through the UI factory.
+# Needs Gtk and a display.
+
+import os
+import resource
+import sys
+import time
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui_factory import UiFactory
+
+GLADE_FILEPATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "res", "ui.glade")
+OPEN_COUNT = 1_000
+DIALOG_IDS = ("message_win", "search_win", "edit_entry_win")
+
+
+def max_rss_kib()->int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def drain_events()->None:
+    while Gtk.events_pending():
+        Gtk.main_iteration()
+
+
+def open_with_shared_builder(dialog_id:str)->tuple:
+    """
+    The old way: every open adds the whole Glade file to one global builder.
+
+    Returns:
+        tuple: (mean latency in microseconds, objects held by the builder)
+    """
+    shared_builder = Gtk.Builder()
+    start = time.perf_counter()
+    for _ in range(OPEN_COUNT):
+        shared_builder.add_from_file(GLADE_FILEPATH)
+        dialog = shared_builder.get_object(dialog_id)
+        dialog.show_all()
+        dialog.hide()
+    latency = (time.perf_counter() - start) / OPEN_COUNT * 1_000_000
+    return latency, len(shared_builder.get_objects())
+
+
+def open_with_fresh_builder(dialog_id:str)->tuple:
+    """
+    The old way for windows that use their own builder and destroy the window on close.
+    """
+    start = time.perf_counter()
+    for _ in range(OPEN_COUNT):
+        builder = Gtk.Builder()
+        builder.add_from_file(GLADE_FILEPATH)
+        dialog = builder.get_object(dialog_id)
+        dialog.show_all()
+        dialog.destroy()
+    drain_events()
+    latency = (time.perf_counter() - start) / OPEN_COUNT * 1_000_000
+    return latency, len(builder.get_objects())
+
+
+def open_with_factory(dialog_id:str)->tuple:
+    """
+    The UI factory: the dialog is built from its own fragment once, then shown again.
+    """
+    ui = UiFactory(GLADE_FILEPATH, {})
+    start = time.perf_counter()
+    for _ in range(OPEN_COUNT):
+        builder = ui.get_builder(dialog_id)
+        dialog = builder.get_object(dialog_id)
+        dialog.show_all()
+        dialog.hide()
+    drain_events()
+    latency = (time.perf_counter() - start) / OPEN_COUNT * 1_000_000
+    return latency, len(builder.get_objects())
+
+
+def main():
+    print(f"{'dialog':<16} {'method':<16} {'us/open':>10} {'objects':>10} {'max RSS growth (KiB)':>22}")
+    for dialog_id in DIALOG_IDS:
+        for method_name, method in (("factory", open_with_factory),
+                                    ("fresh builder", open_with_fresh_builder),
+                                    ("shared builder", open_with_shared_builder)):
+            rss_before = max_rss_kib()
+            latency, object_count = method(dialog_id)
+            print(f"{dialog_id:<16} {method_name:<16} {latency:>10.1f} {object_count:>10} {max_rss_kib() - rss_before:>22}")
+
+
+if __name__ == "__main__":
+    main()
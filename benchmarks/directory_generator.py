@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+#    Pyrectory (benchmarks/directory_generator.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Write a synthetic directory file, the same for a given row count and seed.
+# Names mix scripts (accents, Cyrillic, Greek, CJK), phones are digit strings,
+# e-mails are derived from the names, about 10% of the entries are favorites,
+# and some entries have only a phone or only an e-mail. Every row is valid.
+# Usage: directory_generator.py ROWS OUTPUT [--seed SEED]
+
+import argparse
+import csv
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entry import FAVORITE_MARK
+
+DEFAULT_SEED = 89
+
+# (first name, last name, e-mail spelling of both)
+FIRST_NAMES = (("Anaïs", "anais"), ("Benoît", "benoit"), ("Chloé", "chloe"), ("Dmitri", "dmitri"),
+               ("Élodie", "elodie"), ("François", "francois"), ("Jürgen", "jurgen"), ("José", "jose"),
+               ("Łukasz", "lukasz"), ("Marie", "marie"), ("Noémie", "noemie"), ("Søren", "soren"),
+               ("Андрей", "andrei"), ("Наталья", "natalia"), ("Γιώργος", "giorgos"), ("明", "ming"),
+               ("さくら", "sakura"), ("John", "john"), ("Fatima", "fatima"), ("Zoë", "zoe"))
+LAST_NAMES = (("Müller", "muller"), ("Dupont", "dupont"), ("García", "garcia"), ("Nováková", "novakova"),
+              ("O'Brien", "obrien"), ("Smith", "smith"), ("Øster", "oster"), ("Иванов", "ivanov"),
+              ("Παπαδόπουλος", "papadopoulos"), ("王", "wang"), ("佐藤", "sato"), ("Nguyễn", "nguyen"),
+              ("Kowalski", "kowalski"), ("Lefèvre", "lefevre"), ("Da Silva", "dasilva"), ("Şahin", "sahin"))
+DOMAINS = ("example.com", "mail.example.org", "acme.test", "post.example.net", "uni.example.edu")
+
+# Share of favorite entries, and of entries with only a phone or only an e-mail
+FAVORITE_RATIO = 0.1
+PHONE_ONLY_RATIO = 0.05
+EMAIL_ONLY_RATIO = 0.05
+
+
+def generate_rows(row_count:int, seed:int=DEFAULT_SEED):
+    """
+    Yields:
+        list: row_count valid rows (name, phone, e-mail, favorite) with unique names.
+    """
+    rng = random.Random(seed)
+    for number in range(row_count):
+        first_name, first_name_ascii = rng.choice(FIRST_NAMES)
+        last_name, last_name_ascii = rng.choice(LAST_NAMES)
+        # The number keeps names unique, as the directory requires
+        name = f"{first_name} {last_name} {number}"
+        phone = f"0{rng.randrange(10**9):09d}"
+        email = f"{first_name_ascii}.{last_name_ascii}{number}@{rng.choice(DOMAINS)}"
+
+        draw = rng.random()
+        if draw < PHONE_ONLY_RATIO:
+            email = ""
+        elif draw < PHONE_ONLY_RATIO + EMAIL_ONLY_RATIO:
+            phone = ""
+        yield [name, phone, email, FAVORITE_MARK if rng.random() < FAVORITE_RATIO else ""]
+
+
+def write_directory(filepath:str, row_count:int, seed:int=DEFAULT_SEED)->None:
+    """
+    Write a synthetic directory file of row_count rows.
+    """
+    with open(filepath, "w", encoding="utf-8") as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=';', dialect='excel', lineterminator='\n')
+        csv_writer.writerows(generate_rows(row_count, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic directory file.")
+    parser.add_argument("rows", type=int, help="number of entries")
+    parser.add_argument("output", help="output file")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help=f"random seed (default: {DEFAULT_SEED})")
+    args = parser.parse_args()
+    write_directory(args.output, args.rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
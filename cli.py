@@ -0,0 +1,394 @@
+#    Pyrectory (cli.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Batch commands working on directory files without a display, for scripts and scheduled jobs.
+# Usage: python -m pyrectory {stream-validate,search,dedupe,duplicates,merge,convert,export} ...   (see --help)
+#    or: python cli.py ...
+# Every command reads its input row by row and reports its throughput on stderr.
+# Directory files ending with .gz or .xz are read and written compressed.
+
+import argparse
+import csv
+import sys
+import time
+
+import batch_validator
+import csv_func
+import directory_merge
+import duplicate_finder
+import exporters
+import misc
+from entry import FAVORITE_MARK
+from fuzzy_index import FUZZY_MAX_DISTANCE, edit_distance
+from phone_index import normalize_phone
+
+# Command line names of the searchable fields and of the phone match modes
+SEARCH_FIELDS = {"name": misc.SEARCH_BY_NAME, "phone": misc.SEARCH_BY_PHONE,
+                 "email": misc.SEARCH_BY_EMAIL, "favorite": misc.SEARCH_BY_FAVORITE}
+PHONE_MATCHES = {"contains": misc.PHONE_MATCH_CONTAINS, "prefix": misc.PHONE_MATCH_PREFIX,
+                 "suffix": misc.PHONE_MATCH_SUFFIX}
+
+
+def iter_rows(filepath:str, delimiter:str=';'):
+    """
+    Yields:
+        tuple: (line_number, row) for each row of the file that is not blank.
+    """
+    for line_number, row, bytes_read in csv_func.iter_content_csv(filepath, delimiter):
+        if row:
+            yield line_number, row
+
+
+def write_rows(filepath:str, rows)->None:
+    """
+    Write rows as a directory file, or to the standard output if filepath is "-".
+    The file is only replaced once every row is written, so it may be the input the rows are read from.
+
+    Args:
+        filepath (str): Path of the output file.
+        rows (iterable): The rows to write, consumed one at a time.
+    """
+    if filepath != "-":
+        csv_func.replace_content_csv(filepath, rows)
+        return
+    csv_writer = csv.writer(sys.stdout, delimiter=';', dialect='excel', lineterminator='\n')
+    for row in rows:
+        csv_writer.writerow(row)
+
+
+def report(message:str)->None:
+    print(message, file=sys.stderr)
+
+
+def report_throughput(command:str, row_count:int, start_time:float)->None:
+    elapsed_time = max(time.perf_counter() - start_time, 1e-9)
+    report(f"{command}: {row_count} rows in {elapsed_time:.2f} s ({row_count / elapsed_time:.0f} rows/s)")
+
+
+class RowCounter:
+    """
+    Pass rows through while counting them, for the throughput report.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+def iter_valid_rows(rows, names:set, filepath:str):
+    """
+    Drop the rows breaking the rules of the add entry window, reporting each one.
+
+    Args:
+        rows (iterable): (line_number, row) tuples.
+        names (set): The names of the rows kept so far.
+        filepath (str): Path of the file the rows come from, for the report.
+
+    Yields:
+        list: Each valid row.
+    """
+    for line_number, row in rows:
+        error = misc.get_row_error(row, names)
+        if error:
+            report(f"{filepath}:{line_number}: {error} (skipped)")
+        else:
+            yield row
+
+
+def stream_validate(args)->int:
+    """
+    Check every row of a directory file, listing the invalid ones with their line number.
+    With several jobs, the file is checked in parallel by batch_validator, with the same report.
+    Compressed files cannot be cut into byte ranges, they are always checked in one process.
+    """
+    start_time = time.perf_counter()
+    if args.jobs == 1 or csv_func.get_compression(args.input) is not None:
+        rows = RowCounter(iter_rows(args.input))
+        names = set()
+        error_count = 0
+        for line_number, row in rows:
+            error = misc.get_row_error(row, names)
+            if error:
+                error_count += 1
+                print(f"{line_number}: {error}")
+        row_count = rows.count
+    else:
+        report_lines, row_count = batch_validator.validate_file(args.input, args.jobs or None)
+        for line_number, error in report_lines:
+            print(f"{line_number}: {error}")
+        error_count = len(report_lines)
+    report_throughput("stream-validate", row_count, start_time)
+    report(f"stream-validate: {error_count} invalid rows")
+    return 1 if error_count else 0
+
+
+def is_row_match(row:list, search_criteria:str, search_by:int, phone_match:int)->bool:
+    """
+    Returns:
+        bool: True if the row matches the query, with the rules of misc.search() and of the phone index.
+    """
+    if search_by == misc.SEARCH_BY_FAVORITE:
+        return search_criteria == row[search_by]
+    elif search_by == misc.SEARCH_BY_PHONE and phone_match == misc.PHONE_MATCH_PREFIX:
+        # Phones without digits are not in the phone index
+        digits = normalize_phone(row[search_by])
+        return bool(digits) and digits.startswith(search_criteria)
+    elif search_by == misc.SEARCH_BY_PHONE and phone_match == misc.PHONE_MATCH_SUFFIX:
+        digits = normalize_phone(row[search_by])
+        return bool(digits) and digits.endswith(search_criteria)
+    return search_criteria in row[search_by]
+
+
+def search(args)->int:
+    """
+    Write the entries matching a query, in file order, or closest first for a fuzzy name search.
+    """
+    start_time = time.perf_counter()
+    search_by = SEARCH_FIELDS[args.by]
+    phone_match = PHONE_MATCHES[args.phone_match]
+    search_criteria = args.criteria
+    if search_by == misc.SEARCH_BY_FAVORITE:
+        search_criteria = FAVORITE_MARK if search_criteria else ""
+    elif search_by == misc.SEARCH_BY_PHONE and phone_match != misc.PHONE_MATCH_CONTAINS:
+        search_criteria = normalize_phone(search_criteria)
+
+    rows = RowCounter(iter_rows(args.input))
+    entries = (row for line_number, row in rows if csv_func.is_entry_row_valid(row))
+    if args.fuzzy:
+        if search_by != misc.SEARCH_BY_NAME:
+            report("search: --fuzzy only applies to names")
+            return 2
+        # Only the matches are kept in memory, to rank them
+        search_criteria = search_criteria.casefold()
+        matches = []
+        for row in entries:
+            distance = edit_distance(search_criteria, row[0].casefold(), args.max_distance)
+            if distance <= args.max_distance:
+                matches.append((distance, len(matches), row))
+        matches.sort()
+        write_rows(args.output, (row for distance, order, row in matches))
+    else:
+        write_rows(args.output, (row for row in entries if is_row_match(row, search_criteria, search_by, phone_match)))
+    report_throughput("search", rows.count, start_time)
+    return 0
+
+
+def dedupe(args)->int:
+    """
+    Copy a directory file, keeping only the first entry of each name.
+    """
+    start_time = time.perf_counter()
+    rows = RowCounter(iter_rows(args.input))
+    names = set()
+    duplicate_count = 0
+
+    def iter_unique_rows():
+        nonlocal duplicate_count
+        for line_number, row in rows:
+            if not csv_func.is_entry_row_valid(row):
+                report(f"{args.input}:{line_number}: {misc.NOT_AN_ENTRY_MESSAGE} (skipped)")
+            elif row[0] in names:
+                duplicate_count += 1
+            else:
+                names.add(row[0])
+                yield row
+
+    write_rows(args.output, iter_unique_rows())
+    report_throughput("dedupe", rows.count, start_time)
+    report(f"dedupe: {duplicate_count} duplicates removed")
+    return 0
+
+
+def duplicates(args)->int:
+    """
+    List the entries that are likely the same contact, by cluster, with their line number.
+    Unlike dedupe, names do not have to be equal, see duplicate_finder.get_similarity().
+    """
+    start_time = time.perf_counter()
+    rows = RowCounter(iter_rows(args.input))
+    line_numbers = []
+    entries = []
+    for line_number, row in rows:
+        if csv_func.is_entry_row_valid(row):
+            line_numbers.append(line_number)
+            entries.append((row[0], row[1], row[2]))
+        else:
+            report(f"{args.input}:{line_number}: {misc.NOT_AN_ENTRY_MESSAGE} (skipped)")
+
+    duplicate_report = duplicate_finder.find_duplicates(entries, args.jobs or None, args.threshold)
+    for number, (score, positions) in enumerate(duplicate_report.clusters, 1):
+        print(f"cluster {number} (score {score:.2f}):")
+        for position in positions:
+            print(f"  {line_numbers[position]}: {';'.join(entries[position])}")
+    report_throughput("duplicates", rows.count, start_time)
+    report(f"duplicates: {duplicate_report.summary()}")
+    return 0
+
+
+def merge(args)->int:
+    """
+    Combine directory files into one entry per name, the policy choosing which entry is kept.
+    """
+    start_time = time.perf_counter()
+    counts = directory_merge.merge_directories(
+        args.inputs, args.output, args.policy,
+        lambda filepath, line_number, message: report(f"{filepath}:{line_number}: {message} (skipped)"))
+    report_throughput("merge", counts["rows"], start_time)
+    report(f"merge: {counts['entries']} entries written, {counts['duplicates']} duplicates and {counts['invalid']} invalid rows dropped")
+    return 0
+
+
+def convert(args)->int:
+    """
+    Turn a CSV file with another delimiter, like an export from another tool, into a directory file.
+    Rows may have three fields (name, phone, e-mail) or four, any non-empty fourth field marking a favorite.
+    """
+    start_time = time.perf_counter()
+    rows = RowCounter(iter_rows(args.input, args.delimiter))
+
+    def iter_converted_rows():
+        for line_number, row in rows:
+            if args.skip_header and line_number == 1:
+                continue
+            elif len(row) == csv_func.ENTRY_FIELD_COUNT - 1:
+                row = row + [""]
+            elif len(row) == csv_func.ENTRY_FIELD_COUNT:
+                row = row[:3] + [FAVORITE_MARK if row[3].strip() else ""]
+            row = [field.strip() for field in row]
+            yield line_number, row
+
+    names = set()
+    write_rows(args.output, iter_valid_rows(iter_converted_rows(), names, args.input))
+    report_throughput("convert", rows.count, start_time)
+    return 0
+
+
+def export(args)->int:
+    """
+    Write the entries of a directory file as CSV, JSON Lines or vCards, optionally compressed,
+    the format and compression being given by the extension of the output unless set.
+    """
+    export_format = args.format or exporters.get_export_format(args.output)
+    if export_format is None:
+        report(f"export: cannot tell the format of {args.output}, use --format")
+        return 2
+
+    def iter_entries():
+        for line_number, row in iter_rows(args.input):
+            if csv_func.is_entry_row_valid(row):
+                yield row
+            else:
+                report(f"{args.input}:{line_number}: {misc.NOT_AN_ENTRY_MESSAGE} (skipped)")
+
+    counts = exporters.export_rows(iter_entries(), args.output, export_format, args.compression, args.level)
+    megabytes = counts["bytes"] / 1e6
+    seconds = max(counts["seconds"], 1e-9)
+    report(f"export: {counts['rows']} rows as {export_format}, {megabytes:.1f} MB in {seconds:.2f} s "
+           f"({megabytes / seconds:.1f} MB/s), {counts['written'] / 1e6:.1f} MB written")
+    return 0
+
+
+def get_parser()->argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Work on Pyrectory directory files without a display.")
+    parser.add_argument("--compression-level", type=int, choices=range(10), metavar="0-9",
+                        help="compression level of the .gz and .xz directory files written, higher is smaller and slower "
+                             f"(default: {csv_func.COMPRESSION_LEVEL})")
+    parser.add_argument("--row-index", action="store_true",
+                        help="also write the row index file (.rowidx) of the plain directory files written, "
+                             "so they open page by page without being scanned first")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparser = subparsers.add_parser("stream-validate", help="list the invalid rows of a directory file")
+    subparser.add_argument("input", help="directory file")
+    subparser.add_argument("-j", "--jobs", type=int, default=1,
+                           help="number of worker processes, 0 for one per processor (default: 1)")
+    subparser.set_defaults(function=stream_validate)
+
+    subparser = subparsers.add_parser("search", help="write the entries matching a query")
+    subparser.add_argument("input", help="directory file")
+    subparser.add_argument("criteria", help="text to search for, any non-empty text for favorites")
+    subparser.add_argument("--by", choices=SEARCH_FIELDS, default="name", help="field to search (default: name)")
+    subparser.add_argument("--phone-match", choices=PHONE_MATCHES, default="contains",
+                           help="how phone numbers are matched (default: contains)")
+    subparser.add_argument("--fuzzy", action="store_true", help="match names within a few edits of the criteria")
+    subparser.add_argument("--max-distance", type=int, default=FUZZY_MAX_DISTANCE,
+                           help=f"maximum edit distance of a fuzzy search (default: {FUZZY_MAX_DISTANCE})")
+    subparser.add_argument("-o", "--output", default="-", help="output file (default: standard output)")
+    subparser.set_defaults(function=search)
+
+    subparser = subparsers.add_parser("dedupe", help="keep only the first entry of each name")
+    subparser.add_argument("input", help="directory file")
+    subparser.add_argument("-o", "--output", default="-", help="output file (default: standard output)")
+    subparser.set_defaults(function=dedupe)
+
+    subparser = subparsers.add_parser("duplicates", help="list the entries that are likely the same contact")
+    subparser.add_argument("input", help="directory file")
+    subparser.add_argument("-j", "--jobs", type=int, default=0,
+                           help="number of worker processes, 0 for one per processor (default: 0)")
+    subparser.add_argument("--threshold", type=float, default=duplicate_finder.DUPLICATE_THRESHOLD,
+                           help=f"lowest score of a pair of duplicates, from 0 to 1 (default: {duplicate_finder.DUPLICATE_THRESHOLD})")
+    subparser.set_defaults(function=duplicates)
+
+    subparser = subparsers.add_parser("merge", help="combine directory files into one entry per name")
+    subparser.add_argument("inputs", nargs="+", help="directory files, in priority order")
+    subparser.add_argument("--policy", choices=directory_merge.MERGE_POLICIES, default=directory_merge.KEEP_FIRST,
+                           help="entry kept when names collide: the first, the last, or the first favorite (default: first)")
+    subparser.add_argument("-o", "--output", required=True, help="output file")
+    subparser.set_defaults(function=merge)
+
+    subparser = subparsers.add_parser("convert", help="turn a CSV export into a directory file")
+    subparser.add_argument("input", help="CSV file with name, phone, e-mail and optionally favorite columns")
+    subparser.add_argument("-d", "--delimiter", default=",", help="field delimiter of the input (default: ,)")
+    subparser.add_argument("--skip-header", action="store_true", help="ignore the first line of the input")
+    subparser.add_argument("-o", "--output", default="-", help="output file (default: standard output)")
+    subparser.set_defaults(function=convert)
+
+    subparser = subparsers.add_parser("export", help="write the entries as CSV, JSON Lines or vCards")
+    subparser.add_argument("input", help="directory file")
+    subparser.add_argument("-o", "--output", required=True,
+                           help="output file, .csv, .jsonl or .vcf, optionally followed by .gz or .xz")
+    subparser.add_argument("--format", choices=exporters.EXPORT_FORMATS, help="export format (default: from the output extension)")
+    subparser.add_argument("--compression", choices=exporters.COMPRESSIONS,
+                           help="compress the output (default: from the output extension)")
+    subparser.add_argument("--level", type=int, choices=range(10), metavar="0-9",
+                           help="compression level, higher is smaller and slower (default: --compression-level)")
+    subparser.set_defaults(function=export)
+    return parser
+
+
+def main(argv:list=None)->int:
+    args = get_parser().parse_args(argv)
+    if args.compression_level is not None:
+        csv_func.COMPRESSION_LEVEL = args.compression_level
+    if args.row_index:
+        csv_func.WRITE_ROW_INDEX = True
+    try:
+        return args.function(args)
+    except (OSError, UnicodeDecodeError, csv.Error, *csv_func.DECOMPRESSION_ERRORS) as error:
+        report(f"{args.command}: {error}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
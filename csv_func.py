@@ -17,21 +17,197 @@
 #    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
 
 import csv
-from gi.repository import Gtk
+import gzip
+import io
+import lzma
+import os
+
+import row_index
+from entry import FAVORITE_MARK
+
+# Number of fields in an entry: name, phone, e-mail and favorite
+ENTRY_FIELD_COUNT = 4
+
+# Number of rows between two updates of the progress reported by iter_content_csv()
+PROGRESS_INTERVAL = 1024
+
+# Extension of compressed directory files -> compression, see open_directory_file()
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".xz": "xz"}
+
+# Raised when a compressed directory file is truncated or corrupt, along with OSError
+DECOMPRESSION_ERRORS = (EOFError, lzma.LZMAError)
+
+# Compression level of the compressed directory files written, from 0 (fastest) to 9 (smallest).
+# Reading is about as fast at any level, writing slows down as it rises, xz much more than gzip
+COMPRESSION_LEVEL = 6
+
+# Write the row index file (see row_index) next to the plain directory files written whole, when the caller
+# does not tell. It lets large files be opened page by page without being scanned first, for a scan of the new file
+WRITE_ROW_INDEX = False
+
+def get_compression(filename:str):
+    """
+    Returns:
+        str: The compression of a directory file given by its extension, "gzip" or "xz", None if it is plain text.
+    """
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+
+def wrap_directory_file(binary_file, compression:str, mode:str='r', compression_level:int=None):
+    """
+    Read or write a directory file as text through its compression.
+
+    Args:
+        binary_file (io.BufferedIOBase): The file on disk, opened in binary mode. Closing the text file only closes it
+                                         when it is plain text, its position counts the bytes on disk in any case.
+        compression (str): "gzip", "xz" or None, see get_compression().
+        mode (str): 'r' or 'w'.
+        compression_level (int, optional): Compression level when writing, COMPRESSION_LEVEL if None.
+
+    Returns:
+        io.TextIOWrapper: The file as UTF-8 text.
+    """
+    level = COMPRESSION_LEVEL if compression_level is None else compression_level
+    if compression == "gzip":
+        # The name recorded in the header is the one of the directory file, not of a temporary file
+        name = os.path.basename(getattr(binary_file, "name", "")).removesuffix(".tmp")
+        binary_file = gzip.GzipFile(name, mode + 'b', level, binary_file)
+    elif compression == "xz":
+        binary_file = lzma.LZMAFile(binary_file, mode + 'b', preset=level if mode == 'w' else None)
+    return io.TextIOWrapper(binary_file, encoding="utf-8")
+
+def open_directory_file(filename:str, mode:str='r', compression_level:int=None):
+    """
+    Open a directory file as UTF-8 text, compressed or not as its extension tells (see COMPRESSION_EXTENSIONS).
+
+    Args:
+        filename (str): Path of the directory file.
+        mode (str): 'r' or 'w'.
+        compression_level (int, optional): Compression level when writing, COMPRESSION_LEVEL if None.
+
+    Returns:
+        io.TextIOWrapper: The open file.
+    """
+    compression = get_compression(filename)
+    if compression is None:
+        return open(filename, mode + 't', encoding="utf-8")
+    level = COMPRESSION_LEVEL if compression_level is None else compression_level
+    if compression == "gzip":
+        return gzip.open(filename, mode + 't', compresslevel=level, encoding="utf-8")
+    return lzma.open(filename, mode + 't', preset=level if mode == 'w' else None, encoding="utf-8")
 
 def get_content_csv(filename:str)->list:
     content = []
-    csv_file = open(filename, 'rt', encoding="utf-8")
+    csv_file = open_directory_file(filename)
     csv_reader = csv.reader(csv_file, delimiter=';', dialect='excel', lineterminator='\n')
     for row in csv_reader:
         content.append(row)
     csv_file.close()
     return content
 
-def write_content_csv(filename:str, entry_list)->None:
-    csv_file = open(filename, 'w', encoding="utf-8")
+def iter_content_csv(filename:str, delimiter:str=';'):
+    """
+    Parse a directory file one row at a time, without loading it whole, decompressing it on the way if it is compressed.
+
+    Args:
+        filename (str): Path of the CSV file.
+        delimiter (str): Field delimiter, only other CSV files being imported use another one.
+
+    Yields:
+        tuple: (line_number, row, bytes_read) for each row, where bytes_read is how far the file
+               has been read so far on disk (compressed bytes for a compressed file), updated every
+               PROGRESS_INTERVAL rows, usable to report progress against the size of the file.
+    """
+    with open(filename, 'rb') as binary_file, wrap_directory_file(binary_file, get_compression(filename)) as csv_file:
+        csv_reader = csv.reader(csv_file, delimiter=delimiter, dialect='excel', lineterminator='\n')
+        bytes_read = 0
+        for row_number, row in enumerate(csv_reader):
+            # The binary file still reports its position while the text layer is iterated,
+            # but asking costs a system call, as much as parsing the row
+            if row_number % PROGRESS_INTERVAL == 0:
+                bytes_read = binary_file.tell()
+            yield csv_reader.line_num, row, bytes_read
+
+def is_entry_row_valid(row:list)->bool:
+    """
+    Check if a parsed CSV row has the shape of an entry (name, phone, e-mail, favorite),
+    the favorite field being either empty or the favorite mark.
+
+    Args:
+        row (list): The parsed row.
+
+    Returns:
+        bool: True if the row can be stored in the entry list, False otherwise.
+    """
+    return len(row) == ENTRY_FIELD_COUNT and row[3] in ("", FAVORITE_MARK)
+
+def replace_content_csv(filename:str, entry_list, compression_level:int=None, with_row_index:bool=None)->None:
+    """
+    Write a directory file atomically: the rows go to a temporary file, flushed to disk,
+    which then replaces the directory file. A crash leaves either the old or the new file.
+    The rows may be read from the file being replaced, it is only replaced once they are all written.
+
+    Args:
+        filename (str): Path of the directory file, compressed if its extension tells so.
+        entry_list (iterable): The rows to write.
+        compression_level (int, optional): Compression level of a compressed file, COMPRESSION_LEVEL if None.
+        with_row_index (bool, optional): Also write the row index file of a plain file, WRITE_ROW_INDEX if None.
+    """
+    temp_filename = filename + ".tmp"
+    try:
+        with open(temp_filename, 'wb') as binary_file:
+            # Closing the text file of a compressed file writes its end, but leaves the file on disk open
+            csv_file = wrap_directory_file(binary_file, get_compression(filename), 'w', compression_level)
+            csv_writer = csv.writer(csv_file, delimiter=';', dialect='excel', lineterminator='\n')
+            csv_writer.writerows(entry_list)
+            if get_compression(filename) is None:
+                csv_file.flush()
+                csv_file.detach()
+            else:
+                csv_file.close()
+            binary_file.flush()
+            os.fsync(binary_file.fileno())
+        os.replace(temp_filename, filename)
+    except BaseException:
+        # The directory file is left as it was, without the half-written temporary file next to it
+        try:
+            os.remove(temp_filename)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable, where directories can be opened
+    try:
+        directory_fd = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+    except OSError:
+        directory_fd = None
+    if directory_fd is not None:
+        try:
+            os.fsync(directory_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(directory_fd)
+
+    write_row_index_file(filename, with_row_index)
+
+def write_row_index_file(filename:str, with_row_index:bool=None)->None:
+    """
+    Write the row index file of a directory file just written, if asked to and if it is not compressed:
+    compressed files are always read from the start, they have none. It must be written after the
+    directory file, it records its size and modification time.
+
+    Args:
+        filename (str): Path of the directory file.
+        with_row_index (bool, optional): Whether to write it, WRITE_ROW_INDEX if None.
+    """
+    if (WRITE_ROW_INDEX if with_row_index is None else with_row_index) and get_compression(filename) is None:
+        row_index.write_row_index(filename)
+
+def write_content_csv(filename:str, entry_list, with_row_index:bool=None, compression_level:int=None)->None:
+    csv_file = open_directory_file(filename, 'w', compression_level)
     csv_writer = csv.writer(csv_file, delimiter=';', dialect='excel', lineterminator='\n')
     for entry in entry_list:
         entry_content = entry[:]
         csv_writer.writerow(entry_content)
-    csv_file.close()
\ No newline at end of file
+    csv_file.close()
+    write_row_index_file(filename, with_row_index)
\ No newline at end of file
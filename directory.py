@@ -0,0 +1,187 @@
+#    Pyrectory (directory.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+import csv_func
+import misc
+import snapshot
+from entry import Entry
+from fuzzy_index import FuzzyNameIndex
+from phone_index import PhoneIndex
+from query_planner import MATCH_ALL, FieldStatistics, QueryPlanner
+from search_index import SearchIndex
+from sort_index import SortKeyIndex
+from store_index import NameIndex, StoreIndex
+
+
+class Directory:
+    """
+    The entries of a directory file with their indexes, usable without GTK.
+
+    Loading, saving, validating and searching only need this class. The GTK user
+    interface attaches the store index to its entry list, so the same indexes
+    follow the changes made through the list store.
+    """
+
+    def __init__(self):
+        self.store_index = StoreIndex()
+        self.name_index = NameIndex()
+        self.store_index.add_index(self.name_index)
+        self.search_index = SearchIndex(self.store_index)
+        self.store_index.add_index(self.search_index)
+        self.phone_index = PhoneIndex(self.store_index)
+        self.store_index.add_index(self.phone_index)
+        self.fuzzy_index = FuzzyNameIndex(store_index=self.store_index)
+        self.store_index.add_index(self.fuzzy_index)
+        self.sort_index = SortKeyIndex(self.store_index)
+        self.store_index.add_index(self.sort_index)
+        self.field_statistics = FieldStatistics()
+        self.store_index.add_index(self.field_statistics)
+
+    def __len__(self)->int:
+        return len(self.store_index)
+
+    def __iter__(self):
+        return iter(self.store_index.rows())
+
+    def rows(self)->list:
+        """
+        Returns:
+            list: The Entry of every row, in directory order, as a snapshot.
+        """
+        return self.store_index.rows()
+
+    def load(self, filepath:str, directory_journal=None)->list:
+        """
+        Replace the entries with the ones of a directory file.
+
+        Args:
+            filepath (str): Path of the directory file.
+            directory_journal (journal.Journal, optional): Journal replayed over the file.
+
+        Returns:
+            list: The line numbers of the invalid lines, which are skipped.
+        """
+        rows = snapshot.iter_directory_rows(filepath)
+        if directory_journal is not None:
+            rows = directory_journal.replay(rows)
+
+        self.store_index.clear()
+        invalid_line_numbers = []
+        for line_number, row, bytes_read in rows:
+            if not row:
+                # Blank line
+                continue
+            elif csv_func.is_entry_row_valid(row):
+                self.store_index.insert(len(self.store_index), row)
+            else:
+                invalid_line_numbers.append(line_number)
+        return invalid_line_numbers
+
+    def save(self, filepath:str, with_row_index:bool=None)->None:
+        """
+        Write every entry to a directory file, atomically.
+
+        Args:
+            filepath (str): Path of the directory file.
+            with_row_index (bool, optional): Also write its row index file, csv_func.WRITE_ROW_INDEX if None.
+        """
+        rows = self.store_index.rows()
+        csv_func.replace_content_csv(filepath, rows, with_row_index=with_row_index)
+        snapshot.update_snapshot(filepath, rows)
+
+    def validate(self, name:str, phone:str, email:str, original_name:str=None)->dict:
+        """
+        Check an entry about to be added, or edited when original_name is given.
+
+        Returns:
+            dict: 'is_valid' (bool) and 'message_info' (str), as returned by misc.is_entry_info_valid().
+        """
+        return misc.is_entry_info_valid(self.name_index, original_name, name, phone, email, original_name is None)
+
+    def add(self, entry:Entry)->int:
+        """
+        Append an entry, without validating it.
+
+        Returns:
+            int: The row id of the entry.
+        """
+        return self.store_index.insert(len(self.store_index), entry)
+
+    def edit(self, position:int, entry:Entry)->None:
+        """
+        Replace the entry at the given position, without validating it.
+        """
+        self.store_index.update(position, entry)
+
+    def remove(self, position:int)->None:
+        """
+        Remove the entry at the given position.
+        """
+        self.store_index.delete(position)
+
+    def sort(self, column:int, is_descending:bool=False)->list:
+        """
+        Reorder the entries by a column, one of the misc.SEARCH_BY_* constants.
+
+        Returns:
+            list: The previous position of each entry, in the new order.
+        """
+        new_order = self.sort_index.get_order(column, is_descending)
+        self.store_index.reorder(new_order)
+        return new_order
+
+    def search(self, search_criteria:str, search_by:int, phone_match:int=misc.PHONE_MATCH_CONTAINS, is_fuzzy:bool=False)->list:
+        """
+        Find the entries matching a query.
+
+        Args:
+            search_criteria (str): The criteria to search for.
+            search_by (int): The field to search by, one of the misc.SEARCH_BY_* constants.
+            phone_match (int): How phone numbers are matched, one of the misc.PHONE_MATCH_* constants.
+            is_fuzzy (bool): Match names within a few edits of the criteria instead of containing it.
+
+        Returns:
+            list: The row ids of the matching entries, closest first for a fuzzy search, in directory order otherwise.
+        """
+        if search_by == misc.SEARCH_BY_NAME and is_fuzzy:
+            return [row_id for distance, row_id in self.fuzzy_index.search(search_criteria)]
+        elif search_by == misc.SEARCH_BY_PHONE and phone_match != misc.PHONE_MATCH_CONTAINS:
+            return self.phone_index.search(search_criteria, phone_match)
+        return self.search_index.search(search_criteria, search_by)
+
+    def query(self, criteria:list, match:int=MATCH_ALL):
+        """
+        Find the entries matching several criteria at once.
+
+        Args:
+            criteria (list): query_planner.Criterion objects.
+            match (int): query_planner.MATCH_ALL to match every criterion, MATCH_ANY for any of them.
+
+        Returns:
+            query_planner.QueryPlan: The row ids of the matching entries, and how they were found.
+        """
+        return QueryPlanner(self).run(criteria, match)
+
+    def get_entries(self, row_ids)->list:
+        """
+        Returns:
+            list: The Entry of each given row id.
+        """
+        row = self.store_index.row
+        return [row(row_id) for row_id in row_ids]
@@ -0,0 +1,150 @@
+#    Pyrectory (directory_loader.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import csv
+import os
+import sqlite3
+import time
+from array import array
+from itertools import islice
+
+from gi.repository import GLib
+
+import csv_func
+import snapshot
+
+# Maximum time spent inserting rows before giving the main loop back, in seconds
+LOAD_TIME_SLICE = 0.02
+
+# Number of rows inserted between two checks of the time slice
+LOAD_BATCH_SIZE = 256
+
+
+class DirectoryLoader:
+    """
+    Load a directory file into the entry list from the GLib main loop, in time-sliced
+    batches, so the window keeps redrawing and the load can be cancelled.
+
+    The tree view is detached from the entry list during the load and attached back
+    once it is over, so it does not process every inserted row. Without a tree view,
+    the entry list is filled in the background while the window shows something else.
+    """
+
+    def __init__(self, filepath:str, entry_list, entry_treeview, on_progress, on_finished, journal=None, database=None):
+        """
+        Args:
+            filepath (str): Path of the directory file to load.
+            entry_list (Gtk.ListStore): The list store to fill.
+            entry_treeview (Gtk.TreeView): The tree view displaying the entries, None to leave it alone.
+            on_progress (callable): Called with the fraction of the file read so far.
+            on_finished (callable): Called with the loader once the load is over, cancelled or failed.
+            journal (journal.Journal, optional): Journal replayed over the file while it is loaded.
+            database (sqlite_directory.SqliteDirectory, optional): Database the entries are read from
+                                                                    instead of the file.
+        """
+        self.filepath = filepath
+        self.entry_list = entry_list
+        self.entry_treeview = entry_treeview
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.journal = journal
+        self.database = database
+        self.entry_ids = array('q')  # Database id of each loaded row, in entry list order
+
+        self.invalid_line_numbers = []
+        self.row_count = 0
+        self.is_cancelled = False
+        self.error = None
+        self._rows = None
+        self._file_size = 0
+        self._source_id = None
+
+    def start(self)->None:
+        """
+        Clear the entry list and schedule the load on the main loop.
+        """
+        if self.database is not None:
+            # Progress is counted in rows rather than in bytes
+            self._file_size = len(self.database) or 1
+            self._rows = self._iter_database_rows()
+        else:
+            self._file_size = os.path.getsize(self.filepath) or 1
+            # Read from the snapshot file when it is up to date, the directory file is not parsed then
+            self._rows = snapshot.iter_directory_rows(self.filepath)
+        if self.journal is not None:
+            self._rows = self.journal.replay(self._rows)
+
+        if self.entry_treeview is not None:
+            self.entry_treeview.set_model(None)
+        self.entry_list.clear()
+        self._source_id = GLib.idle_add(self._load_step)
+
+    def cancel(self)->None:
+        """
+        Stop the load. The rows inserted so far are removed.
+        """
+        if self._source_id is None:
+            return
+        GLib.source_remove(self._source_id)
+        self.is_cancelled = True
+        self.entry_list.clear()
+        self._finish()
+
+    def _load_step(self)->bool:
+        # Insert batches of rows until the time slice is used up
+        deadline = time.perf_counter() + LOAD_TIME_SLICE
+        bytes_read = 0
+        while time.perf_counter() < deadline:
+            batch_row_count = 0
+            try:
+                for line_number, row, bytes_read in islice(self._rows, LOAD_BATCH_SIZE):
+                    batch_row_count += 1
+                    if not row:
+                        # Blank line
+                        continue
+                    elif csv_func.is_entry_row_valid(row):
+                        self.entry_list.append(row)
+                        self.row_count += 1
+                    else:
+                        self.invalid_line_numbers.append(line_number)
+            except (OSError, UnicodeDecodeError, csv.Error, sqlite3.Error, *csv_func.DECOMPRESSION_ERRORS) as error:
+                # The file cannot be read any further, drop what was loaded
+                self.error = error
+                self.entry_list.clear()
+                self._finish()
+                return False
+
+            # Every row has been read
+            if batch_row_count < LOAD_BATCH_SIZE:
+                self._finish()
+                return False
+
+        self.on_progress(min(bytes_read / self._file_size, 1.0))
+        return True
+
+    def _iter_database_rows(self):
+        for row_count, (entry_id, row) in enumerate(self.database.iter_rows(), 1):
+            self.entry_ids.append(entry_id)
+            yield entry_id, row, row_count
+
+    def _finish(self)->None:
+        self._source_id = None
+        self._rows.close()
+        if self.entry_treeview is not None:
+            self.entry_treeview.set_model(self.entry_list)
+        self.on_finished(self)
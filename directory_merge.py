@@ -0,0 +1,212 @@
+#    Pyrectory (directory_merge.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+import heapq
+import os
+import tempfile
+from itertools import islice
+
+import csv_func
+import misc
+from entry import FAVORITE_MARK
+
+# Policies choosing which entry is kept when several files have the same name
+KEEP_FIRST = "first"
+KEEP_LAST = "last"
+PREFER_FAVORITE = "favorite"
+MERGE_POLICIES = (KEEP_FIRST, KEEP_LAST, PREFER_FAVORITE)
+
+# Inputs up to this total size are merged in a dictionary, larger ones are sorted on disk
+HASH_JOIN_MAX_SIZE = 64 * 1024 * 1024
+
+# Number of rows sorted in memory before being written to a run file
+RUN_ROW_COUNT = 200_000
+
+# Always empty, so misc.is_entry_info_valid() only checks the fields of the rows
+NO_NAMES = set()
+
+
+def get_invalid_row_message(row:list)->str:
+    """
+    Returns:
+        str: Why the row cannot be an entry, leaving name uniqueness aside. Empty if it can.
+    """
+    if not csv_func.is_entry_row_valid(row):
+        return misc.NOT_AN_ENTRY_MESSAGE
+    return misc.is_entry_info_valid(NO_NAMES, None, row[0], row[1], row[2], True)["message_info"]
+
+
+def is_better_entry(winner:list, candidate:list, policy:str)->bool:
+    """
+    Returns:
+        bool: True if the candidate, read after the current winner, replaces it.
+    """
+    if policy == KEEP_LAST:
+        return True
+    elif policy == PREFER_FAVORITE:
+        return candidate[3] == FAVORITE_MARK and winner[3] != FAVORITE_MARK
+    return False
+
+
+def merge_directories(input_filepaths:list, output_filepath:str, policy:str=KEEP_FIRST,
+                      on_invalid_row=None, max_size:int=HASH_JOIN_MAX_SIZE, temp_directory:str=None)->dict:
+    """
+    Merge directory files into one, with one entry per name.
+
+    Rows breaking the phone or e-mail rules of the add entry window are dropped.
+    When several rows have the same name, the policy chooses the one kept:
+    KEEP_FIRST, KEEP_LAST, or PREFER_FAVORITE (the first favorite one, else the first one).
+    Entries are written in the order their name first appears in the inputs.
+
+    Inputs up to max_size bytes in total are merged with a dictionary of names.
+    Larger ones are sorted by name in run files on disk, merged, then put back in
+    input order the same way, so memory use does not depend on the input size.
+
+    Args:
+        input_filepaths (list): Paths of the directory files, in priority order.
+        output_filepath (str): Path of the merged directory file.
+        policy (str): One of MERGE_POLICIES.
+        on_invalid_row (callable, optional): Called with (filepath, line_number, message) for each dropped row.
+        max_size (int): Largest total input size merged in memory, in bytes.
+        temp_directory (str, optional): Where run files are written, the system default if None.
+
+    Returns:
+        dict: Row counts: 'rows' read, 'invalid' rows dropped, 'duplicates' rows losing to another with
+              the same name, and 'entries' written.
+    """
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"Unknown merge policy {policy!r}, expected one of {MERGE_POLICIES}")
+
+    counts = {"rows": 0, "invalid": 0, "duplicates": 0, "entries": 0}
+    rows = iter_input_rows(input_filepaths, counts, on_invalid_row)
+    if sum(os.path.getsize(filepath) for filepath in input_filepaths) <= max_size:
+        entries = hash_merge(rows, policy)
+    else:
+        entries = sort_merge(rows, policy, temp_directory)
+
+    def count_entries(entries):
+        for entry in entries:
+            counts["entries"] += 1
+            yield entry
+
+    # The output replaces its file only once every input has been read, it may be one of them
+    csv_func.replace_content_csv(output_filepath, count_entries(entries))
+    counts["duplicates"] = counts["rows"] - counts["invalid"] - counts["entries"]
+    return counts
+
+
+def iter_input_rows(input_filepaths:list, counts:dict, on_invalid_row):
+    """
+    Yields:
+        tuple: (order, row) for each valid row of the inputs, order counting rows across every input.
+    """
+    order = 0
+    for filepath in input_filepaths:
+        for line_number, row, bytes_read in csv_func.iter_content_csv(filepath):
+            if not row:
+                # Blank line
+                continue
+            counts["rows"] += 1
+            message = get_invalid_row_message(row)
+            if message:
+                counts["invalid"] += 1
+                if on_invalid_row is not None:
+                    on_invalid_row(filepath, line_number, message)
+                continue
+            yield order, row
+            order += 1
+
+
+def hash_merge(rows, policy:str):
+    """
+    Keep one row per name in a dictionary, which remembers the order names were first seen in.
+
+    Returns:
+        iterator: The row kept for each name.
+    """
+    winners = {}
+    for order, row in rows:
+        winner = winners.get(row[0])
+        if winner is None or is_better_entry(winner, row, policy):
+            winners[row[0]] = row
+    return iter(winners.values())
+
+
+def sort_merge(rows, policy:str, temp_directory:str):
+    """
+    Keep one row per name, sorting the rows by name on disk instead of holding them all.
+
+    Yields:
+        list: The row kept for each name, in the order names were first seen in.
+    """
+    with tempfile.TemporaryDirectory(prefix="pyrectory-merge-", dir=temp_directory) as run_directory:
+        # Sort by name, then by order so each name comes with its rows in input order
+        by_name = external_sort(([row[0], order] + row for order, row in rows), run_directory, "name", 2)
+
+        # Reduce each name to its winner, remembering where the name first appeared
+        def iter_winners():
+            name = first_order = winner = None
+            for record in by_name:
+                if record[0] != name:
+                    if winner is not None:
+                        yield [first_order, winner]
+                    name, first_order, winner = record[0], record[1], record[2:]
+                elif is_better_entry(winner, record[2:], policy):
+                    winner = record[2:]
+            if winner is not None:
+                yield [first_order, winner]
+
+        by_order = external_sort(([first_order] + winner for first_order, winner in iter_winners()),
+                                 run_directory, "order", 1)
+        for record in by_order:
+            yield record[1:]
+
+
+def external_sort(records, run_directory:str, run_name:str, key_length:int):
+    """
+    Sort records by their first fields, holding at most RUN_ROW_COUNT of them in memory.
+
+    Args:
+        records (iterable): Lists of strings, but for the last field of the key, an int.
+        run_directory (str): Directory the sorted runs are written to.
+        run_name (str): Prefix of the run file names, unique among the sorts sharing the directory.
+        key_length (int): Number of fields the records are sorted by.
+
+    Yields:
+        list: The records in order, the last field of their key an int again.
+    """
+    order_field = key_length - 1
+    run_filepaths = []
+    records = iter(records)
+    while True:
+        run = list(islice(records, RUN_ROW_COUNT))
+        if not run:
+            break
+        run.sort(key=lambda record: record[:key_length])
+        run_filepath = os.path.join(run_directory, f"{run_name}-{len(run_filepaths)}.csv")
+        csv_func.write_content_csv(run_filepath, run, with_row_index=False)
+        run_filepaths.append(run_filepath)
+
+    def read_run(run_filepath):
+        for line_number, record, bytes_read in csv_func.iter_content_csv(run_filepath):
+            record[order_field] = int(record[order_field])
+            yield record
+
+    yield from heapq.merge(*(read_run(run_filepath) for run_filepath in run_filepaths),
+                           key=lambda record: record[:key_length])
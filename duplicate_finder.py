@@ -0,0 +1,373 @@
+#    Pyrectory (duplicate_finder.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import random
+import re
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, groupby
+
+from phone_index import normalize_phone
+
+# Phone numbers with fewer digits (extensions, short codes) are too common to group entries by
+MIN_PHONE_DIGITS = 6
+
+# E-mail local parts shared by unrelated people, not used to group entries on their own
+GENERIC_LOCAL_PARTS = frozenset(("admin", "contact", "hello", "info", "mail", "office", "sales", "support"))
+MIN_LOCAL_PART_LENGTH = 3
+
+# Names are compared as sets of character shingles of this length, padded with a space on both sides
+SHINGLE_LENGTH = 3
+
+# MinHash signature of a name: BAND_COUNT bands of BAND_SIZE values. Two names land in a common
+# bucket with a probability of 1 - (1 - J^BAND_SIZE)^BAND_COUNT, J being the Jaccard similarity
+# of their shingles: about 80% at J = 0.6, 40% at J = 0.4 and 6% at J = 0.2
+BAND_COUNT = 8
+BAND_SIZE = 3
+MINHASH_SEED = 89
+MINHASH_PRIME = (1 << 31) - 1
+
+# Blocks larger than this hold a key common to too many entries to tell anything (a shared
+# switchboard number, a frequent name), their pairs are not compared
+MAX_BLOCK_SIZE = 100
+
+# Pairs scoring at least this are reported as duplicates, see get_similarity()
+DUPLICATE_THRESHOLD = 0.5
+
+# Similarity given to names where one abbreviates the other, like "J. Smith" and "John Smith"
+ABBREVIATION_SIMILARITY = 0.8
+
+# Number of entries whose keys are computed by each task, and number of key partitions grouped by each task
+CHUNK_ENTRY_COUNT = 50_000
+PARTITION_COUNT = 16
+
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+DIGITS_PATTERN = re.compile(r"\d+")
+
+# (a, b) of the hash functions h -> (a * h + b) mod MINHASH_PRIME, the same in every process
+_rng = random.Random(MINHASH_SEED)
+MINHASH_FUNCTIONS = tuple((_rng.randrange(1, MINHASH_PRIME), _rng.randrange(MINHASH_PRIME))
+                          for _ in range(BAND_COUNT * BAND_SIZE))
+del _rng
+
+# Shingle -> its value under every MinHash function. Names share few distinct shingles, so each is hashed once per process
+_shingle_hashes = {}
+
+# Entries the tasks of a process work on, as (name, phone, e-mail) tuples, see set_worker_entries()
+_worker_entries = []
+
+
+def normalize_name(name:str)->str:
+    """
+    Returns:
+        str: The name case folded, punctuation turned into single spaces.
+    """
+    return " ".join(NON_WORD_PATTERN.sub(" ", name.casefold()).split())
+
+
+def get_shingles(name:str)->set:
+    """
+    Returns:
+        set: The character shingles of the normalized name.
+    """
+    padded_name = f" {normalize_name(name)} "
+    return {padded_name[start:start + SHINGLE_LENGTH] for start in range(max(len(padded_name) - SHINGLE_LENGTH + 1, 1))}
+
+
+def get_shingle_hashes(shingle:str)->tuple:
+    shingle_hashes = _shingle_hashes.get(shingle)
+    if shingle_hashes is None:
+        # BLAKE2 rather than hash(), which differs between processes for strings
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+        shingle_hashes = _shingle_hashes[shingle] = tuple([(a * value + b) % MINHASH_PRIME for a, b in MINHASH_FUNCTIONS])
+    return shingle_hashes
+
+
+def get_minhash_signature(shingles:set)->tuple:
+    """
+    Returns:
+        tuple: The minimum of every MinHash function over the shingles.
+    """
+    return tuple(map(min, *map(get_shingle_hashes, shingles))) if len(shingles) > 1 else get_shingle_hashes(*shingles)
+
+
+def hash_key(key:str)->int:
+    """
+    Returns:
+        int: A 63-bit hash of a blocking key, the same in every process.
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little") >> 1
+
+
+def get_blocking_keys(name:str, phone:str, email:str)->list:
+    """
+    Get the keys grouping an entry with the entries it may duplicate: its phone digits,
+    its e-mail address and local part case folded, and the MinHash bands of its name.
+
+    Returns:
+        list: The hashes of the keys, see hash_key().
+    """
+    keys = []
+    phone_digits = normalize_phone(phone)
+    if len(phone_digits) >= MIN_PHONE_DIGITS:
+        keys.append(hash_key("phone:" + phone_digits))
+    if email:
+        email = email.casefold()
+        keys.append(hash_key("email:" + email))
+        local_part = email.rpartition("@")[0]
+        if len(local_part) >= MIN_LOCAL_PART_LENGTH and local_part not in GENERIC_LOCAL_PARTS:
+            keys.append(hash_key("local:" + local_part))
+
+    # Names with different numbers are never similar (see get_name_similarity()), so the numbers are part of the bands
+    name_numbers = hash_key("numbers:" + " ".join(DIGITS_PATTERN.findall(name)))
+    signature = get_minhash_signature(get_shingles(name))
+    for band in range(BAND_COUNT):
+        # Tuples of ints hash the same in every process, unlike strings
+        keys.append(hash((band, name_numbers) + signature[band * BAND_SIZE:(band + 1) * BAND_SIZE]) & ((1 << 63) - 1))
+    return keys
+
+
+def is_abbreviation(name_a:str, name_b:str)->bool:
+    """
+    Returns:
+        bool: True if the normalized names have the same words, but for some given as their initial in one of them.
+    """
+    words_a = name_a.split()
+    words_b = name_b.split()
+    if len(words_a) != len(words_b) or len(words_a) < 2:
+        return False
+    for word_a, word_b in zip(words_a, words_b):
+        if word_a != word_b and not (len(word_a) == 1 and word_b.startswith(word_a)) \
+                and not (len(word_b) == 1 and word_a.startswith(word_b)):
+            return False
+    return True
+
+
+def get_name_similarity(name_a:str, name_b:str)->float:
+    """
+    Returns:
+        float: The Jaccard similarity of the shingles of the names, ABBREVIATION_SIMILARITY if one
+               abbreviates the other. 0 if their numbers differ, like "Room 12" and "Room 13".
+    """
+    if DIGITS_PATTERN.findall(name_a) != DIGITS_PATTERN.findall(name_b):
+        return 0.0
+    shingles_a = get_shingles(name_a)
+    shingles_b = get_shingles(name_b)
+    similarity = len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
+    if similarity < ABBREVIATION_SIMILARITY and is_abbreviation(normalize_name(name_a), normalize_name(name_b)):
+        return ABBREVIATION_SIMILARITY
+    return similarity
+
+
+def get_similarity(entry_a:tuple, entry_b:tuple)->float:
+    """
+    Score how likely two entries are the same contact, from 0 to 1. Entries sharing a phone number
+    or an e-mail address score from 0.4 (unrelated names) to 1 (same name), others up to 0.9 on
+    their name alone.
+
+    Args:
+        entry_a (tuple): (name, phone, e-mail) of the first entry.
+        entry_b (tuple): (name, phone, e-mail) of the second entry.
+    """
+    name_similarity = get_name_similarity(entry_a[0], entry_b[0])
+    phone_digits = normalize_phone(entry_a[1])
+    is_contact_shared = (len(phone_digits) >= MIN_PHONE_DIGITS and phone_digits == normalize_phone(entry_b[1])) \
+        or (entry_a[2] and entry_a[2].casefold() == entry_b[2].casefold())
+    if is_contact_shared:
+        return 0.4 + 0.6 * name_similarity
+    return 0.9 * name_similarity
+
+
+def set_worker_entries(entries:list)->None:
+    """
+    Give the entries to the tasks of this process, once per worker process.
+    """
+    global _worker_entries
+    _worker_entries = entries
+
+
+def get_chunk_keys(start:int, end:int, position_bits:int)->list:
+    """
+    Compute the blocking keys of a range of entries.
+
+    Returns:
+        list: For each partition, the bytes of an array('q') of (key << position_bits | position) values,
+              the key being cut to the bits left and the partition being chosen by the key.
+    """
+    key_mask = (1 << (63 - position_bits)) - 1
+    partitions = [array('q') for _ in range(PARTITION_COUNT)]
+    for position in range(start, end):
+        name, phone, email = _worker_entries[position]
+        for key in get_blocking_keys(name, phone, email):
+            partitions[key % PARTITION_COUNT].append((key & key_mask) << position_bits | position)
+    return [partition.tobytes() for partition in partitions]
+
+
+def find_partition_pairs(packed_keys:bytes, position_bits:int, max_block_size:int, threshold:float)->tuple:
+    """
+    Group the entries of a partition sharing a key into blocks, and score the pairs of every block.
+
+    Returns:
+        tuple: (pairs, block_count, oversized_block_count, compared_count), pairs being
+               (position_a, position_b, score) tuples for the pairs scoring at least the threshold.
+    """
+    values = array('q')
+    values.frombytes(packed_keys)
+    position_mask = (1 << position_bits) - 1
+    compared_pairs = set()
+    pairs = []
+    block_count = 0
+    oversized_block_count = 0
+    for key, block in groupby(sorted(values), key=lambda value: value >> position_bits):
+        positions = [value & position_mask for value in block]
+        if len(positions) < 2:
+            continue
+        block_count += 1
+        if len(positions) > max_block_size:
+            oversized_block_count += 1
+            continue
+        for pair in combinations(positions, 2):
+            # Entries sharing several keys of the partition are compared once
+            if pair in compared_pairs or pair[0] == pair[1]:
+                continue
+            compared_pairs.add(pair)
+            score = get_similarity(_worker_entries[pair[0]], _worker_entries[pair[1]])
+            if score >= threshold:
+                pairs.append((pair[0], pair[1], score))
+    return pairs, block_count, oversized_block_count, len(compared_pairs)
+
+
+class DuplicateReport:
+    """
+    Clusters of entries that are likely the same contact, and what it took to find them.
+    """
+
+    def __init__(self):
+        self.clusters = []  # (best pair score, positions of the entries), most likely duplicates first
+        self.entry_count = 0
+        self.key_count = 0
+        self.block_count = 0
+        self.oversized_block_count = 0
+        self.compared_count = 0  # Pairs scored, the same pair being counted once per partition it shares keys in
+        self.pair_count = 0      # Pairs scoring at least the threshold
+        self.seconds = 0.0
+
+    def summary(self)->str:
+        return (f"{len(self.clusters)} clusters of duplicates in {self.entry_count} entries, "
+                f"{self.compared_count} pairs compared in {self.block_count} blocks "
+                f"({self.oversized_block_count} too large skipped), {self.seconds:.2f} s")
+
+
+def get_clusters(pairs:dict)->list:
+    """
+    Join the pairs of duplicates sharing an entry into clusters.
+
+    Args:
+        pairs (dict): (position_a, position_b) -> score.
+
+    Returns:
+        list: (best pair score, sorted positions) tuples, highest score then largest cluster first.
+    """
+    parents = {}
+
+    def find(position):
+        root = position
+        while parents.get(root, root) != root:
+            root = parents[root]
+        while position != root:
+            parents[position], position = root, parents[position]
+        return root
+
+    for position_a, position_b in pairs:
+        root_a = find(position_a)
+        root_b = find(position_b)
+        if root_a != root_b:
+            parents[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = {}
+    best_scores = {}
+    for (position_a, position_b), score in pairs.items():
+        root = find(position_a)
+        clusters.setdefault(root, set()).update((position_a, position_b))
+        best_scores[root] = max(best_scores.get(root, 0.0), score)
+    return sorted(((best_scores[root], sorted(positions)) for root, positions in clusters.items()),
+                  key=lambda cluster: (-cluster[0], -len(cluster[1]), cluster[1][0]))
+
+
+def find_duplicates(entries:list, jobs:int=None, threshold:float=DUPLICATE_THRESHOLD,
+                    max_block_size:int=MAX_BLOCK_SIZE, mp_context=None)->DuplicateReport:
+    """
+    Find the entries that are likely the same contact, without comparing every pair.
+
+    Entries are grouped into blocks by key (see get_blocking_keys()), and only the pairs
+    within a block are scored. Keys are computed by ranges of entries, then grouped by
+    partition, both on a pool of processes. Pairs scoring at least the threshold are
+    joined into clusters.
+
+    Args:
+        entries (list): (name, phone, e-mail) tuples.
+        jobs (int, optional): Number of worker processes, the number of processors if None, 1 to work in this process.
+        threshold (float): Lowest score of a pair of duplicates, see get_similarity().
+        max_block_size (int): Blocks with more entries are skipped.
+        mp_context (multiprocessing.context.BaseContext, optional): How the worker processes are started.
+
+    Returns:
+        DuplicateReport: The clusters, positions referring to entries.
+    """
+    start_time = time.perf_counter()
+    report = DuplicateReport()
+    report.entry_count = len(entries)
+    position_bits = max(len(entries).bit_length(), 1)
+    chunks = [(start, min(start + CHUNK_ENTRY_COUNT, len(entries))) for start in range(0, len(entries), CHUNK_ENTRY_COUNT)]
+
+    if jobs == 1:
+        set_worker_entries(entries)
+        try:
+            pairs = _find_pairs(map, chunks, position_bits, max_block_size, threshold, report)
+        finally:
+            set_worker_entries([])
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=mp_context, initializer=set_worker_entries,
+                                 initargs=(entries,)) as executor:
+            pairs = _find_pairs(executor.map, chunks, position_bits, max_block_size, threshold, report)
+
+    report.pair_count = len(pairs)
+    report.clusters = get_clusters(pairs)
+    report.seconds = time.perf_counter() - start_time
+    return report
+
+
+def _find_pairs(map_function, chunks:list, position_bits:int, max_block_size:int, threshold:float,
+                report:DuplicateReport)->dict:
+    chunk_partitions = list(map_function(get_chunk_keys, *zip(*chunks), [position_bits] * len(chunks))) if chunks else []
+    partitions = [b"".join(partitions[number] for partitions in chunk_partitions) for number in range(PARTITION_COUNT)]
+    del chunk_partitions
+    report.key_count = sum(len(partition) for partition in partitions) // 8
+
+    pairs = {}
+    for partition_pairs, block_count, oversized_block_count, compared_count in map_function(
+            find_partition_pairs, partitions, [position_bits] * PARTITION_COUNT,
+            [max_block_size] * PARTITION_COUNT, [threshold] * PARTITION_COUNT):
+        report.block_count += block_count
+        report.oversized_block_count += oversized_block_count
+        report.compared_count += compared_count
+        for position_a, position_b, score in partition_pairs:
+            pairs[position_a, position_b] = score
+    return pairs
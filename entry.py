@@ -0,0 +1,89 @@
+#    Pyrectory (entry.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+from operator import attrgetter
+
+# Value of the favorite field of a favorite entry, in the directory file and in the entry list
+FAVORITE_MARK = "☆"
+
+# Attribute holding each field, in the order of the misc.SEARCH_BY_* constants and of the file columns
+FIELD_NAMES = ("name", "phone", "email", "favorite_mark")
+FIELD_GETTERS = tuple(attrgetter(field_name) for field_name in FIELD_NAMES)
+
+
+class Entry:
+    """
+    One entry of a directory.
+
+    The favorite field is kept as a bool rather than as the mark shown in the
+    entry list and written to the file. Entries can still be read like the rows
+    of the entry list, entry[misc.SEARCH_BY_NAME] or entry[:] giving the fields
+    as strings, but code walking many entries should use the attributes or
+    FIELD_GETTERS, which are much faster.
+    """
+
+    __slots__ = ("name", "phone", "email", "favorite")
+
+    def __init__(self, name:str, phone:str, email:str, favorite:bool=False):
+        self.name = name
+        self.phone = phone
+        self.email = email
+        self.favorite = favorite
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Args:
+            row (list): The fields of the entry as strings: name, phone, e-mail and favorite mark.
+
+        Returns:
+            Entry: The entry.
+        """
+        return cls(row[0], row[1], row[2], bool(row[3]))
+
+    @property
+    def favorite_mark(self)->str:
+        return FAVORITE_MARK if self.favorite else ""
+
+    def to_row(self)->list:
+        """
+        Returns:
+            list: The fields of the entry as strings, as stored in the entry list and in the file.
+        """
+        return [self.name, self.phone, self.email, self.favorite_mark]
+
+    def __getitem__(self, field):
+        if isinstance(field, slice):
+            return self.to_row()[field]
+        return FIELD_GETTERS[field](self)
+
+    def __iter__(self):
+        return iter(self.to_row())
+
+    def __len__(self)->int:
+        return len(FIELD_NAMES)
+
+    def __eq__(self, other)->bool:
+        if not isinstance(other, Entry):
+            return NotImplemented
+        return (self.name == other.name and self.phone == other.phone
+                and self.email == other.email and self.favorite == other.favorite)
+
+    def __repr__(self)->str:
+        return f"Entry({self.name!r}, {self.phone!r}, {self.email!r}, {self.favorite!r})"
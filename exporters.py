@@ -0,0 +1,237 @@
+#    Pyrectory (exporters.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import time
+from itertools import islice
+
+import csv_func
+from entry import FAVORITE_MARK
+
+# Text produced before it is encoded and written in one call, in characters
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+# Number of rows turned into text at a time by the CSV writer
+CSV_BATCH_ROW_COUNT = 1024
+
+# vCard lines longer than this are folded, in bytes (RFC 6350, section 3.2)
+VCARD_LINE_LENGTH = 75
+
+# Category given to favorite entries in vCards, which have no favorite property
+VCARD_FAVORITE_CATEGORY = "Favorites"
+
+
+def iter_csv(rows):
+    """
+    Yields:
+        str: The rows as a directory file, several rows at a time.
+    """
+    buffer = io.StringIO()
+    csv_writer = csv.writer(buffer, delimiter=';', dialect='excel', lineterminator='\n')
+    rows = iter(rows)
+    while True:
+        csv_writer.writerows(islice(rows, CSV_BATCH_ROW_COUNT))
+        text = buffer.getvalue()
+        if not text:
+            return
+        yield text
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def iter_jsonl(rows):
+    """
+    Yields:
+        str: One JSON object per row and per line, with name, phone, email and favorite (a boolean) keys.
+    """
+    for row in rows:
+        yield json.dumps({"name": row[0], "phone": row[1], "email": row[2], "favorite": row[3] == FAVORITE_MARK},
+                         ensure_ascii=False) + "\n"
+
+
+def escape_vcard_text(value:str)->str:
+    """
+    Returns:
+        str: The value with the characters that have a meaning in vCard property values escaped.
+    """
+    return value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def fold_vcard_line(line:str)->str:
+    """
+    Returns:
+        str: The line ended by CRLF, cut into lines of at most VCARD_LINE_LENGTH bytes continued by a space,
+             without splitting a character.
+    """
+    if len(line) * 4 <= VCARD_LINE_LENGTH or len(line.encode("utf-8")) <= VCARD_LINE_LENGTH:
+        return line + "\r\n"
+
+    parts = []
+    start = 0
+    size = 0
+    # The first line has the whole length, the others start with the continuation space
+    limit = VCARD_LINE_LENGTH
+    for position, character in enumerate(line):
+        character_size = len(character.encode("utf-8"))
+        if size + character_size > limit:
+            parts.append(line[start:position])
+            start = position
+            size = 0
+            limit = VCARD_LINE_LENGTH - 1
+        size += character_size
+    parts.append(line[start:])
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def iter_vcard(rows):
+    """
+    Yields:
+        str: One vCard 4.0 per row (RFC 6350), favorites being in the VCARD_FAVORITE_CATEGORY category.
+    """
+    for row in rows:
+        name, phone, email, favorite_mark = row[0], row[1], row[2], row[3]
+        lines = ["BEGIN:VCARD\r\nVERSION:4.0\r\n", fold_vcard_line("FN:" + escape_vcard_text(name))]
+        if phone:
+            lines.append(fold_vcard_line("TEL;VALUE=uri;TYPE=voice:tel:" + phone))
+        if email:
+            lines.append(fold_vcard_line("EMAIL:" + escape_vcard_text(email)))
+        if favorite_mark == FAVORITE_MARK:
+            lines.append(f"CATEGORIES:{VCARD_FAVORITE_CATEGORY}\r\n")
+        lines.append("END:VCARD\r\n")
+        yield "".join(lines)
+
+
+# Export format -> generator turning rows into text. Add an entry to support another format
+EXPORT_FORMATS = {
+    "csv": iter_csv,
+    "jsonl": iter_jsonl,
+    "vcard": iter_vcard,
+}
+
+# File extension -> export format, for get_export_format()
+FORMAT_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".vcf": "vcard", ".vcard": "vcard"}
+
+# Compression -> function opening a file for writing through it, given the path and the compression level,
+# csv_func.COMPRESSION_LEVEL if None. The names are the ones csv_func.get_compression() gives for file extensions
+COMPRESSIONS = {
+    "gzip": lambda filepath, level: gzip.open(filepath, "wb", compresslevel=csv_func.COMPRESSION_LEVEL if level is None else level),
+    "xz": lambda filepath, level: lzma.open(filepath, "wb", preset=csv_func.COMPRESSION_LEVEL if level is None else level),
+}
+
+
+def get_export_format(filepath:str):
+    """
+    Returns:
+        str: The export format given by the extension of the file, past any compression extension, None if unknown.
+    """
+    if csv_func.get_compression(filepath) is not None:
+        filepath = os.path.splitext(filepath)[0]
+    return FORMAT_EXTENSIONS.get(os.path.splitext(filepath)[1].lower())
+
+
+def write_chunks(chunks, output_file, chunk_size:int=EXPORT_CHUNK_SIZE)->int:
+    """
+    Write text to a binary file in large UTF-8 encoded writes, holding at most about chunk_size characters.
+
+    Args:
+        chunks (iterable): The text, in pieces of any size.
+        output_file (io.BufferedIOBase): The file to write to.
+        chunk_size (int): Characters gathered before each write.
+
+    Returns:
+        int: The number of bytes written, before any compression.
+    """
+    byte_count = 0
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= chunk_size:
+            data = "".join(pending).encode("utf-8")
+            output_file.write(data)
+            byte_count += len(data)
+            pending.clear()
+            pending_size = 0
+    if pending:
+        data = "".join(pending).encode("utf-8")
+        output_file.write(data)
+        byte_count += len(data)
+    return byte_count
+
+
+def export_rows(rows, filepath:str, export_format:str=None, compression:str=None, compression_level:int=None)->dict:
+    """
+    Write rows to a file in an export format, optionally compressed.
+
+    The rows are consumed one at a time and the text is written in chunks of
+    EXPORT_CHUNK_SIZE, so memory use does not depend on the number of rows when
+    they are read from a file as they are exported. The file is written under a
+    temporary name then renamed, so a failed export does not leave half a file.
+
+    Args:
+        rows (iterable): Rows of strings as in the directory file: name, phone, e-mail and favorite mark.
+        filepath (str): Path of the output file.
+        export_format (str, optional): One of EXPORT_FORMATS, given by the extension of the file if None.
+        compression (str, optional): One of COMPRESSIONS, given by the extension of the file if None.
+        compression_level (int, optional): Compression level, from 0 (fastest) to 9 (smallest).
+
+    Returns:
+        dict: Counts of the export: rows, bytes (before compression), written (bytes in the file) and seconds.
+
+    Raises:
+        ValueError: The export format or compression is unknown.
+    """
+    start_time = time.perf_counter()
+    export_format = export_format or get_export_format(filepath)
+    compression = compression or csv_func.get_compression(filepath)
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {compression!r}, expected one of {', '.join(COMPRESSIONS)}")
+
+    row_count = 0
+
+    def iter_counted_rows():
+        nonlocal row_count
+        for row in rows:
+            row_count += 1
+            yield row
+
+    temp_filepath = filepath + ".tmp"
+    try:
+        if compression is None:
+            output_file = open(temp_filepath, "wb")
+        else:
+            output_file = COMPRESSIONS[compression](temp_filepath, compression_level)
+        with output_file:
+            byte_count = write_chunks(EXPORT_FORMATS[export_format](iter_counted_rows()), output_file)
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_filepath)
+        except OSError:
+            pass
+        raise
+    return {"rows": row_count, "bytes": byte_count, "written": os.path.getsize(filepath),
+            "seconds": time.perf_counter() - start_time}
@@ -0,0 +1,174 @@
+#    Pyrectory (fuzzy_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import misc
+
+# Default maximum edit distance of a fuzzy name search
+FUZZY_MAX_DISTANCE = 2
+
+# Number of leading characters of each name the deletions are generated from
+PREFIX_LENGTH = 6
+
+
+def edit_distance(word_a:str, word_b:str, max_distance:int=None)->int:
+    """
+    Levenshtein distance between two words.
+
+    Args:
+        word_a (str): The first word.
+        word_b (str): The second word.
+        max_distance (int, optional): Stop early once the distance is known to be above this.
+
+    Returns:
+        int: The distance, or max_distance + 1 if it is above max_distance.
+    """
+    if len(word_a) < len(word_b):
+        word_a, word_b = word_b, word_a
+    if max_distance is not None and len(word_a) - len(word_b) > max_distance:
+        return max_distance + 1
+
+    previous_row = list(range(len(word_b) + 1))
+    for i, character_a in enumerate(word_a, 1):
+        current_row = [i]
+        for j, character_b in enumerate(word_b, 1):
+            current_row.append(min(previous_row[j] + 1,
+                                   current_row[j - 1] + 1,
+                                   previous_row[j - 1] + (character_a != character_b)))
+        if max_distance is not None and min(current_row) > max_distance:
+            return max_distance + 1
+        previous_row = current_row
+    return previous_row[-1]
+
+
+def get_deletions(word:str, max_deletions:int)->set:
+    """
+    Returns:
+        set: Every string obtained by deleting up to max_deletions characters from the word, the word included.
+    """
+    deletions = {word}
+    last_deletions = {word}
+    for _ in range(max_deletions):
+        last_deletions = {variant[:i] + variant[i + 1:] for variant in last_deletions for i in range(len(variant))}
+        deletions |= last_deletions
+    return deletions
+
+
+class FuzzyNameIndex:
+    """
+    Symmetric-delete index over the names of the entries, finding the names within a
+    given edit distance of a query without comparing it to every name.
+
+    Names are compared case-insensitively. Each name is stored under every deletion of
+    up to max_distance characters from its first PREFIX_LENGTH characters. Two names within
+    max_distance edits share such a deletion of a prefix, so a query only verifies the names
+    found under the deletions of its own prefixes. Register it with a StoreIndex to keep it in sync.
+    """
+
+    def __init__(self, max_distance:int=FUZZY_MAX_DISTANCE, store_index=None):
+        """
+        Args:
+            max_distance (int): The largest edit distance searches can use.
+            store_index (store_index.StoreIndex, optional): The store index this index is registered with, used to
+                                                            order matches as close in entry list order, row id order without it.
+        """
+        self.max_distance = max_distance
+        self.store_index = store_index
+        self._row_ids = {}    # Name -> set of row ids
+        self._deletions = {}  # Deletion of a name prefix -> set of names
+
+    def add(self, row_id:int, row:list)->None:
+        name = row.name.casefold()
+        row_ids = self._row_ids.get(name)
+        if row_ids is not None:
+            row_ids.add(row_id)
+            return
+
+        self._row_ids[name] = {row_id}
+        for deletion in get_deletions(name[:PREFIX_LENGTH], self.max_distance):
+            names = self._deletions.get(deletion)
+            if names is None:
+                self._deletions[deletion] = {name}
+            else:
+                names.add(name)
+
+    def remove(self, row_id:int, row:list)->None:
+        name = row.name.casefold()
+        row_ids = self._row_ids[name]
+        row_ids.discard(row_id)
+        if row_ids:
+            return
+
+        del self._row_ids[name]
+        for deletion in get_deletions(name[:PREFIX_LENGTH], self.max_distance):
+            names = self._deletions[deletion]
+            names.discard(name)
+            if not names:
+                del self._deletions[deletion]
+
+    def search(self, name:str, max_distance:int=FUZZY_MAX_DISTANCE)->list:
+        """
+        Find the entries whose name is within max_distance edits of the given name.
+
+        Args:
+            name (str): The name to search for.
+            max_distance (int): The maximum edit distance, up to the one given to the index.
+
+        Returns:
+            list: (distance, row_id) pairs, closest first, then in entry list order.
+        """
+        if max_distance > self.max_distance:
+            raise ValueError(f"Maximum edit distance {max_distance} above the one of the index ({self.max_distance})")
+
+        # An indexed prefix is matched by a prefix of the query at most max_distance characters
+        # longer or shorter, or by the whole query when the indexed name is shorter than PREFIX_LENGTH
+        name = name.casefold()
+        prefix_lengths = {min(length, len(name)) for length in
+                          range(max(PREFIX_LENGTH - max_distance, 0), PREFIX_LENGTH + max_distance + 1)}
+        prefix_lengths.add(len(name))
+
+        deletions = set()
+        for length in prefix_lengths:
+            deletions |= get_deletions(name[:length], max_distance)
+        candidates = set()
+        for deletion in deletions:
+            candidates |= self._deletions.get(deletion, set())
+
+        matches = []
+        for candidate in candidates:
+            distance = edit_distance(name, candidate, max_distance)
+            if distance <= max_distance:
+                matches.extend((distance, row_id) for row_id in self._row_ids[candidate])
+        if self.store_index is None:
+            matches.sort()
+        else:
+            position = self.store_index.position
+            matches.sort(key=lambda match: (match[0], position(match[1])))
+        return matches
+
+    def check_consistency(self, rows:list)->list:
+        """
+        Args:
+            rows (list): Every row of the entry list.
+
+        Returns:
+            list: A description of every mismatch found, empty if the index is consistent.
+        """
+        expected_names = {row.name.casefold() for row in rows}
+        if expected_names != self._row_ids.keys():
+            return [f"Fuzzy name index mismatch: {len(expected_names ^ self._row_ids.keys())} names differ"]
+        return []
@@ -0,0 +1,249 @@
+#    Pyrectory (instrumentation.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from gi.repository import GLib
+
+# Environment variable enabling the instrumentation, set to the path the reports are written to, without extension
+PROFILE_ENVIRONMENT_VARIABLE = "PYRECTORY_PROFILE"
+
+# Number of handler calls kept for the Chrome trace, the oldest are dropped first
+TRACE_EVENT_COUNT = 100_000
+
+# Interval of the main loop heartbeat, and time without one after which the main loop is stalled, in seconds
+HEARTBEAT_INTERVAL = 0.02
+STALL_THRESHOLD = 0.2
+
+# Number of stack samples kept, the oldest are dropped first
+STACK_SAMPLE_COUNT = 1000
+
+
+def get_bucket(duration_ns:int)->int:
+    """
+    Returns:
+        int: The histogram bucket of a duration: bucket n holds durations from 2^(n-1) to 2^n - 1 microseconds.
+    """
+    return (duration_ns // 1000).bit_length()
+
+
+class HandlerStats:
+    """
+    Latency of the calls to one handler: count, total, maximum and a histogram of
+    power of two buckets in microseconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = {}  # Bucket -> number of calls
+
+    def add(self, duration_ns:int)->None:
+        self.count += 1
+        self.total_ns += duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+        bucket = get_bucket(duration_ns)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def get_percentile(self, fraction:float)->float:
+        """
+        Returns:
+            float: Upper bound of the bucket holding the given fraction of the calls, in milliseconds.
+        """
+        wanted_count = fraction * self.count
+        seen_count = 0
+        for bucket in sorted(self.buckets):
+            seen_count += self.buckets[bucket]
+            if seen_count >= wanted_count:
+                return min(2 ** bucket / 1000, self.max_ns / 1e6)
+        return self.max_ns / 1e6
+
+    def to_dict(self)->dict:
+        return {
+            "count": self.count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_ms": self.total_ns / 1e6 / max(self.count, 1),
+            "max_ms": self.max_ns / 1e6,
+            "p50_ms": self.get_percentile(0.5),
+            "p90_ms": self.get_percentile(0.9),
+            "p99_ms": self.get_percentile(0.99),
+            # Upper bound of each bucket in microseconds -> number of calls
+            "histogram_us": {str(2 ** bucket): count for bucket, count in sorted(self.buckets.items())},
+        }
+
+
+class Instrumentation:
+    """
+    Opt-in latency measures of the user interface.
+
+    wrap_handlers() times every call to the signal handlers given to the UI factory.
+    A watchdog thread watches a heartbeat the main loop sends every HEARTBEAT_INTERVAL:
+    when none came for STALL_THRESHOLD, the main loop is stalled, and the stack of the
+    main thread is sampled every STALL_THRESHOLD until it beats again, which shows what
+    blocks it, handler or not (loading, searching, parsing the Glade file...).
+
+    The measures are written as a JSON report, and as a Chrome trace file (chrome://tracing
+    or Perfetto) showing handler calls and stalls on a timeline.
+    """
+
+    def __init__(self):
+        self.handler_stats = {}  # Handler name -> HandlerStats
+        self.trace_events = deque(maxlen=TRACE_EVENT_COUNT)  # (name, start_ns, duration_ns)
+        self.stalls = []         # [start_ns, duration_ns, number of stack samples], the last one may be running
+        self.stack_samples = deque(maxlen=STACK_SAMPLE_COUNT)  # (time_ns, stall number, stack lines)
+        self._start_ns = time.perf_counter_ns()
+        self._main_thread_id = threading.main_thread().ident
+        self._last_beat_ns = self._start_ns
+        self._heartbeat_id = None
+        self._watchdog = None
+        self._stop_event = threading.Event()
+
+    def wrap_handlers(self, handlers:dict)->dict:
+        """
+        Args:
+            handlers (dict): Signal name -> handler.
+
+        Returns:
+            dict: The same handlers, each timed on every call.
+        """
+        return {name: self._wrap(name, handler) for name, handler in handlers.items()}
+
+    def start(self)->None:
+        """
+        Start the main loop heartbeat and the watchdog thread.
+        """
+        self._last_beat_ns = time.perf_counter_ns()
+        self._heartbeat_id = GLib.timeout_add(int(HEARTBEAT_INTERVAL * 1000), self._beat)
+        self._watchdog = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self)->None:
+        if self._heartbeat_id is not None:
+            GLib.source_remove(self._heartbeat_id)
+            self._heartbeat_id = None
+        self._stop_event.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def to_dict(self)->dict:
+        """
+        Returns:
+            dict: The report: per handler latency, stalls with their stack samples.
+        """
+        return {
+            "handlers": {name: stats.to_dict() for name, stats in
+                         sorted(self.handler_stats.items(), key=lambda item: item[1].total_ns, reverse=True)},
+            "stalls": [{"start_ms": (start_ns - self._start_ns) / 1e6, "duration_ms": duration_ns / 1e6,
+                        "stacks": [stack for time_ns, stall_number, stack in self.stack_samples if stall_number == number]}
+                       for number, (start_ns, duration_ns, sample_count) in enumerate(self.stalls)],
+        }
+
+    def write_json(self, filepath:str)->None:
+        with open(filepath, "w", encoding="utf-8") as report_file:
+            json.dump(self.to_dict(), report_file, indent=2)
+
+    def write_chrome_trace(self, filepath:str)->None:
+        """
+        Write the handler calls and stalls in the Chrome trace event format.
+        """
+        pid = os.getpid()
+        events = [{"name": name, "cat": "handler", "ph": "X", "pid": pid, "tid": 1,
+                   "ts": (start_ns - self._start_ns) / 1000, "dur": duration_ns / 1000}
+                  for name, start_ns, duration_ns in self.trace_events]
+        for number, (start_ns, duration_ns, sample_count) in enumerate(self.stalls):
+            events.append({"name": "main loop stall", "cat": "stall", "ph": "X", "pid": pid, "tid": 2,
+                           "ts": (start_ns - self._start_ns) / 1000, "dur": duration_ns / 1000})
+        for time_ns, stall_number, stack in self.stack_samples:
+            events.append({"name": stack[-1] if stack else "?", "cat": "stack", "ph": "i", "s": "t", "pid": pid, "tid": 2,
+                           "ts": (time_ns - self._start_ns) / 1000, "args": {"stack": stack}})
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": 1, "args": {"name": "handlers"}})
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": 2, "args": {"name": "main loop stalls"}})
+        with open(filepath, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+    def _wrap(self, name:str, handler):
+        stats = self.handler_stats.setdefault(name, HandlerStats())
+        trace_events = self.trace_events
+
+        def timed_handler(*args):
+            start_ns = time.perf_counter_ns()
+            try:
+                return handler(*args)
+            finally:
+                duration_ns = time.perf_counter_ns() - start_ns
+                stats.add(duration_ns)
+                trace_events.append((name, start_ns, duration_ns))
+        return timed_handler
+
+    def _beat(self)->bool:
+        self._last_beat_ns = time.perf_counter_ns()
+        return True
+
+    def _watch(self)->None:
+        threshold_ns = int(STALL_THRESHOLD * 1e9)
+        stall = None
+        while not self._stop_event.wait(HEARTBEAT_INTERVAL):
+            now_ns = time.perf_counter_ns()
+            last_beat_ns = self._last_beat_ns
+            if now_ns - last_beat_ns < threshold_ns:
+                stall = None
+                continue
+
+            if stall is None or stall[0] != last_beat_ns:
+                # The stall started at the last beat
+                stall = [last_beat_ns, 0, 0]
+                self.stalls.append(stall)
+            stall[1] = now_ns - last_beat_ns
+            if stall[1] >= threshold_ns * (stall[2] + 1):
+                frame = sys._current_frames().get(self._main_thread_id)
+                if frame is not None:
+                    stack = [line.rstrip() for line in traceback.format_stack(frame)]
+                    self.stack_samples.append((now_ns, len(self.stalls) - 1, stack))
+                    stall[2] += 1
+
+
+def start_from_environment(handlers:dict):
+    """
+    Instrument the handlers if PROFILE_ENVIRONMENT_VARIABLE is set.
+
+    Returns:
+        tuple: (handlers, instrumentation), the handlers unchanged and None if it is not set.
+    """
+    if not os.environ.get(PROFILE_ENVIRONMENT_VARIABLE):
+        return handlers, None
+    instrumentation = Instrumentation()
+    return instrumentation.wrap_handlers(handlers), instrumentation
+
+
+def write_reports(instrumentation:Instrumentation)->None:
+    """
+    Stop the instrumentation and write its reports to the path given in PROFILE_ENVIRONMENT_VARIABLE,
+    as a .json report and a .trace.json Chrome trace.
+    """
+    instrumentation.stop()
+    report_filepath = os.environ[PROFILE_ENVIRONMENT_VARIABLE]
+    instrumentation.write_json(report_filepath + ".json")
+    instrumentation.write_chrome_trace(report_filepath + ".trace.json")
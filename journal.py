@@ -0,0 +1,232 @@
+#    Pyrectory (journal.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import csv
+import os
+import threading
+
+import csv_func
+import snapshot
+
+# Sidecar files, next to the directory file
+JOURNAL_EXTENSION = ".journal"
+COMPACTING_JOURNAL_EXTENSION = ".journal.old"
+
+# Journal size above which it is merged back into the directory file, in bytes
+COMPACTION_THRESHOLD = 1024 * 1024
+
+# Record types, the first field of each journal record
+RECORD_ADD = "A"     # A;name;phone;email;favorite
+RECORD_EDIT = "E"    # E;original_name;name;phone;email;favorite
+RECORD_REMOVE = "R"  # R;name
+
+
+def add_record(entry:list)->list:
+    return [RECORD_ADD, *entry]
+
+
+def edit_record(original_name:str, entry:list)->list:
+    return [RECORD_EDIT, original_name, *entry]
+
+
+def remove_record(name:str)->list:
+    return [RECORD_REMOVE, name]
+
+
+class Journal:
+    """
+    Append-only log of the changes made to a directory file since it was last written whole.
+
+    Each record sets or deletes one entry by name, and names are unique, so replaying
+    the log over the directory file gives the same entries whether or not some of the
+    records were already merged into it. This is what makes an interrupted compaction safe:
+    the journal being merged is renamed to a .journal.old file first, new changes go to a
+    fresh journal, and the old one is only deleted once the directory file has been replaced.
+    """
+
+    def __init__(self, filepath:str, with_row_index:bool=None):
+        """
+        Args:
+            filepath (str): Path of the directory file the journal belongs to.
+            with_row_index (bool, optional): Write the row index file of the directory file when compacting,
+                                             csv_func.WRITE_ROW_INDEX if None.
+        """
+        self.filepath = filepath
+        self.with_row_index = with_row_index
+        self.journal_filepath = filepath + JOURNAL_EXTENSION
+        self.compacting_journal_filepath = filepath + COMPACTING_JOURNAL_EXTENSION
+        self._lock = threading.Lock()
+        self._compaction_thread = None
+
+    def append(self, records:list)->None:
+        """
+        Append records to the journal and flush them to disk.
+
+        Args:
+            records (list): Records built with add_record(), edit_record() and remove_record().
+        """
+        if not records:
+            return
+        with self._lock:
+            with open(self.journal_filepath, 'a', encoding="utf-8") as journal_file:
+                csv_writer = csv.writer(journal_file, delimiter=';', dialect='excel', lineterminator='\n')
+                csv_writer.writerows(records)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+    def size(self)->int:
+        """
+        Returns:
+            int: Size of the journal, in bytes.
+        """
+        try:
+            return os.path.getsize(self.journal_filepath)
+        except FileNotFoundError:
+            return 0
+
+    def needs_compaction(self)->bool:
+        return self.size() >= COMPACTION_THRESHOLD and not self.is_compacting()
+
+    def is_compacting(self)->bool:
+        return self._compaction_thread is not None and self._compaction_thread.is_alive()
+
+    def discard(self)->None:
+        """
+        Delete the journal files, once the directory file has been written whole.
+        """
+        with self._lock:
+            for journal_filepath in (self.compacting_journal_filepath, self.journal_filepath):
+                try:
+                    os.remove(journal_filepath)
+                except FileNotFoundError:
+                    pass
+
+    def replay(self, rows):
+        """
+        Apply the journal to the rows of the directory file.
+
+        Entries keep their place in the file, even when renamed. Added entries come last.
+
+        Args:
+            rows (iterable): (line_number, row, bytes_read) tuples, as yielded by csv_func.iter_content_csv().
+
+        Yields:
+            tuple: (line_number, row, bytes_read) for each entry after replay.
+        """
+        final_rows = {}  # Name -> last content written, or None if deleted
+        renamed_to = {}  # Original name -> name given by an edit
+        for record in self._read_records():
+            if record[0] == RECORD_ADD and len(record) == 1 + csv_func.ENTRY_FIELD_COUNT:
+                final_rows[record[1]] = record[1:]
+            elif record[0] == RECORD_EDIT and len(record) == 2 + csv_func.ENTRY_FIELD_COUNT:
+                original_name, entry = record[1], record[2:]
+                if original_name != entry[0]:
+                    final_rows[original_name] = None
+                    renamed_to[original_name] = entry[0]
+                final_rows[entry[0]] = entry
+            elif record[0] == RECORD_REMOVE and len(record) == 2:
+                final_rows[record[1]] = None
+
+        emitted_names = set()
+        line_number = bytes_read = 0
+        for line_number, row, bytes_read in rows:
+            name = row[0] if row else None
+            if name not in final_rows:
+                yield line_number, row, bytes_read
+                continue
+
+            # Follow renames so an edited entry stays where the original was
+            seen_names = {name}
+            while final_rows.get(name) is None and name in renamed_to and renamed_to[name] not in seen_names:
+                name = renamed_to[name]
+                seen_names.add(name)
+
+            entry = final_rows.get(name)
+            if entry is not None and name not in emitted_names:
+                emitted_names.add(name)
+                yield line_number, entry, bytes_read
+
+        for name, entry in final_rows.items():
+            if entry is not None and name not in emitted_names:
+                yield line_number, entry, bytes_read
+
+    def compact(self, rows:list)->None:
+        """
+        Write the given rows as the new directory file and drop the journal records they include.
+
+        Args:
+            rows (list): Every entry of the directory, as Entry records or lists of strings, including every journaled change.
+        """
+        self._rotate()
+        self._write_directory(rows)
+
+    def compact_in_background(self, rows:list, on_done)->None:
+        """
+        Like compact(), but the directory file is written on a worker thread.
+        Records appended once this returns are kept for the next compaction.
+
+        Args:
+            rows (list): Every entry of the directory, including every journaled change. Must not be modified afterwards.
+            on_done (callable): Called from the worker thread with None, or the exception raised.
+        """
+        self._rotate()
+
+        def compact_worker():
+            try:
+                self._write_directory(rows)
+            except OSError as error:
+                on_done(error)
+            else:
+                on_done(None)
+
+        self._compaction_thread = threading.Thread(target=compact_worker, name="journal-compaction", daemon=True)
+        self._compaction_thread.start()
+
+    def _rotate(self)->None:
+        # New records go to a fresh journal from now on
+        with self._lock:
+            if not os.path.exists(self.journal_filepath):
+                return
+            if os.path.exists(self.compacting_journal_filepath):
+                # Left over from an interrupted compaction, keep both in order
+                with open(self.compacting_journal_filepath, 'a', encoding="utf-8") as compacting_file, \
+                     open(self.journal_filepath, 'rt', encoding="utf-8") as journal_file:
+                    compacting_file.write(journal_file.read())
+                os.remove(self.journal_filepath)
+            else:
+                os.replace(self.journal_filepath, self.compacting_journal_filepath)
+
+    def _write_directory(self, rows:list)->None:
+        csv_func.replace_content_csv(self.filepath, rows, with_row_index=self.with_row_index)
+        snapshot.update_snapshot(self.filepath, rows)
+
+        # The records are now part of the directory file
+        with self._lock:
+            try:
+                os.remove(self.compacting_journal_filepath)
+            except FileNotFoundError:
+                pass
+
+    def _read_records(self):
+        for journal_filepath in (self.compacting_journal_filepath, self.journal_filepath):
+            try:
+                journal_file = open(journal_filepath, 'rt', encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            with journal_file:
+                yield from csv.reader(journal_file, delimiter=';', dialect='excel', lineterminator='\n')
@@ -0,0 +1,101 @@
+#    Pyrectory (lazy_model.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+from gi.repository import GObject, Gtk
+
+from csv_func import ENTRY_FIELD_COUNT
+
+
+class LazyEntryModel(GObject.Object, Gtk.TreeModel):
+    """
+    Read-only list model over a paged store, with the same columns as the entry list.
+
+    The row count is known up front, rows are only read from the store when the tree
+    view asks for a cell, so only the rows on screen and the pages cached by the store
+    are in memory. Rows not shaped like entries are shown cut or padded to the entry fields.
+
+    Tree iters hold the row number plus one, a null user data pointer reading back as None.
+    """
+
+    def __init__(self, store):
+        """
+        Args:
+            store (paged_csv.PagedCsvFile): The store the rows are read from, with __len__() and get_row().
+        """
+        super().__init__()
+        self.store = store
+        self._stamp = id(self) & 0x7FFFFFFF
+
+    def do_get_flags(self):
+        return Gtk.TreeModelFlags.LIST_ONLY | Gtk.TreeModelFlags.ITERS_PERSIST
+
+    def do_get_n_columns(self)->int:
+        return ENTRY_FIELD_COUNT
+
+    def do_get_column_type(self, column:int):
+        return str
+
+    def do_get_iter(self, path):
+        indices = path.get_indices()
+        if len(indices) != 1 or not 0 <= indices[0] < len(self.store):
+            return False, None
+        return True, self._make_iter(indices[0])
+
+    def do_get_path(self, treeiter):
+        return Gtk.TreePath.new_from_indices([treeiter.user_data - 1])
+
+    def do_get_value(self, treeiter, column:int)->str:
+        row = self.store.get_row(treeiter.user_data - 1)
+        return row[column] if column < len(row) else ""
+
+    def do_iter_next(self, treeiter)->bool:
+        if treeiter.user_data >= len(self.store):
+            return False
+        treeiter.user_data += 1
+        return True
+
+    def do_iter_previous(self, treeiter)->bool:
+        if treeiter.user_data == 1:
+            return False
+        treeiter.user_data -= 1
+        return True
+
+    def do_iter_children(self, parent):
+        if parent is None and len(self.store):
+            return True, self._make_iter(0)
+        return False, None
+
+    def do_iter_has_child(self, treeiter)->bool:
+        return False
+
+    def do_iter_n_children(self, treeiter)->int:
+        return len(self.store) if treeiter is None else 0
+
+    def do_iter_nth_child(self, parent, n:int):
+        if parent is None and 0 <= n < len(self.store):
+            return True, self._make_iter(n)
+        return False, None
+
+    def do_iter_parent(self, child):
+        return False, None
+
+    def _make_iter(self, row_number:int)->Gtk.TreeIter:
+        treeiter = Gtk.TreeIter()
+        treeiter.stamp = self._stamp
+        treeiter.user_data = row_number + 1
+        return treeiter
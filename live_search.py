@@ -0,0 +1,138 @@
+#    Pyrectory (live_search.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import time
+from itertools import islice
+
+from gi.repository import GLib
+
+import misc
+
+# Time to wait after a keystroke before searching, in milliseconds
+DEBOUNCE_DELAY = 30
+
+# Maximum time spent checking rows before giving the main loop back, in seconds
+SEARCH_TIME_SLICE = 0.01
+
+# Number of rows checked between two checks of the time slice
+SEARCH_BATCH_SIZE = 1024
+
+
+class LiveSearch:
+    """
+    Search as the user types, without blocking the main loop.
+
+    Queries are debounced, then run in time-sliced steps from GLib idle callbacks.
+    A new query cancels the one in flight. When a query contains the previous one
+    (usually one more character typed), only the previous results are checked again.
+
+    Register it with the StoreIndex so any change to the entries drops the previous
+    results instead of narrowing stale ones.
+    """
+
+    def __init__(self, search_index, on_results):
+        """
+        Args:
+            search_index (search_index.SearchIndex): The search index kept in sync with the entry list.
+            on_results (callable): Called with the row ids of the matching entries, in entry list order.
+        """
+        self.search_index = search_index
+        self.on_results = on_results
+
+        self._timeout_id = None
+        self._idle_id = None
+        self._query = None
+        self._candidates = None
+        self._matches = []
+        self._last_query = None    # (search_criteria, search_by) of the last completed query
+        self._last_results = None  # Row ids it found
+        self._generation = 0       # Incremented on every change to the entries
+        self._query_generation = 0
+
+    def request(self, search_criteria:str, search_by:int)->None:
+        """
+        Schedule a query, replacing any pending or running one.
+
+        Args:
+            search_criteria (str): The criteria to search for.
+            search_by (int): The field to search by, one of the misc.SEARCH_BY_* constants.
+        """
+        self.cancel()
+        self._timeout_id = GLib.timeout_add(DEBOUNCE_DELAY, self._start, search_criteria, search_by)
+
+    def cancel(self)->None:
+        """
+        Drop the pending or running query, if any.
+        """
+        if self._timeout_id is not None:
+            GLib.source_remove(self._timeout_id)
+            self._timeout_id = None
+        if self._idle_id is not None:
+            GLib.source_remove(self._idle_id)
+            self._idle_id = None
+
+    def add(self, row_id:int, row:list)->None:
+        self._generation += 1
+        self._last_query = self._last_results = None
+
+    def remove(self, row_id:int, row:list)->None:
+        self._generation += 1
+        self._last_query = self._last_results = None
+
+    def check_consistency(self, rows:list)->list:
+        return []
+
+    def _start(self, search_criteria:str, search_by:int)->bool:
+        self._timeout_id = None
+        self._query = (search_criteria, search_by)
+        self._query_generation = self._generation
+        self._matches = []
+
+        if self._can_narrow(search_criteria, search_by):
+            candidates = self._last_results
+        else:
+            candidates = self.search_index.get_candidates(search_criteria, search_by)
+        self._candidates = iter(candidates)
+
+        self._idle_id = GLib.idle_add(self._search_step)
+        return False
+
+    def _can_narrow(self, search_criteria:str, search_by:int)->bool:
+        if self._last_query is None or search_by == misc.SEARCH_BY_FAVORITE:
+            return False
+        last_search_criteria, last_search_by = self._last_query
+        return search_by == last_search_by and last_search_criteria in search_criteria
+
+    def _search_step(self)->bool:
+        search_criteria, search_by = self._query
+        is_match = self.search_index.is_match
+        deadline = time.perf_counter() + SEARCH_TIME_SLICE
+        while time.perf_counter() < deadline:
+            batch = list(islice(self._candidates, SEARCH_BATCH_SIZE))
+            self._matches.extend(row_id for row_id in batch if is_match(row_id, search_criteria, search_by))
+
+            # Every candidate has been checked
+            if len(batch) < SEARCH_BATCH_SIZE:
+                self._idle_id = None
+                self._matches = self.search_index.store_index.sort_row_ids(self._matches)
+                if self._query_generation == self._generation:
+                    # The entries did not change while searching, the results can be narrowed next time
+                    self._last_query, self._last_results = self._query, self._matches
+                self.on_results(self._matches)
+                return False
+        return True
@@ -19,11 +19,31 @@
 
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
+from gi.repository import Gtk, GLib
+import multiprocessing
 import os
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left
+from concurrent.futures.process import BrokenProcessPool
 
+from background_save import BackgroundSaver
 import csv_func
+import duplicate_finder
+import instrumentation
+import journal
 import misc
+import snapshot
+from directory import Directory
+from directory_loader import DirectoryLoader
+from entry import Entry, FAVORITE_MARK
+from lazy_model import LazyEntryModel
+from live_search import LiveSearch
+from paged_csv import PagedCsvFile
+from query_planner import Criterion, MATCH_ALL, MATCH_ANY
+from sqlite_directory import SqliteDirectory, is_sqlite_filepath
+from ui_factory import UiFactory
 
 # Allows for the program to be ran from any working directory
 APP_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
@@ -32,6 +52,27 @@ GLADE_FILENAME = "ui.glade"
 GLADE_FILEPATH = os.path.join(APP_DIRECTORY, GLADE_DIRECTORY, GLADE_FILENAME)
 directory_filepath = ""
 
+# Number of invalid line numbers listed after loading a file
+INVALID_LINES_SHOWN = 10
+
+# Save changes to a journal next to the directory file instead of rewriting it whole
+USE_JOURNAL = True
+
+# CSV directory files at least this large are shown page by page as the tree view scrolls, as soon as
+# their row index is read (or built, on a worker thread), while they are loaded whole in the background.
+# They can be changed and searched once loaded. The pages only make the file readable early: the load
+# still fills the entry list and the search indexes, so memory ends up as with any other file.
+# Compressed files are always loaded with a progress window, their rows cannot be reached
+# without decompressing the ones before
+LAZY_OPEN_MIN_SIZE = 64 * 1024 * 1024
+
+# Write the row index file next to the CSV directory files saved whole, so large ones open page by page
+# without being scanned first
+WRITE_ROW_INDEX = True
+
+# Width given to the columns sized by their content when the tree view switches to fixed row heights
+LAZY_COLUMN_MIN_WIDTH = 120
+
 # Constants for the help window message
 NEW_BUTTON_HELP_EXPLANATION = "Create a new entry directory (CSV file)"
 OPEN_BUTTON_HELP_EXPLANATION = "Open an existing entry directory (CSV file)"
@@ -40,6 +81,7 @@ ADD_BUTTON_HELP_EXPLANATION = "Add a new entry to the directory"
 REMOVE_BUTTON_HELP_EXPLANATION = "Remove an entry from the directory"
 EDIT_BUTTON_HELP_EXPLANATION = "Edit an entry in the directory"
 SEARCH_BUTTON_HELP_EXPLANATION = "Search for an entry in the directory"
+DUPLICATES_BUTTON_HELP_EXPLANATION = "Find entries that are likely the same contact, and merge them"
 HELP_BUTTON_HELP_EXPLANATION = "Show this help window"
 ABOUT_BUTTON_HELP_EXPLANATION = "Show information about the program"
 
@@ -48,7 +90,55 @@ is_file_open = False
 is_unsaved = False
 is_search_result = False
 
-search_results = Gtk.ListStore(str, str, str, str)
+# Number of changes made to the entries so far. A save runs in the background from a snapshot,
+# it only clears is_unsaved if no change was made after the snapshot was taken
+change_generation = 0
+
+# Journal of the open directory file and the changes made since the last save
+directory_journal = None
+pending_journal_records = []
+
+# Entries of the open directory file with their indexes, shown through the entry list
+directory = Directory()
+
+# Database of the open directory when it is stored in SQLite, changes are written to it as they are made,
+# and the database id of each row of the entry list, in entry list order
+directory_database = None
+database_entry_ids = array('q')
+
+# Pages of the open directory file shown while it is loaded in the background, see LAZY_OPEN_MIN_SIZE
+directory_pages = None
+
+# Whether the open directory file is being loaded in the background, read-only until it is
+is_loading_in_background = False
+
+# Load of a directory file in progress, if any
+directory_loader = None
+
+# File filters of the file chooser windows: name, patterns
+FILE_FILTERS = (
+    ("Directories", ("*.csv", "*.csv.gz", "*.csv.xz", "*.sqlite", "*.sqlite3", "*.db")),
+    ("CSV directories", ("*.csv", "*.csv.gz", "*.csv.xz")),
+    ("SQLite directories", ("*.sqlite", "*.sqlite3", "*.db")),
+)
+
+# Writes of the save button, run on a worker thread
+background_saver = BackgroundSaver()
+
+# Row ids of the entries shown as search results, see store_index.StoreIndex.make_bitmap()
+search_match_bitmap = bytearray()
+
+# Row id -> place in the search results, when they are ranked (fuzzy name search)
+search_ranks = None
+
+# (column, is_descending) the entry list is sorted by, one of the misc.SEARCH_BY_* constants, None if it is not sorted
+entry_sort = None
+
+# Number of duplicate searches started, only the results of the last one are shown
+duplicate_search_generation = 0
+
+# Row id column of the duplicates window, -1 on the cluster rows
+DUPLICATE_ROW_ID_COLUMN = 5
 
 def summon_message_win(**kwargs):
     """
@@ -61,14 +151,8 @@ def summon_message_win(**kwargs):
             - set_transient_for (Gtk.Window, optional): Only optional for main window, to fix window not appearing on the front.
     """
     
-    # Create a builder and load the Glade file.
-    builder = Gtk.Builder()
-    builder.add_from_file(GLADE_FILEPATH)
-
-    # Connect the signals
-    builder.connect_signals(handlers)
-
-    # Get the message window object from the builder.
+    # Get the message window object, built once and reused.
+    builder = ui.get_builder("message_win")
     message_win = builder.get_object("message_win")
 
     # Set the transient window if provided.
@@ -86,6 +170,180 @@ def summon_message_win(**kwargs):
     message_win.present()
 
 
+def add_file_filters(filechooser_win):
+    """
+    Add the directory file filters to a file chooser window, once.
+
+    Parameters:
+        filechooser_win (Gtk.FileChooserDialog): The file chooser window.
+
+    Returns:
+        None
+    """
+    if filechooser_win.list_filters():
+        return
+    for filter_name, patterns in FILE_FILTERS:
+        file_filter = Gtk.FileFilter()
+        file_filter.set_name(filter_name)
+        for pattern in patterns:
+            file_filter.add_pattern(pattern)
+        filechooser_win.add_filter(file_filter)
+
+
+def close_directory_database():
+    """
+    Close the SQLite database of the open directory, if there is one.
+
+    Returns:
+        None
+    """
+    global directory_database
+    if directory_database is not None:
+        directory_database.close()
+        directory_database = None
+    database_entry_ids[:] = array('q')
+
+
+def mark_unsaved():
+    """
+    Record a change to the entries, not saved yet.
+
+    Returns:
+        None
+    """
+    global is_unsaved, change_generation
+    is_unsaved = True
+    change_generation += 1
+
+
+def is_directory_read_only():
+    """
+    Check if the open directory is still being loaded in the background, telling the user so if it is.
+
+    Returns:
+        bool: True if the directory cannot be changed or searched yet.
+    """
+    if not is_loading_in_background:
+        return False
+    summon_message_win(title="Error", message="This directory is still being loaded, it can be changed and searched once it is.",
+                       set_transient_for=main_win)
+    return True
+
+
+def open_directory_pages(filepath):
+    """
+    Load a directory file into the entry list in the background, showing it meanwhile read page by page
+    as the tree view scrolls. The row index the pages need is read, or built from the whole file, on a worker
+    thread, the tree view stays empty until it is ready. The entry list replaces the pages once it is loaded,
+    holding every row like any other load: the pages make the file readable early, they do not save memory.
+
+    Parameters:
+        filepath (str): Path of the directory file.
+
+    Returns:
+        None
+    """
+    global directory_filepath, is_file_open, is_search_result, directory_journal, directory_loader, is_loading_in_background
+    entry_list.clear()
+    pending_journal_records.clear()
+    is_search_result = False
+    search_match_bitmap.clear()
+
+    # The entry list is not shown while it fills up, the tree view would follow every row added
+    entry_treeview.set_model(None)
+
+    directory_filepath = filepath
+    directory_journal = None
+    is_file_open = True
+    is_loading_in_background = True
+    main_win.set_title(f"Pyrectory - {directory_filepath} (read-only, loading)")
+
+    # No progress window, the title shows the progress
+    directory_loader = DirectoryLoader(filepath, entry_list, None, on_directory_pages_load_progress, on_directory_load_finished,
+                                       journal.Journal(filepath, WRITE_ROW_INDEX))
+    directory_loader.start()
+    threading.Thread(target=open_directory_pages_job, args=(directory_loader,), name="directory-pages", daemon=True).start()
+
+
+def open_directory_pages_job(loader):
+    """
+    Open the pages of a directory file being loaded in the background on a worker thread,
+    then show them from the main loop.
+
+    Parameters:
+        loader (DirectoryLoader): The load the pages are shown for.
+
+    Returns:
+        None
+    """
+    try:
+        pages = PagedCsvFile(loader.filepath)
+    except OSError:
+        # The load reports the file as invalid if it cannot be read, until then the tree view stays empty
+        return
+    GLib.idle_add(on_directory_pages_opened, loader, pages)
+
+
+def on_directory_pages_opened(loader, pages):
+    """
+    Show the pages of a directory file once its row index is ready, unless its load is over by then.
+
+    Parameters:
+        loader (DirectoryLoader): The load the pages were opened for.
+        pages (PagedCsvFile): The pages of its file.
+
+    Returns:
+        None
+    """
+    global directory_pages
+    if loader is not directory_loader or not is_loading_in_background:
+        pages.close()
+        return
+    directory_pages = pages
+
+    # Rows all have the height of the first one, so the tree view only reads the rows it shows
+    for column in entry_treeview.get_columns():
+        if column.get_sizing() != Gtk.TreeViewColumnSizing.FIXED:
+            column.set_fixed_width(max(column.get_width(), LAZY_COLUMN_MIN_WIDTH))
+            column.set_sizing(Gtk.TreeViewColumnSizing.FIXED)
+    entry_treeview.set_fixed_height_mode(True)
+    entry_treeview.set_model(LazyEntryModel(directory_pages))
+
+
+def on_directory_pages_load_progress(fraction):
+    """
+    Show in the window title how much of a directory file shown page by page has been loaded.
+
+    Parameters:
+        fraction (float): Fraction of the file read so far.
+
+    Returns:
+        None
+    """
+    main_win.set_title(f"Pyrectory - {directory_filepath} (read-only, loading {fraction:.0%})")
+
+
+def close_directory_pages():
+    """
+    Stop the background load of the open directory file, if there is one, and stop showing its pages.
+    The tree view is back on the entry list.
+
+    Returns:
+        None
+    """
+    global directory_pages, is_loading_in_background
+    if not is_loading_in_background:
+        return
+    is_loading_in_background = False
+    entry_treeview.set_model(entry_list)
+    if directory_pages is not None:
+        pages = directory_pages
+        directory_pages = None
+        entry_treeview.set_fixed_height_mode(False)
+        pages.close()
+    directory_loader.cancel()
+
+
 def on_main_win_delete_event(widget, event):
     """
     Handle the delete event of the main window.
@@ -104,13 +362,9 @@ def on_main_win_delete_event(widget, event):
     if not is_unsaved:
         return False
 
-    # Load the confirmation dialog from the Glade file
-    builder.add_from_file(GLADE_FILEPATH)
+    # Get the confirmation dialog
     global confirm_close_win
-    confirm_close_win = builder.get_object("confirm_close_win")
-
-    # Connect the signals
-    builder.connect_signals(handlers)
+    confirm_close_win = ui.get_object("confirm_close_win", "confirm_close_win")
 
     # Show the confirmation dialog
     confirm_close_win.show_all()
@@ -119,14 +373,14 @@ def on_main_win_delete_event(widget, event):
 
 def on_no_button_confirm_close_win_clicked(widget):
     """
-    This function is called when the "No" button is clicked in the confirmation dialog. It destroys the confirmation dialog.
+    This function is called when the "No" button is clicked in the confirmation dialog. It hides the confirmation dialog.
 
     Args:
         widget (Gtk.Widget): The widget that triggered the event.
     """
 
-    # Destroy the confirmation dialog
-    confirm_close_win.destroy()
+    # Hide the confirmation dialog, it is reused next time
+    confirm_close_win.hide()
 
 
 def on_yes_button_confirm_close_win_clicked(widget):
@@ -162,37 +416,59 @@ def on_new_button_main_win_clicked(widget, entry_list):
         summon_message_win(title="Error", message="You have unsaved changes!", set_transient_for=main_win)
         return
 
-    # Initiate the window
-    builder.add_from_file(GLADE_FILEPATH)
-    save_filechooser_win = builder.get_object("save_filechooser_win")
-    builder.connect_signals(handlers)
+    # Get the window
+    save_filechooser_win = ui.get_object("save_filechooser_win", "save_filechooser_win")
 
     # Set the filechooser action to save the file and show the dialog
     save_filechooser_win.set_action(Gtk.FileChooserAction.SAVE)
+    add_file_filters(save_filechooser_win)
 
     # Run the dialog
     response = save_filechooser_win.run()
 
     # If OK button clicked and overwrite confirmed
     if response == Gtk.ResponseType.OK:
-        global directory_filepath, is_file_open
+        global directory_filepath, is_file_open, directory_journal
 
-        # Get the filename from the filechooser window
+        # The file being loaded in the background, if any, is only closed once the new one replaces it
+        close_directory_pages()
+
+        # Get the filename from the filechooser window, a new SQLite directory gets its extension if it has none
         directory_filepath = save_filechooser_win.get_filename()
+        if save_filechooser_win.get_filter().get_name() == "SQLite directories" and not is_sqlite_filepath(directory_filepath):
+            directory_filepath += ".sqlite"
+
+        if is_sqlite_filepath(directory_filepath):
+            # Store the entries in a new database, then load them back from it
+            save_filechooser_win.hide()
+            close_directory_database()
+            try:
+                for database_filepath in (directory_filepath, directory_filepath + "-wal", directory_filepath + "-shm"):
+                    if os.path.exists(database_filepath):
+                        os.remove(database_filepath)
+                new_database = SqliteDirectory(directory_filepath)
+                new_database.import_rows(enumerate(directory.rows(), 1))
+                new_database.close()
+            except (OSError, sqlite3.Error) as error:
+                is_file_open = False
+                summon_message_win(title="Error", message=f"Could not create the database!\n{error}", set_transient_for=main_win)
+                return
+            start_directory_load(directory_filepath)
+            return
 
-        # Write the content of the entry list to the file
-        csv_func.write_content_csv(directory_filepath, entry_list)
+        # Write the content of the entry list to the file in the background, like a save, it replaces any journal left there
+        close_directory_database()
+        directory_journal = journal.Journal(directory_filepath, WRITE_ROW_INDEX)
+        pending_journal_records.clear()
+        filepath = directory_filepath
+        background_saver.submit(get_full_save_job(filepath, directory.rows(), directory_journal),
+                                lambda error: on_new_file_saved(filepath, error))
 
         # Set is_file_open to True to indicate that a file has been opened
         is_file_open = True
 
-        # Close the filechooser window
-        save_filechooser_win.destroy()
-
-    # If Cancel button clicked or closed the window
-    elif response == Gtk.ResponseType.CANCEL:
-        # Close the filechooser window
-        save_filechooser_win.destroy()
+    # Close the filechooser window, it is reused next time
+    save_filechooser_win.hide()
 
 
 def on_open_button_main_win_clicked(widget):
@@ -211,40 +487,142 @@ def on_open_button_main_win_clicked(widget):
         summon_message_win(title="Error", message="You have unsaved changes!", set_transient_for=main_win)
         return
     
-    # Initiate the window
-    builder.add_from_file(GLADE_FILEPATH)
-    open_filechooser_win = builder.get_object("open_filechooser_win")
-    builder.connect_signals(handlers)
-    
+    # Get the window
+    open_filechooser_win = ui.get_object("open_filechooser_win", "open_filechooser_win")
+
     # Set the filechooser action to open the file and show the dialog
     open_filechooser_win.set_action(Gtk.FileChooserAction.OPEN)
+    add_file_filters(open_filechooser_win)
 
-    # Run the dialog
+    # Run the dialog, then close it, it is reused next time
     response = open_filechooser_win.run()
+    open_filechooser_win.hide()
 
     # If OK button clicked and overwrite confirmed
     if response == Gtk.ResponseType.OK:
-        global directory_filepath, is_file_open
-        directory_filepath = open_filechooser_win.get_filename()
-        content_csv = csv_func.get_content_csv(directory_filepath)
-    
-        # Clear the entry list and populate it with the contents of the file
-        open_filechooser_win.destroy()
-        entry_list.clear()
+        # Load the file in the background, the entry list is cleared first
+        start_directory_load(open_filechooser_win.get_filename())
+
+
+def start_directory_load(filepath):
+    """
+    Load a directory file into the entry list without blocking the main loop, showing a progress window.
+    Large CSV files without pending journal changes are shown page by page while they load instead.
+
+    Parameters:
+        filepath (str): Path of the directory file to load.
+
+    Returns:
+        None
+    """
+    close_directory_pages()
+    reset_entry_sort()
+    if not is_sqlite_filepath(filepath) and csv_func.get_compression(filepath) is None and os.path.isfile(filepath) \
+            and os.path.getsize(filepath) >= LAZY_OPEN_MIN_SIZE and journal.Journal(filepath).size() == 0:
+        close_directory_database()
+        open_directory_pages(filepath)
+        return
+
+    # Get the progress window
+    builder = ui.get_builder("progress_win")
+    global progress_win, progressbar_progress_win, directory_loader
+    progress_win = builder.get_object("progress_win")
+    progressbar_progress_win = builder.get_object("progressbar_progress_win")
+    progressbar_progress_win.set_fraction(0)
+    builder.get_object("label_progress_win").set_text(f"Loading {os.path.basename(filepath)}...")
+    progress_win.set_transient_for(main_win)
+    progress_win.show_all()
+
+    # Start the load, the rest happens in the progress and finish callbacks
+    close_directory_database()
+    if is_sqlite_filepath(filepath):
         try:
-            for entry in content_csv:
-                entry_list.append(entry)
-        except ValueError:
-            # If the file is invalid, show an error message
-            summon_message_win(title="Error", message="Invalid CSV file!", set_transient_for=main_win)
+            database = SqliteDirectory(filepath)
+        except sqlite3.Error as error:
+            progress_win.hide()
+            summon_message_win(title="Error", message=f"Invalid SQLite file!\n{error}", set_transient_for=main_win)
             return
+        directory_loader = DirectoryLoader(filepath, entry_list, entry_treeview, on_directory_load_progress, on_directory_load_finished,
+                                           database=database)
+    else:
+        directory_loader = DirectoryLoader(filepath, entry_list, entry_treeview, on_directory_load_progress, on_directory_load_finished,
+                                           journal.Journal(filepath, WRITE_ROW_INDEX))
+    directory_loader.start()
 
-        is_file_open = True
-        main_win.set_title(f"Pyrectory - {directory_filepath}")
 
-    # If Cancel button clicked or closed the window
-    elif response == Gtk.ResponseType.CANCEL:
-        open_filechooser_win.destroy()
+def on_directory_load_progress(fraction):
+    """
+    Update the progress window while a directory file is being loaded.
+
+    Parameters:
+        fraction (float): Fraction of the file read so far.
+
+    Returns:
+        None
+    """
+    progressbar_progress_win.set_fraction(fraction)
+    progressbar_progress_win.set_text(f"{fraction:.0%}")
+
+
+def on_directory_load_finished(loader):
+    """
+    Called once a directory file load is over. Closes the progress window and reports invalid rows and errors.
+
+    Parameters:
+        loader (DirectoryLoader): The loader that finished.
+
+    Returns:
+        None
+    """
+    global directory_filepath, is_file_open, is_search_result, directory_journal, directory_database
+    if loader.entry_treeview is None:
+        # Loaded in the background, the entry list replaces the pages shown meanwhile
+        close_directory_pages()
+    else:
+        progress_win.hide()
+    pending_journal_records.clear()
+
+    # The tree view is back on the full entry list
+    is_search_result = False
+    search_match_bitmap.clear()
+
+    # Cancelled or unreadable file, nothing is open anymore
+    if loader.is_cancelled or loader.error:
+        directory_filepath = ""
+        directory_journal = None
+        is_file_open = False
+        main_win.set_title("Pyrectory")
+        if loader.database is not None:
+            loader.database.close()
+        if loader.error:
+            summon_message_win(title="Error", message=f"Invalid directory file!\n{loader.error}", set_transient_for=main_win)
+        return
+
+    directory_filepath = loader.filepath
+    directory_journal = loader.journal
+    directory_database = loader.database
+    database_entry_ids[:] = loader.entry_ids
+    is_file_open = True
+    main_win.set_title(f"Pyrectory - {directory_filepath}")
+
+    # Report the rows that could not be loaded by line number
+    if loader.invalid_line_numbers:
+        shown_line_numbers = ", ".join(str(line_number) for line_number in loader.invalid_line_numbers[:INVALID_LINES_SHOWN])
+        if len(loader.invalid_line_numbers) > INVALID_LINES_SHOWN:
+            shown_line_numbers += ", ..."
+        summon_message_win(title="Warning",
+                           message=f"{len(loader.invalid_line_numbers)} invalid row(s) skipped, on line(s) {shown_line_numbers}",
+                           set_transient_for=main_win)
+
+
+def on_cancel_button_progress_win_clicked(widget):
+    """
+    This function is called when the "Cancel" button of the progress window is clicked. It cancels the directory load.
+
+    Args:
+        widget (Gtk.Widget): The widget that triggered the event.
+    """
+    directory_loader.cancel()
 
 
 def on_save_button_main_win_clicked(widget, entry_list):
@@ -264,13 +642,111 @@ def on_save_button_main_win_clicked(widget, entry_list):
         # If no file is open, show an error message
         summon_message_win(title="Error", message="No file is open!", set_transient_for=main_win)
         return
+    if is_directory_read_only():
+        return
+
+    # Every change has already been committed to the database
+    global is_unsaved
+    if directory_database is not None:
+        is_unsaved = False
+        return
+
+    # The entries are written on a worker thread, from a snapshot: their records are never modified, only replaced
+    records = pending_journal_records[:]
+    pending_journal_records.clear()
+    generation = change_generation
+    save_journal = directory_journal
+    if USE_JOURNAL:
+        # Only the changes are written, the directory file is rewritten once the journal grows too large
+        save_job = lambda: save_journal.append(records)
+    else:
+        save_job = get_full_save_job(directory_filepath, directory.rows(), save_journal)
+    background_saver.submit(save_job, lambda error: on_save_done(generation, records, error))
+
+    if USE_JOURNAL and directory_journal.needs_compaction():
+        directory_journal.compact_in_background(directory.rows(),
+                                                lambda error: GLib.idle_add(on_journal_compaction_done, error))
+
+
+def get_full_save_job(filepath, rows, save_journal):
+    """
+    Get a job for the background saver writing the whole directory file, atomically, then
+    deleting the journal, whose changes the rows include.
+
+    Parameters:
+        filepath (str): Path of the directory file.
+        rows (list): Every entry, a snapshot that is not modified afterwards.
+        save_journal (journal.Journal): The journal of the directory file.
+
+    Returns:
+        callable: The job, raising OSError if the file cannot be written.
+    """
+    def save_job():
+        csv_func.replace_content_csv(filepath, rows, with_row_index=WRITE_ROW_INDEX)
+        snapshot.update_snapshot(filepath, rows)
+        save_journal.discard()
+    return save_job
+
 
-    # Save the contents of the entry list to the file
-    global directory_filepath, is_unsaved
-    csv_func.write_content_csv(directory_filepath, entry_list)
+def on_new_file_saved(filepath, error):
+    """
+    Called on the main loop once the file created by the "New" button has been written in the background.
 
-    # Set is_unsaved to False to indicate that the file has been saved
-    is_unsaved = False
+    Parameters:
+        filepath (str): Path of the new directory file.
+        error (Exception): The error raised while writing, None if the file was written.
+
+    Returns:
+        None
+    """
+    global directory_filepath, is_file_open, directory_journal
+    if not error:
+        return
+    summon_message_win(title="Error", message=f"Could not create the directory file!\n{error}", set_transient_for=main_win)
+    # Nothing was written, the entries stay in the list but no file is open, unless another one was opened since
+    if directory_filepath == filepath:
+        directory_filepath = ""
+        directory_journal = None
+        is_file_open = False
+        pending_journal_records.clear()
+        main_win.set_title("Pyrectory")
+
+
+def on_save_done(generation, records, error):
+    """
+    Called on the main loop once a save running in the background is over.
+
+    Parameters:
+        generation (int): The value of change_generation when the save was started.
+        records (list): The journal records the save wrote.
+        error (Exception): The error raised while writing, None if the save succeeded.
+
+    Returns:
+        None
+    """
+    global is_unsaved
+    if error:
+        # Keep the changes for the next save, before the ones made since
+        pending_journal_records[:0] = records
+        summon_message_win(title="Error", message=f"Could not save the directory!\n{error}", set_transient_for=main_win)
+    elif generation == change_generation:
+        is_unsaved = False
+
+
+def on_journal_compaction_done(error):
+    """
+    Called on the main loop once the journal has been merged into the directory file.
+
+    Parameters:
+        error (OSError): The error raised while writing the directory file, None if it succeeded.
+
+    Returns:
+        bool: False, so the idle callback runs only once.
+    """
+    if error:
+        # The journal is kept, the changes are not lost
+        summon_message_win(title="Error", message=f"Could not compact the directory file!\n{error}", set_transient_for=main_win)
+    return False
 
 def on_add_button_main_win_clicked(widget):
     """
@@ -285,8 +761,10 @@ def on_add_button_main_win_clicked(widget):
     if not is_file_open:
         summon_message_win(title="Error", message="No file is open!", set_transient_for=main_win)
         return
+    if is_directory_read_only():
+        return
 
-    builder.add_from_file(GLADE_FILEPATH)
+    builder = ui.get_builder("add_entry_win")
 
     global add_entry_win, name_entry_add_entry_win, phone_entry_add_entry_win, email_entry_add_entry_win, favorite_checkbutton_add_entry_win
     add_entry_win = builder.get_object("add_entry_win")
@@ -295,17 +773,24 @@ def on_add_button_main_win_clicked(widget):
     email_entry_add_entry_win = builder.get_object("email_entry_add_entry_win")
     favorite_checkbutton_add_entry_win = builder.get_object("favorite_checkbutton_add_entry_win")
 
-    builder.connect_signals(handlers)
+    # The window is reused, start from empty fields
+    name_entry_add_entry_win.set_text("")
+    phone_entry_add_entry_win.set_text("")
+    email_entry_add_entry_win.set_text("")
+    favorite_checkbutton_add_entry_win.set_active(False)
+
     add_entry_win.show_all()
+    add_entry_win.present()
 
 
-def on_add_button_add_entry_win_clicked(widget, entry_list):
+def on_add_button_add_entry_win_clicked(widget, entry_list, directory):
     """
     This function is called when the "Add" button in the add entry window is clicked. It retrieves the values from the name, phone, email, and favorite checkbutton entries, and performs validation checks on the inputs. If the inputs are valid, it creates a new entry list item and appends it to the existing entries list.
 
     Parameters:
         widget (Gtk.Widget): The widget that triggered the event.
         entry_list (Gtk.ListStore): The list of existing entries.
+        directory (directory.Directory): The directory kept in sync with entry_list, used to validate the entry.
 
     Returns:
         None
@@ -315,17 +800,48 @@ def on_add_button_add_entry_win_clicked(widget, entry_list):
     email = email_entry_add_entry_win.get_text().strip()
     is_favorite = favorite_checkbutton_add_entry_win.get_active()
 
-    entry_info_validity = misc.is_entry_info_valid(entry_list, None, name, phone, email, True)
+    entry_info_validity = directory.validate(name, phone, email)
     if entry_info_validity["is_valid"]:
-        new_entry = [name, phone, email, "☆" if is_favorite else ""]
-        entry_list.append(new_entry)
+        new_entry = Entry(name, phone, email, is_favorite)
+        # A sorted entry list stays sorted
+        position = len(entry_list)
+        if entry_sort is not None:
+            sort_column, is_descending = entry_sort
+            position = directory.sort_index.find_position(sort_column, new_entry, is_descending)
+        if directory_database is not None:
+            # Written to the database right away
+            try:
+                database_entry_ids.insert(position, directory_database.add(new_entry))
+            except sqlite3.Error as error:
+                summon_message_win(title="Error", message=f"Could not add the entry!\n{error}", set_transient_for=add_entry_win)
+                return
+            entry_list.insert(position, new_entry.to_row())
+            return
 
-        global is_unsaved
-        is_unsaved = True
+        entry_list.insert(position, new_entry.to_row())
+        pending_journal_records.append(journal.add_record(new_entry.to_row()))
+        mark_unsaved()
     else:
         summon_message_win(title="Error", message=entry_info_validity["message_info"], set_transient_for=add_entry_win)
 
 
+def get_selected_entry(entry_treeview):
+    """
+    Get the entry selected in the tree view, in the entry list itself even when the tree view shows search results.
+
+    Args:
+        entry_treeview (Gtk.TreeView): The tree view widget displaying the entries.
+
+    Returns:
+        tuple: (Gtk.ListStore, Gtk.TreeIter) for the selected entry, the iterator is None if nothing is selected.
+    """
+    model, treeiter = entry_treeview.get_selection().get_selected()
+    while treeiter and isinstance(model, (Gtk.TreeModelFilter, Gtk.TreeModelSort)):
+        treeiter = model.convert_iter_to_child_iter(treeiter)
+        model = model.get_model()
+    return model, treeiter
+
+
 def on_remove_button_main_win_clicked(widget, entry_treeview):
     """
     Remove the selected entry from the entry_treeview when the remove button is clicked.
@@ -337,12 +853,27 @@ def on_remove_button_main_win_clicked(widget, entry_treeview):
     Returns:
         None
     """
-    selection = entry_treeview.get_selection()
-    model, treeiter = selection.get_selected()
-    if treeiter:
+    if is_directory_read_only():
+        return
+    model, treeiter = get_selected_entry(entry_treeview)
+    if not treeiter:
+        return
+
+    if directory_database is not None:
+        # Removed from the database right away
+        position = model.get_path(treeiter).get_indices()[0]
+        try:
+            directory_database.remove(database_entry_ids[position])
+        except sqlite3.Error as error:
+            summon_message_win(title="Error", message=f"Could not remove the entry!\n{error}", set_transient_for=main_win)
+            return
+        del database_entry_ids[position]
         model.remove(treeiter)
-        global is_unsaved
-        is_unsaved = True
+        return
+
+    pending_journal_records.append(journal.remove_record(model[treeiter][0]))
+    model.remove(treeiter)
+    mark_unsaved()
 
 
 def on_edit_button_main_win_clicked(widget, entry_treeview):
@@ -358,16 +889,16 @@ def on_edit_button_main_win_clicked(widget, entry_treeview):
     """
 
     # Get data of entry to edit
-    selection = entry_treeview.get_selection()
-    model, treeiter = selection.get_selected()
+    if is_directory_read_only():
+        return
+    model, treeiter = get_selected_entry(entry_treeview)
     if not treeiter:
         return
     entry = model[treeiter]
     entry_data = entry[:]  # Create a copy of the entry data
 
-    # Create a new window for editing the entry
-    builder = Gtk.Builder()
-    builder.add_from_file(GLADE_FILEPATH)
+    # Get the window for editing the entry
+    builder = ui.get_builder("edit_entry_win")
 
     global edit_entry_win, name_entry_edit_entry_win, phone_entry_edit_entry_win, email_entry_edit_entry_win, favorite_checkbutton_edit_entry_win
     edit_entry_win = builder.get_object("edit_entry_win")
@@ -376,31 +907,29 @@ def on_edit_button_main_win_clicked(widget, entry_treeview):
     email_entry_edit_entry_win = builder.get_object("email_entry_edit_entry_win")
     favorite_checkbutton_edit_entry_win = builder.get_object("favorite_checkbutton_edit_entry_win")
 
-    builder.connect_signals(handlers)
     edit_entry_win.show_all()
+    edit_entry_win.present()
 
     # Set the initial values of the entry fields
     name_entry_edit_entry_win.set_text(entry_data[0])
     phone_entry_edit_entry_win.set_text(entry_data[1])
     email_entry_edit_entry_win.set_text(entry_data[2])
-    if entry_data[3]:
-        favorite_checkbutton_edit_entry_win.set_active(True)
+    favorite_checkbutton_edit_entry_win.set_active(bool(entry_data[3]))
 
 
-def on_edit_button_edit_entry_win_clicked(widget, entry_list, entry_treeview):
+def on_edit_button_edit_entry_win_clicked(widget, directory, entry_treeview):
     """
     Updates the selected entry in the entry_treeview when the edit button is clicked.
 
     Args:
         widget (Gtk.Button): The edit button widget.
-        entry_list (Gtk.ListStore): The list store containing the entries.
+        directory (directory.Directory): The directory kept in sync with the list store, used to validate the entry.
         entry_treeview (Gtk.TreeView): The tree view widget displaying the entries.
 
     Returns:
         None
     """
-    selection = entry_treeview.get_selection()
-    model, treeiter = selection.get_selected()
+    model, treeiter = get_selected_entry(entry_treeview)
     if not treeiter:
         return
     
@@ -410,16 +939,29 @@ def on_edit_button_edit_entry_win_clicked(widget, entry_list, entry_treeview):
     email = email_entry_edit_entry_win.get_text().strip()
     is_favorite = favorite_checkbutton_edit_entry_win.get_active()
 
-    entry_info_validity = misc.is_entry_info_valid(entry_list, original_name, name, phone, email, False)
+    entry_info_validity = directory.validate(name, phone, email, original_name)
     if entry_info_validity["is_valid"]:
+        if directory_database is not None:
+            # Written to the database right away, before the entry list
+            position = model.get_path(treeiter).get_indices()[0]
+            try:
+                directory_database.edit(database_entry_ids[position], Entry(name, phone, email, is_favorite))
+            except sqlite3.Error as error:
+                summon_message_win(title="Error", message=f"Could not edit the entry!\n{error}", set_transient_for=edit_entry_win)
+                return
+
         entry = model[treeiter]
         entry[0] = name_entry_edit_entry_win.get_text().strip()
         entry[1] = phone_entry_edit_entry_win.get_text().strip()
         entry[2] = email_entry_edit_entry_win.get_text().strip()
-        entry[3] = f"{'☆' if favorite_checkbutton_edit_entry_win.get_active() else ''}"
-    
-        global is_unsaved
-        is_unsaved = True
+        entry[3] = FAVORITE_MARK if favorite_checkbutton_edit_entry_win.get_active() else ""
+        edited_row = entry[:]
+        if entry_sort is not None:
+            move_sorted_entry(model.get_path(treeiter).get_indices()[0], Entry.from_row(edited_row))
+        if directory_database is not None:
+            return
+        pending_journal_records.append(journal.edit_record(original_name, edited_row))
+        mark_unsaved()
     else:
         summon_message_win(title="Error", message=entry_info_validity["message_info"], set_transient_for=edit_entry_win)
 
@@ -440,16 +982,18 @@ def on_search_button_main_win_clicked(widget):
     if not is_file_open:
         summon_message_win(title="Error", message="No file is open!", set_transient_for=main_win)
         return
+    if is_directory_read_only():
+        return
     
-    # Create a new window using a Glade file
-    builder = Gtk.Builder()
-    builder.add_from_file(GLADE_FILEPATH)
+    # Get the search window, built once and reused
+    builder = ui.get_builder("search_win")
     search_win = builder.get_object("search_win")
 
     # Get the radio buttons and entry fields for search criteria
     global name_radiobutton_search_win, phone_radiobutton_search_win, email_radiobutton_search_win, \
         favorite_radiobutton_search_win, name_entry_search_win, phone_entry_search_win, \
-        email_entry_search_win, favorite_checkbutton_search_win
+        email_entry_search_win, favorite_checkbutton_search_win, phone_mode_comboboxtext_search_win, \
+        fuzzy_checkbutton_search_win, match_comboboxtext_search_win, plan_label_search_win
 
     name_radiobutton_search_win = builder.get_object("name_radiobutton_search_win")
     phone_radiobutton_search_win = builder.get_object("phone_radiobutton_search_win")
@@ -459,17 +1003,19 @@ def on_search_button_main_win_clicked(widget):
     name_entry_search_win = builder.get_object("name_entry_search_win")
     phone_entry_search_win = builder.get_object("phone_entry_search_win")
     email_entry_search_win = builder.get_object("email_entry_search_win")
+    phone_mode_comboboxtext_search_win = builder.get_object("phone_mode_comboboxtext_search_win")
+    fuzzy_checkbutton_search_win = builder.get_object("fuzzy_checkbutton_search_win")
     favorite_checkbutton_search_win = builder.get_object("favorite_checkbutton_search_win")
+    match_comboboxtext_search_win = builder.get_object("match_comboboxtext_search_win")
+    plan_label_search_win = builder.get_object("plan_label_search_win")
 
     # Get the reset button and search button
     reset_button_search_win = builder.get_object("reset_button_search_win")
     search_button_search_win = builder.get_object("search_button_search_win")
 
-    # Connect the signals
-    builder.connect_signals(handlers)
-
     # Show the search window
     search_win.show_all()
+    search_win.present()
 
 
 def on_reset_button_search_win_clicked(widget, entry_list, entry_treeview):
@@ -487,82 +1033,517 @@ def on_reset_button_search_win_clicked(widget, entry_list, entry_treeview):
 
     # Reset the tree view to show the full list of entries
     entry_treeview.set_model(entry_list)
+    search_match_bitmap.clear()
 
     global is_search_result
     is_search_result = False
 
 
-def on_search_button_search_win_clicked(widget, entry_list, search_results, entry_treeview):
+def on_entry_column_clicked(column, entry_treeview, directory):
     """
-    Handles the "clicked" event of the search button in the search window.
+    Sort the entry list by the clicked column, in the other order if it is already sorted by it.
+    The order is kept by the directory file once saved in full.
+
+    Args:
+        column (Gtk.TreeViewColumn): The clicked column.
+        entry_treeview (Gtk.TreeView): The tree view widget displaying the entries.
+        directory (directory.Directory): The directory kept in sync with the entry list.
+
+    Returns:
+        None
+    """
+    global entry_sort
+    if is_loading_in_background:
+        # Rows are read in file order until the directory file is loaded
+        return
+
+    sort_column = entry_treeview.get_columns().index(column)
+    is_descending = entry_sort == (sort_column, False)
+    new_order = directory.sort(sort_column, is_descending)
+    if directory_database is not None:
+        database_entry_ids[:] = array('q', map(database_entry_ids.__getitem__, new_order))
+    entry_sort = (sort_column, is_descending)
+
+    for other_column in entry_treeview.get_columns():
+        other_column.set_sort_indicator(other_column is column)
+    column.set_sort_order(Gtk.SortType.DESCENDING if is_descending else Gtk.SortType.ASCENDING)
+
+
+def move_sorted_entry(position, entry):
+    """
+    Move an edited entry to its place in the sorted entry list.
+
+    Args:
+        position (int): Position of the entry in the entry list.
+        entry (Entry): Its new content.
+
+    Returns:
+        None
+    """
+    sort_column, is_descending = entry_sort
+    new_position = directory.sort_index.find_position(sort_column, entry, is_descending, skipped_position=position)
+    directory.store_index.move(position, new_position)
+    if directory_database is not None:
+        database_entry_ids.insert(new_position, database_entry_ids.pop(position))
+
+
+def reset_entry_sort():
+    """
+    Forget the order the entry list is sorted by, as a newly loaded directory is in file order.
+
+    Returns:
+        None
+    """
+    global entry_sort
+    entry_sort = None
+    for column in entry_treeview.get_columns():
+        column.set_sort_indicator(False)
+
+
+def get_entry_row_id(model, treeiter):
+    """
+    Get the store index row id of an entry shown in the tree view.
+
+    Args:
+        model (Gtk.TreeModel): The entry list, or a filter or sort model over it.
+        treeiter (Gtk.TreeIter): The entry, in that model.
+
+    Returns:
+        int: The row id of the entry.
+    """
+    while isinstance(model, (Gtk.TreeModelFilter, Gtk.TreeModelSort)):
+        treeiter = model.convert_iter_to_child_iter(treeiter)
+        model = model.get_model()
+    return directory.store_index.row_id_at(model.get_path(treeiter).get_indices()[0])
+
+
+def is_entry_visible(entry_list, treeiter, data):
+    """
+    Visible function of the search results filter. An entry is shown if its row id is set in the match bitmap.
 
     Args:
-        widget (Gtk.Widget): The widget that triggered the event.
         entry_list (Gtk.ListStore): The list store containing the entries.
-        search_results (Gtk.ListStore): The list store to store the search results.
+        treeiter (Gtk.TreeIter): The entry to check.
+        data: Unused.
+
+    Returns:
+        bool: True if the entry is a search result, False otherwise.
+    """
+    row_id = directory.store_index.row_id_at(entry_list.get_path(treeiter).get_indices()[0])
+    return row_id < len(search_match_bitmap) and search_match_bitmap[row_id] == 1
+
+
+def show_search_results(row_ids, entry_list, entry_treeview, ranks=None):
+    """
+    Show only the given entries in the tree view, through a filter over the entry list. No row is copied.
+
+    Args:
+        row_ids (list): Row ids of the entries to show.
+        entry_list (Gtk.ListStore): The list store containing the entries.
         entry_treeview (Gtk.TreeView): The tree view widget displaying the entries.
+        ranks (dict, optional): Row id -> place in the results, to show them in that order instead of the entry list order.
 
     Returns:
         None
     """
-    
-    # Get data of entry to search and criteria
+    global search_match_bitmap, search_ranks, is_search_result
+    search_match_bitmap = directory.store_index.make_bitmap(row_ids)
+    search_ranks = ranks
+
+    # A new filter only evaluates the rows the tree view asks for
+    entry_filter = entry_list.filter_new()
+    entry_filter.set_visible_func(is_entry_visible)
+    if ranks is None:
+        entry_treeview.set_model(entry_filter)
+    else:
+        ranked_entries = Gtk.TreeModelSort(model=entry_filter)
+        ranked_entries.set_default_sort_func(compare_search_ranks)
+        entry_treeview.set_model(ranked_entries)
+    is_search_result = True
+
+
+def compare_search_ranks(entry_filter, treeiter_a, treeiter_b, data):
+    """
+    Sort function showing ranked search results (like fuzzy name matches) best first.
+
+    Args:
+        entry_filter (Gtk.TreeModelFilter): The search results filter.
+        treeiter_a (Gtk.TreeIter): The first entry to compare.
+        treeiter_b (Gtk.TreeIter): The second entry to compare.
+        data: Unused.
+
+    Returns:
+        int: Negative, zero or positive if the first entry ranks before, with or after the second.
+    """
+    rank_a = search_ranks.get(get_entry_row_id(entry_filter, treeiter_a), len(search_ranks))
+    rank_b = search_ranks.get(get_entry_row_id(entry_filter, treeiter_b), len(search_ranks))
+    return rank_a - rank_b
+
+
+def get_search_query():
+    """
+    Read the query from the search window.
+
+    Returns:
+        tuple: (search_criteria, search_by, phone_match, is_fuzzy), search_by being one of the misc.SEARCH_BY_* constants,
+               phone_match one of the misc.PHONE_MATCH_* constants and is_fuzzy True for a fuzzy name search.
+    """
+    phone_match = misc.PHONE_MATCH_CONTAINS
+    is_fuzzy = False
     if name_radiobutton_search_win.get_active():
         # Search by name
         search_criteria = name_entry_search_win.get_text().strip()
         search_by = 0
+        is_fuzzy = fuzzy_checkbutton_search_win.get_active()
     elif phone_radiobutton_search_win.get_active():
         # Search by phone
         search_criteria = phone_entry_search_win.get_text().strip()
         search_by = 1
+        phone_match = phone_mode_comboboxtext_search_win.get_active()
     elif email_radiobutton_search_win.get_active():
         # Search by email
         search_criteria = email_entry_search_win.get_text().strip()
         search_by = 2
     elif favorite_radiobutton_search_win.get_active():
         # Search by favorite
-        search_criteria = f"{'☆' if favorite_checkbutton_search_win.get_active() else ''}"
+        search_criteria = FAVORITE_MARK if favorite_checkbutton_search_win.get_active() else ""
         search_by = 3
+    return search_criteria, search_by, phone_match, is_fuzzy
 
-    # Search from the entry list
-    misc.search(search_criteria, search_by, entry_list, search_results)
 
-    # Update the entry treeview to show the search results
-    entry_treeview.set_model(search_results)
+def get_compound_query():
+    """
+    Read a query on several fields at once from the search window.
 
-    global is_search_result
-    is_search_result = True
+    Returns:
+        tuple: (criteria, match), criteria being a query_planner.Criterion for every filled field, the favorite field
+               counting only when checked, and match query_planner.MATCH_ALL or MATCH_ANY. None if a single field is searched.
+    """
+    match_mode = match_comboboxtext_search_win.get_active_id()
+    if match_mode not in ("all", "any"):
+        return None
+
+    criteria = []
+    for search_by, field_entry in ((misc.SEARCH_BY_NAME, name_entry_search_win),
+                                   (misc.SEARCH_BY_PHONE, phone_entry_search_win),
+                                   (misc.SEARCH_BY_EMAIL, email_entry_search_win)):
+        search_criteria = field_entry.get_text().strip()
+        if search_criteria:
+            criteria.append(Criterion(search_by, search_criteria, phone_mode_comboboxtext_search_win.get_active()
+                                      if search_by == misc.SEARCH_BY_PHONE else misc.PHONE_MATCH_CONTAINS))
+    if favorite_checkbutton_search_win.get_active():
+        criteria.append(Criterion(misc.SEARCH_BY_FAVORITE, FAVORITE_MARK))
+    return criteria, MATCH_ALL if match_mode == "all" else MATCH_ANY
+
+
+def find_search_results(search_query, directory):
+    """
+    Run a query from the search window against the directory.
 
+    Args:
+        search_query (tuple): The query, as returned by get_search_query().
+        directory (directory.Directory): The directory kept in sync with the entry list.
 
-def on_help_button_main_win_clicked(widget):
+    Returns:
+        tuple: (row_ids, ranks), ranks mapping row ids to their place in the results, None if they are in entry list order.
     """
-    Handles the "clicked" event of the help button in the main window.
+    search_criteria, search_by, phone_match, is_fuzzy = search_query
+    if directory_database is not None:
+        # The database indexes answer, its ids are matched to the rows of the entry list by position
+        entry_ids = directory_database.search(search_criteria, search_by, phone_match, is_fuzzy)
+        if entry_sort is None:
+            # Database ids are in entry list order until it is sorted
+            positions = [bisect_left(database_entry_ids, entry_id) for entry_id in entry_ids]
+        else:
+            position_by_entry_id = {entry_id: position for position, entry_id in enumerate(database_entry_ids)}
+            positions = [position_by_entry_id[entry_id] for entry_id in entry_ids]
+        row_ids = [directory.store_index.row_id_at(position) for position in positions]
+    else:
+        row_ids = directory.search(search_criteria, search_by, phone_match, is_fuzzy)
+
+    # Fuzzy name matches come closest first
+    if search_by == misc.SEARCH_BY_NAME and is_fuzzy:
+        return row_ids, {row_id: rank for rank, row_id in enumerate(row_ids)}
+    return row_ids, None
+
+
+def on_search_button_search_win_clicked(widget, entry_list, entry_treeview, directory):
+    """
+    Handles the "clicked" event of the search button in the search window.
+
+    Args:
+        widget (Gtk.Widget): The widget that triggered the event.
+        entry_list (Gtk.ListStore): The list store containing the entries.
+        entry_treeview (Gtk.TreeView): The tree view widget displaying the entries.
+        directory (directory.Directory): The directory kept in sync with entry_list.
+
+    Returns:
+        None
+    """
+    
+    # Get data of entry to search and criteria, the search typed so far is replaced
+    live_search.cancel()
+    compound_query = get_compound_query()
+    if compound_query is not None:
+        # Every filled field at once: the query planner picks the order the indexes are read in.
+        # The in-memory indexes answer, even when the database is open, as they mirror the entry list
+        criteria, match = compound_query
+        plan = directory.query(criteria, match)
+        show_search_results(plan.row_ids, entry_list, entry_treeview)
+        plan_label_search_win.set_text(f"{len(plan.row_ids)} results in {plan.seconds * 1000:.1f} ms")
+        plan_label_search_win.set_tooltip_text(plan.explain())
+        return
+
+    search_query = get_search_query()
+    plan_label_search_win.set_text("")
+    plan_label_search_win.set_tooltip_text(None)
+
+    # Search from the entry list, and show the search results
+    row_ids, ranks = find_search_results(search_query, directory)
+    show_search_results(row_ids, entry_list, entry_treeview, ranks)
+
+
+def on_entry_search_win_changed(widget, radiobutton, entry_list, entry_treeview, directory):
+    """
+    Handles the "changed" event of the name, phone and e-mail fields of the search window, searching as the user types.
+
+    Args:
+        widget (Gtk.Entry): The field that changed.
+        radiobutton (Gtk.RadioButton): The radio button of that field, selected when typing in it.
+        entry_list (Gtk.ListStore): The list store containing the entries.
+        entry_treeview (Gtk.TreeView): The tree view widget displaying the entries.
+        directory (directory.Directory): The directory kept in sync with entry_list.
+
+    Returns:
+        None
+    """
+    # Queries on several fields run when the search button is clicked
+    if get_compound_query() is not None:
+        return
+
+    radiobutton.set_active(True)
+    search_query = get_search_query()
+    search_criteria, search_by, phone_match, is_fuzzy = search_query
+
+    # An empty field shows every entry again
+    if not search_criteria:
+        live_search.cancel()
+        on_reset_button_search_win_clicked(widget, entry_list, entry_treeview)
+        return
+
+    # Substring searches are debounced and run in the background, the results are shown once found,
+    # unless the full-text index of the database answers them
+    if not is_fuzzy and phone_match == misc.PHONE_MATCH_CONTAINS and directory_database is None:
+        live_search.request(search_criteria, search_by)
+        return
+
+    # Fuzzy, phone prefix and phone suffix searches only walk a small part of their index, run them right away
+    live_search.cancel()
+    row_ids, ranks = find_search_results(search_query, directory)
+    show_search_results(row_ids, entry_list, entry_treeview, ranks)
+
+
+def on_duplicates_button_main_win_clicked(widget):
+    """
+    Look for entries that are likely the same contact, on a worker thread, and list them by cluster in the duplicates window.
+
+    Args:
+        widget (Gtk.Widget): The widget that triggered the event.
+
+    Returns:
+        None
+    """
+    if not is_file_open:
+        summon_message_win(title="Error", message="No file is open!", set_transient_for=main_win)
+        return
+    if is_directory_read_only():
+        return
+
+    # Get the duplicates window, built once and reused
+    builder = ui.get_builder("duplicates_win")
+    global duplicates_win, duplicate_list, duplicates_treeview_duplicates_win, summary_label_duplicates_win, \
+        merge_button_duplicates_win, duplicate_search_generation
+    duplicates_win = builder.get_object("duplicates_win")
+    duplicate_list = builder.get_object("duplicate_list")
+    duplicates_treeview_duplicates_win = builder.get_object("duplicates_treeview_duplicates_win")
+    summary_label_duplicates_win = builder.get_object("summary_label_duplicates_win")
+    merge_button_duplicates_win = builder.get_object("merge_button_duplicates_win")
+
+    duplicate_list.clear()
+    merge_button_duplicates_win.set_sensitive(False)
+    summary_label_duplicates_win.set_text("Looking for duplicates...")
+    duplicates_win.show_all()
+    duplicates_win.present()
+
+    # The search works on a snapshot of the entries, which may change while it runs
+    duplicate_search_generation += 1
+    row_ids = directory.store_index.row_ids()
+    entries = [(entry.name, entry.phone, entry.email) for entry in directory.store_index.rows()]
+    threading.Thread(target=find_duplicates_job, args=(duplicate_search_generation, row_ids, entries),
+                     name="duplicate-finder", daemon=True).start()
+
+
+def find_duplicates_job(generation, row_ids, entries):
+    """
+    Run a duplicate search on a worker thread, then show its results from the main loop.
+
+    Args:
+        generation (int): Number of the search, see duplicate_search_generation.
+        row_ids (list): Row id of each entry.
+        entries (list): (name, phone, e-mail) of each entry.
+
+    Returns:
+        None
+    """
+    try:
+        # Worker processes are spawned, forking a process running GTK and other threads is unsafe
+        report = duplicate_finder.find_duplicates(entries, mp_context=multiprocessing.get_context("spawn"))
+    except (OSError, BrokenProcessPool) as error:
+        GLib.idle_add(on_duplicates_found, generation, row_ids, None, error)
+        return
+    GLib.idle_add(on_duplicates_found, generation, row_ids, report, None)
+
+
+def on_duplicates_found(generation, row_ids, report, error):
+    """
+    List the clusters of duplicates in the duplicates window, each entry with its current content.
+
+    Args:
+        generation (int): Number of the search, its results are dropped if another one started since.
+        row_ids (list): Row id of each entry searched.
+        report (duplicate_finder.DuplicateReport): The clusters found, None if the search failed.
+        error (Exception): Why the search failed, None if it did not.
+
+    Returns:
+        bool: False, so the main loop calls it only once.
+    """
+    if generation != duplicate_search_generation:
+        return False
+    if error is not None:
+        summary_label_duplicates_win.set_text(f"Could not look for duplicates!\n{error}")
+        return False
+
+    duplicates_treeview_duplicates_win.set_model(None)
+    for number, (score, positions) in enumerate(report.clusters, 1):
+        cluster_iter = duplicate_list.append(None, [f"Cluster {number}", "", "", "", f"{score:.2f}", -1])
+        for position in positions:
+            entry = directory.store_index.get_row(row_ids[position])
+            # Removed since the search started
+            if entry is not None:
+                duplicate_list.append(cluster_iter, entry.to_row() + ["", row_ids[position]])
+    duplicates_treeview_duplicates_win.set_model(duplicate_list)
+    duplicates_treeview_duplicates_win.expand_all()
+
+    summary_label_duplicates_win.set_text(report.summary())
+    merge_button_duplicates_win.set_sensitive(bool(report.clusters))
+    return False
+
+
+def on_merge_button_duplicates_win_clicked(widget):
+    """
+    Merge the cluster selected in the duplicates window into one entry: the selected entry, or the first one
+    of the cluster if the cluster itself is selected. Its empty phone and e-mail fields are filled from the
+    other entries, it becomes a favorite if any of them is one, and the other entries are removed.
 
     Args:
         widget (Gtk.Widget): The widget that triggered the event.
 
     Returns:
         None
+    """
+    model, treeiter = duplicates_treeview_duplicates_win.get_selection().get_selected()
+    if not treeiter:
+        return
+    cluster_iter = model.iter_parent(treeiter) or treeiter
+    row_ids = [row[DUPLICATE_ROW_ID_COLUMN] for row in model[cluster_iter].iterchildren()]
+    kept_row_id = model[treeiter][DUPLICATE_ROW_ID_COLUMN]
+    if kept_row_id == -1:
+        kept_row_id = row_ids[0]
+
+    if len(row_ids) < 2 or any(directory.store_index.get_row(row_id) is None for row_id in row_ids):
+        summon_message_win(title="Error", message="The directory changed since the duplicates were found, look for them again!",
+                           set_transient_for=duplicates_win)
+        return
+    if merge_duplicate_entries(kept_row_id, row_ids):
+        model.remove(cluster_iter)
 
-    This function creates a new Gtk.Builder object and adds a Glade file to it. It then retrieves the "help_win" object from the builder and assigns it to the "help_win" variable. It also retrieves the "description_label_help_win" object from the builder and assigns it to the "description_label_help_win" variable.
 
-    After that, it connects the signals of the builder to the "handlers" dictionary. Finally, it shows the "help_win" window.
+def merge_duplicate_entries(kept_row_id, row_ids):
+    """
+    Merge entries into one of them, see on_merge_button_duplicates_win_clicked().
 
-    Note: The "handlers" dictionary is not defined in this function and must be defined elsewhere in the codebase.
+    Args:
+        kept_row_id (int): Row id of the entry kept.
+        row_ids (list): Row ids of the entries merged, the kept one included.
+
+    Returns:
+        bool: True if the entries were merged, False if the database could not be changed.
     """
+    store_index = directory.store_index
+    entries = [store_index.row(row_id) for row_id in row_ids]
+    kept_entry = store_index.row(kept_row_id)
+    merged_entry = Entry(kept_entry.name,
+                         kept_entry.phone or next((entry.phone for entry in entries if entry.phone), ""),
+                         kept_entry.email or next((entry.email for entry in entries if entry.email), ""),
+                         any(entry.favorite for entry in entries))
+
+    merged_row_ids = set(row_ids)
+    positions = {row_id: position for position, row_id in enumerate(store_index.row_ids()) if row_id in merged_row_ids}
+    kept_position = positions.pop(kept_row_id)
+    removed_positions = sorted(positions.values(), reverse=True)
+
+    if directory_database is not None:
+        # Written to the database right away, before the entry list
+        try:
+            directory_database.edit(database_entry_ids[kept_position], merged_entry)
+            for position in removed_positions:
+                directory_database.remove(database_entry_ids[position])
+        except sqlite3.Error as error:
+            summon_message_win(title="Error", message=f"Could not merge the entries!\n{error}", set_transient_for=duplicates_win)
+            return False
+    else:
+        pending_journal_records.append(journal.edit_record(kept_entry.name, merged_entry.to_row()))
+
+    entry_list.set_row(entry_list.get_iter(kept_position), merged_entry.to_row())
+    # From the last one, so the positions of the others do not change
+    for position in removed_positions:
+        if directory_database is not None:
+            del database_entry_ids[position]
+        else:
+            pending_journal_records.append(journal.remove_record(store_index.row(store_index.row_id_at(position)).name))
+        entry_list.remove(entry_list.get_iter(position))
+
+    if entry_sort is not None:
+        move_sorted_entry(kept_position - sum(position < kept_position for position in removed_positions), merged_entry)
+    if directory_database is None:
+        mark_unsaved()
+    return True
 
-    # Initiate the builder and load Glade file
-    builder = Gtk.Builder()
-    builder.add_from_file(GLADE_FILEPATH)
+
+def on_help_button_main_win_clicked(widget):
+    """
+    Handles the "clicked" event of the help button in the main window.
+
+    Args:
+        widget (Gtk.Widget): The widget that triggered the event.
+
+    Returns:
+        None
+
+    This function gets the "help_win" window from the UI factory, which builds it on first use with the signals of the "handlers" dictionary connected. It also retrieves the "description_label_help_win" object and assigns it to the "description_label_help_win" variable. Finally, it shows the "help_win" window.
+    """
+
+    # Get the help window, built once and reused
+    builder = ui.get_builder("help_win")
     help_win = builder.get_object("help_win")
 
     # Retrieve the explanation label object from the builder
     global description_label_help_win
     description_label_help_win = builder.get_object("description_label_help_win")
 
-    # Connect the signals and show the help window
-    builder.connect_signals(handlers)
+    # Show the help window
     help_win.show_all()
+    help_win.present()
 
 
 def on_about_button_main_win_clicked(widget):
@@ -576,33 +1557,18 @@ def on_about_button_main_win_clicked(widget):
         None
     """
 
-    # Initiate the builder and load Glade file
-    builder = Gtk.Builder()
-    builder.add_from_file(GLADE_FILEPATH)
-
-    # Show the about window
-    about_win = builder.get_object("about_win")
-    about_win.connect("response", lambda d, r: d.destroy()) # Destroy the window when the user clicks on the "Close" button
+    # Show the about window, built once and reused
+    about_win = ui.get_object("about_win", "about_win")
     about_win.run()
+    about_win.hide() # Hide the window when the user clicks on the "Close" button
 
 
-# Initiate the builder and load Glade file
-builder = Gtk.Builder()
-builder.add_from_file(GLADE_FILEPATH)
-
-# Main window
-main_win = builder.get_object("main_win")
-main_win.connect("destroy", Gtk.main_quit)
-
-# Entry table
-entry_list = builder.get_object("entry_list")
-entry_treeview = builder.get_object("entry_treeview")
-
 # Signals
 handlers = {
     # Signals for the main window
     "on_main_win_delete_event": lambda widget, event: on_main_win_delete_event(widget, event),
     "on_no_button_confirm_close_win_clicked": lambda widget: on_no_button_confirm_close_win_clicked(widget),
+    "on_cancel_button_progress_win_clicked": lambda widget: on_cancel_button_progress_win_clicked(widget),
     "on_yes_button_confirm_close_win_clicked": lambda widget: on_yes_button_confirm_close_win_clicked(widget),
 
     "on_new_button_main_win_clicked": lambda widget: on_new_button_main_win_clicked(widget, entry_list),
@@ -612,14 +1578,22 @@ handlers = {
     "on_remove_button_main_win_clicked": lambda widget: on_remove_button_main_win_clicked(widget, entry_treeview),
     "on_edit_button_main_win_clicked": lambda widget: on_edit_button_main_win_clicked(widget, entry_treeview),
     "on_search_button_main_win_clicked": lambda widget: on_search_button_main_win_clicked(widget),
+    "on_duplicates_button_main_win_clicked": lambda widget: on_duplicates_button_main_win_clicked(widget),
     "on_help_button_main_win_clicked": lambda widget: on_help_button_main_win_clicked(widget),
     "on_about_button_main_win_clicked": lambda widget: on_about_button_main_win_clicked(widget),
+    "on_entry_column_clicked": lambda column: on_entry_column_clicked(column, entry_treeview, directory),
 
-    # Signals for the add, edit and search windows
-    "on_add_button_add_entry_win_clicked": lambda widget: on_add_button_add_entry_win_clicked(widget, entry_list),
-    "on_edit_button_edit_entry_win_clicked": lambda widget: on_edit_button_edit_entry_win_clicked(widget, entry_list, entry_treeview),
+    # Signals for the add, edit, search and duplicates windows
+    "on_add_button_add_entry_win_clicked": lambda widget: on_add_button_add_entry_win_clicked(widget, entry_list, directory),
+    "on_edit_button_edit_entry_win_clicked": lambda widget: on_edit_button_edit_entry_win_clicked(widget, directory, entry_treeview),
     "on_reset_button_search_win_clicked": lambda widget: on_reset_button_search_win_clicked(widget, entry_list, entry_treeview),
-    "on_search_button_search_win_clicked": lambda widget: on_search_button_search_win_clicked(widget, entry_list, search_results, entry_treeview),
+    "on_search_button_search_win_clicked": lambda widget: on_search_button_search_win_clicked(widget, entry_list, entry_treeview, directory),
+    "on_name_entry_search_win_changed": lambda widget: on_entry_search_win_changed(widget, name_radiobutton_search_win, entry_list, entry_treeview, directory),
+    "on_phone_entry_search_win_changed": lambda widget: on_entry_search_win_changed(widget, phone_radiobutton_search_win, entry_list, entry_treeview, directory),
+    "on_phone_mode_comboboxtext_search_win_changed": lambda widget: on_entry_search_win_changed(phone_entry_search_win, phone_radiobutton_search_win, entry_list, entry_treeview, directory),
+    "on_fuzzy_checkbutton_search_win_toggled": lambda widget: on_entry_search_win_changed(name_entry_search_win, name_radiobutton_search_win, entry_list, entry_treeview, directory),
+    "on_email_entry_search_win_changed": lambda widget: on_entry_search_win_changed(widget, email_radiobutton_search_win, entry_list, entry_treeview, directory),
+    "on_merge_button_duplicates_win_clicked": lambda widget: on_merge_button_duplicates_win_clicked(widget),
 
     # Signals for the help window
     "on_new_button_help_win_clicked": lambda *args: description_label_help_win.set_text(NEW_BUTTON_HELP_EXPLANATION),
@@ -629,11 +1603,46 @@ handlers = {
     "on_remove_button_help_win_clicked": lambda *args: description_label_help_win.set_text(REMOVE_BUTTON_HELP_EXPLANATION),
     "on_edit_button_help_win_clicked": lambda *args: description_label_help_win.set_text(EDIT_BUTTON_HELP_EXPLANATION),
     "on_search_button_help_win_clicked": lambda *args: description_label_help_win.set_text(SEARCH_BUTTON_HELP_EXPLANATION),
+    "on_duplicates_button_help_win_clicked": lambda *args: description_label_help_win.set_text(DUPLICATES_BUTTON_HELP_EXPLANATION),
     "on_help_button_help_win_clicked": lambda *args: description_label_help_win.set_text(HELP_BUTTON_HELP_EXPLANATION),
     "on_about_button_help_win_clicked": lambda *args: description_label_help_win.set_text(ABOUT_BUTTON_HELP_EXPLANATION),
 }
-builder.connect_signals(handlers)
 
-# Show main window
-main_win.show_all()
-Gtk.main()
+
+def main():
+    """
+    Build the main window and run the GTK main loop.
+    """
+    global ui, main_win, entry_list, entry_treeview, live_search
+
+    # Handlers are timed and main loop stalls recorded when asked for, see instrumentation.PROFILE_ENVIRONMENT_VARIABLE
+    connected_handlers, ui_instrumentation = instrumentation.start_from_environment(handlers)
+
+    # Read the Glade file once, every window is built from it on first use
+    ui = UiFactory(GLADE_FILEPATH, connected_handlers)
+    builder = ui.get_builder("main_win", hide_on_delete=False)
+
+    # Main window
+    main_win = builder.get_object("main_win")
+    main_win.connect("destroy", Gtk.main_quit)
+
+    # Entry table
+    entry_list = builder.get_object("entry_list")
+    entry_treeview = builder.get_object("entry_treeview")
+
+    # The directory and its indexes follow the entry list through its signals
+    live_search = LiveSearch(directory.search_index, lambda row_ids: show_search_results(row_ids, entry_list, entry_treeview))
+    directory.store_index.add_index(live_search)
+    directory.store_index.attach(entry_list)
+
+    # Show main window
+    main_win.show_all()
+    if ui_instrumentation is not None:
+        ui_instrumentation.start()
+    Gtk.main()
+    if ui_instrumentation is not None:
+        instrumentation.write_reports(ui_instrumentation)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,17 +18,34 @@
 
 import re
 
+import csv_func
+from store_index import NameIndex
+
 SEARCH_BY_NAME = 0
 SEARCH_BY_PHONE = 1
 SEARCH_BY_EMAIL = 2
 SEARCH_BY_FAVORITE = 3
 
+# Match modes for phone searches, in the order of the search window combo box
+PHONE_MATCH_CONTAINS = 0
+PHONE_MATCH_PREFIX = 1
+PHONE_MATCH_SUFFIX = 2
+
+# Reason given for a row of a directory file that does not have the fields of an entry
+NOT_AN_ENTRY_MESSAGE = "Not an entry (name;phone;e-mail;favorite)!"
+
+# Reason given for an entry whose name is already taken
+DUPLICATE_NAME_MESSAGE = "Entry with this name already exists!"
+
+# Compiled once, whole files are checked against it
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
 def is_entry_info_valid(entry_list:list, original_name:str, name:str, phone:str, email:str, is_add:bool)->dict:
     """
     Check if the given entry information is valid.
 
     Args:
-        entry_list (list): The list of existing entries.
+        entry_list (list): The list of existing entries, or a NameIndex kept in sync with it.
         name (str): The name of the entry to check.
         phone (str): The phone number of the entry to check.
         email (str): The email address of the entry to check.
@@ -48,7 +65,7 @@ def is_entry_info_valid(entry_list:list, original_name:str, name:str, phone:str,
     # Check if name already exists in the list and if it is being added or if it is being edited and the name has changed
     elif (is_add and entry_already_exists(name, entry_list)) or (not is_add and (name != original_name and entry_already_exists(name, entry_list))):
         return {"is_valid": False,
-                "message_info": ("Entry with this name already exists!")}
+                "message_info": DUPLICATE_NAME_MESSAGE}
 
     # Check if at least one of phone or email is provided
     elif not(phone or email):
@@ -71,6 +88,27 @@ def is_entry_info_valid(entry_list:list, original_name:str, name:str, phone:str,
                 "message_info": ("")}
 
 
+def get_row_error(row:list, names:set)->str:
+    """
+    Check a row read from a directory file with the rules of the add entry window,
+    its name being compared to the names of the rows checked before it.
+
+    Args:
+        row (list): The parsed row, not blank.
+        names (set): The names of the rows checked so far, the name of this row is added to it.
+
+    Returns:
+        str: The reason why the row is invalid, empty if it is valid.
+    """
+    if not csv_func.is_entry_row_valid(row):
+        return NOT_AN_ENTRY_MESSAGE
+
+    name, phone, email = row[0], row[1], row[2]
+    entry_info_validity = is_entry_info_valid(names, None, name, phone, email, True)
+    names.add(name)
+    return entry_info_validity["message_info"]
+
+
 def is_valid_email(email:str)->bool:
     """
     Check if the given email address is valid.
@@ -81,8 +119,7 @@ def is_valid_email(email:str)->bool:
     Returns:
         bool: True if the email address is valid, False otherwise.
     """
-    pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    return re.match(pattern, email) is not None # Renvoie True ou False pour une adresse valide/non-valide
+    return EMAIL_PATTERN.match(email) is not None # Renvoie True ou False pour une adresse valide/non-valide
 
 def entry_already_exists(name, list_store)->bool:
     """
@@ -90,16 +127,20 @@ def entry_already_exists(name, list_store)->bool:
 
     Parameters:
         name (str): The name of the entry to check.
-        list_store (Gtk.ListStore): The list store containing the entries.
+        list_store (Gtk.ListStore, NameIndex or set): The list store containing the entries, its name index or a set of names.
 
     Returns:
         bool: True if an entry with the given name exists in the list store, False otherwise.
     """
+    # Constant time lookup when a name index or a set of names is given
+    if isinstance(list_store, (NameIndex, set)):
+        return name in list_store
+
     name_list = [entry[:][0] for entry in list_store]
     return name in name_list
 
 
-def search(search_criteria: str, search_by: int, entry_list, search_results) -> None:
+def search(search_criteria: str, search_by: int, entry_list, search_results, search_index=None) -> None:
     """
     Search for entries in the given list store that match the search criteria.
 
@@ -108,6 +149,7 @@ def search(search_criteria: str, search_by: int, entry_list, search_results) ->
         search_by (int): The index of the list to search by.
         entry_list (List[List[str]]): The list of entries to search in.
         search_results (Gtk.ListStore): The list store to store the search results.
+        search_index (search_index.SearchIndex, optional): Index kept in sync with entry_list, used instead of a linear scan.
 
     Returns:
         None
@@ -115,6 +157,12 @@ def search(search_criteria: str, search_by: int, entry_list, search_results) ->
     # Clear the search results list store
     search_results.clear()
 
+    # Let the index find the matching entries if there is one
+    if search_index is not None:
+        for entry in search_index.search_rows(search_criteria, search_by):
+            search_results.append(entry[:])
+        return
+
     # Iterate through each entry in the list store
     for entry in entry_list:
         entry_content = entry[:]
@@ -0,0 +1,131 @@
+#    Pyrectory (paged_csv.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import csv
+import io
+import mmap
+import os
+from collections import OrderedDict
+
+from row_index import RowIndex
+
+# Number of rows in a page
+PAGE_ROW_COUNT = 512
+
+# Number of parsed pages kept in memory
+PAGE_CACHE_SIZE = 64
+
+
+def parse_page(page:bytes, delimiter:str=';')->list:
+    """
+    Returns:
+        list: The rows of a page holding whole rows, blank lines being empty rows.
+    """
+    text = page.decode("utf-8", errors="replace")
+    return list(csv.reader(io.StringIO(text), delimiter=delimiter, dialect='excel', lineterminator='\n'))
+
+
+class PagedCsvFile:
+    """
+    Read access to the rows of a directory file by row number, without loading it whole.
+
+    The file is memory-mapped and its rows are found through its row index (see row_index.RowIndex),
+    read from the row index file next to it, or built then written there on first open.
+    Rows are grouped in pages of page_row_count rows. A page is parsed when one of its rows
+    is first needed, and kept in a least recently used cache of page_cache_size pages.
+    """
+
+    def __init__(self, filepath:str, page_cache_size:int=PAGE_CACHE_SIZE, page_row_count:int=PAGE_ROW_COUNT, delimiter:str=';'):
+        """
+        Args:
+            filepath (str): Path of the directory file.
+            page_cache_size (int): Number of parsed pages kept in memory.
+            page_row_count (int): Number of rows in a page.
+            delimiter (str): Field delimiter.
+        """
+        self.filepath = filepath
+        self.page_cache_size = page_cache_size
+        self.page_row_count = page_row_count
+        self.delimiter = delimiter
+        self._pages = OrderedDict()  # Page number -> parsed rows, least recently used first
+        self._data = b""
+        self.row_index = None
+
+        self._file = open(filepath, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(filepath) else b""
+            self.row_index = RowIndex.open(filepath, self._data)
+        except BaseException:
+            self.close()
+            raise
+        if self.row_index.is_rebuilt and isinstance(self._data, mmap.mmap) and hasattr(mmap, "MADV_DONTNEED"):
+            # The whole file was read to build the index, only keep mapped what gets read again
+            self._data.madvise(mmap.MADV_DONTNEED)
+
+    def __len__(self)->int:
+        return len(self.row_index)
+
+    def close(self)->None:
+        self._pages.clear()
+        if self.row_index is not None:
+            self.row_index.close()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def page_count(self)->int:
+        return -(-len(self) // self.page_row_count)
+
+    def get_row(self, row_number:int)->list:
+        """
+        Args:
+            row_number (int): Position of the row in the file, blank lines included.
+
+        Returns:
+            list: The fields of the row, as read from the file.
+        """
+        if not 0 <= row_number < len(self):
+            raise IndexError(f"Row {row_number} out of range")
+        page_number, row_position = divmod(row_number, self.page_row_count)
+        return self.get_page(page_number)[row_position]
+
+    def get_page(self, page_number:int)->list:
+        """
+        Returns:
+            list: The rows of a page, parsed on first use then taken from the cache.
+        """
+        rows = self._pages.get(page_number)
+        if rows is not None:
+            self._pages.move_to_end(page_number)
+            return rows
+
+        offsets = self.row_index.offsets
+        first_row_number = page_number * self.page_row_count
+        end_row_number = min(first_row_number + self.page_row_count, len(self))
+        rows = parse_page(self._data[offsets[first_row_number]:offsets[end_row_number]], self.delimiter)
+        if len(rows) != end_row_number - first_row_number:
+            # Unbalanced quotes, parse the rows one by one as the index cut them
+            rows = [(parse_page(self._data[offsets[row_number]:offsets[row_number + 1]], self.delimiter) or [[]])[0]
+                    for row_number in range(first_row_number, end_row_number)]
+        self._pages[page_number] = rows
+        if len(self._pages) > self.page_cache_size:
+            self._pages.popitem(last=False)
+        return rows
+
+    def cached_page_count(self)->int:
+        return len(self._pages)
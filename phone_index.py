@@ -0,0 +1,120 @@
+#    Pyrectory (phone_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import misc
+from search_index import SortedKeyIndex
+
+
+def normalize_phone(phone:str)->str:
+    """
+    Returns:
+        str: The digits of the phone number, anything else removed.
+    """
+    if phone.isdigit():
+        return phone
+    return "".join(character for character in phone if character.isdigit())
+
+
+class PhoneIndex:
+    """
+    Phone numbers reduced to their digits, sorted both as written and reversed, so
+    "starts with" and "ends with" queries are a binary search each.
+    Register it with a StoreIndex to keep it in sync.
+    """
+
+    def __init__(self, store_index=None):
+        """
+        Args:
+            store_index (store_index.StoreIndex, optional): The store index this index is registered with, used to
+                                                            return the rows in entry list order, row id order without it.
+        """
+        self.store_index = store_index
+        self._prefixes = SortedKeyIndex()
+        self._suffixes = SortedKeyIndex()  # Keyed by the reversed digits
+
+    def add(self, row_id:int, row:list)->None:
+        digits = normalize_phone(row.phone)
+        if digits:
+            self._prefixes.add(digits, row_id)
+            self._suffixes.add(digits[::-1], row_id)
+
+    def remove(self, row_id:int, row:list)->None:
+        digits = normalize_phone(row.phone)
+        if digits:
+            self._prefixes.remove(digits, row_id)
+            self._suffixes.remove(digits[::-1], row_id)
+
+    def search(self, digits:str, phone_match:int)->list:
+        """
+        Args:
+            digits (str): The digits to search for, anything else is ignored.
+            phone_match (int): PHONE_MATCH_PREFIX or PHONE_MATCH_SUFFIX, from misc.
+
+        Returns:
+            list: The row ids of the matching rows, in entry list order.
+        """
+        if phone_match == misc.PHONE_MATCH_PREFIX:
+            return self.search_prefix(digits)
+        elif phone_match == misc.PHONE_MATCH_SUFFIX:
+            return self.search_suffix(digits)
+        raise ValueError(f"Unsupported phone match mode: {phone_match}")
+
+    def count(self, digits:str, phone_match:int)->int:
+        """
+        Returns:
+            int: The number of rows search() would return, counting removed rows not purged yet.
+        """
+        if phone_match == misc.PHONE_MATCH_PREFIX:
+            return self._prefixes.count_prefix(normalize_phone(digits))
+        elif phone_match == misc.PHONE_MATCH_SUFFIX:
+            return self._suffixes.count_prefix(normalize_phone(digits)[::-1])
+        raise ValueError(f"Unsupported phone match mode: {phone_match}")
+
+    def search_prefix(self, digits:str)->list:
+        """
+        Returns:
+            list: The row ids of the rows whose phone starts with the digits, in entry list order.
+        """
+        return self._sort_row_ids(row_id for key, row_id in self._prefixes.prefix(normalize_phone(digits)))
+
+    def search_suffix(self, digits:str)->list:
+        """
+        Returns:
+            list: The row ids of the rows whose phone ends with the digits, in entry list order.
+        """
+        return self._sort_row_ids(row_id for key, row_id in self._suffixes.prefix(normalize_phone(digits)[::-1]))
+
+    def _sort_row_ids(self, row_ids)->list:
+        if self.store_index is None:
+            return sorted(row_ids)
+        return self.store_index.sort_row_ids(row_ids)
+
+    def check_consistency(self, rows:list)->list:
+        """
+        Args:
+            rows (list): Every row of the entry list.
+
+        Returns:
+            list: A description of every mismatch found, empty if the index is consistent.
+        """
+        expected = sorted(normalize_phone(row.phone) for row in rows)
+        indexed = sorted(key for key, row_id in self._prefixes.prefix(""))
+        expected = [digits for digits in expected if digits]
+        if expected != indexed:
+            return [f"Phone index mismatch: {len(expected)} phones in store, {len(indexed)} indexed"]
+        return []
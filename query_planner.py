@@ -0,0 +1,335 @@
+#    Pyrectory (query_planner.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import time
+from itertools import compress
+
+import misc
+from entry import FAVORITE_MARK, FIELD_GETTERS
+from phone_index import normalize_phone
+from search_index import BITMAP_FAVORITE, BITMAP_NOT_FAVORITE, TEXT_FIELDS
+
+# How the criteria of a compound query are combined
+MATCH_ALL = 0  # AND
+MATCH_ANY = 1  # OR
+
+# Ways a criterion is evaluated, from the cheapest
+ACCESS_FAVORITE_BITMAP = "favorite bitmap"
+ACCESS_PHONE_INDEX = "phone index"
+ACCESS_POSTINGS = "n-gram postings"
+ACCESS_SCAN = "full scan"
+
+# Field names used in plan explanations, in the order of the misc.SEARCH_BY_* constants
+FIELD_LABELS = ("name", "phone", "e-mail", "favorite")
+
+
+class FieldStatistics:
+    """
+    Per field statistics of an entry list, used to estimate how many rows a criterion
+    matches before running it: the number of non-empty values of each text field (an
+    empty field never contains a non-empty criterion), and the number of favorites,
+    found through the favorite bitmap of the search index. Register it with a StoreIndex
+    to keep it in sync.
+    """
+
+    def __init__(self):
+        self.row_count = 0
+        self.filled_counts = [0] * len(TEXT_FIELDS)  # Non-empty values, by field
+        self.favorite_count = 0
+
+    def add(self, row_id:int, row)->None:
+        self.row_count += 1
+        for field in TEXT_FIELDS:
+            if FIELD_GETTERS[field](row):
+                self.filled_counts[field] += 1
+        self.favorite_count += row.favorite
+
+    def remove(self, row_id:int, row)->None:
+        self.row_count -= 1
+        for field in TEXT_FIELDS:
+            if FIELD_GETTERS[field](row):
+                self.filled_counts[field] -= 1
+        self.favorite_count -= row.favorite
+
+    def check_consistency(self, rows:list)->list:
+        """
+        Args:
+            rows (list): Every row of the entry list.
+
+        Returns:
+            list: A description of every mismatch found, empty if the statistics are consistent.
+        """
+        problems = []
+        if self.row_count != len(rows):
+            problems.append(f"Statistics row count mismatch: {len(rows)} in store, {self.row_count} counted")
+        for field in TEXT_FIELDS:
+            expected_count = sum(1 for row in rows if FIELD_GETTERS[field](row))
+            if self.filled_counts[field] != expected_count:
+                problems.append(f"Filled {FIELD_LABELS[field]} count mismatch: {expected_count} in store, "
+                                f"{self.filled_counts[field]} counted")
+        expected_count = sum(1 for row in rows if row.favorite)
+        if self.favorite_count != expected_count:
+            problems.append(f"Favorite count mismatch: {expected_count} in store, {self.favorite_count} counted")
+        return problems
+
+
+class Criterion:
+    """
+    One criterion of a compound query, with the rules of a single field search:
+    text fields contain the criteria, phones may start or end with its digits instead,
+    and the favorite field matches exactly. Like in the phone index, a phone without
+    digits never starts or ends with anything, not even a criterion without digits.
+    """
+
+    def __init__(self, search_by:int, search_criteria:str, phone_match:int=misc.PHONE_MATCH_CONTAINS):
+        """
+        Args:
+            search_by (int): The field, one of the misc.SEARCH_BY_* constants.
+            search_criteria (str): The text to search for, FAVORITE_MARK or "" for the favorite field.
+            phone_match (int): How phone numbers are matched, one of the misc.PHONE_MATCH_* constants.
+        """
+        self.search_by = search_by
+        self.phone_match = phone_match if search_by == misc.SEARCH_BY_PHONE else misc.PHONE_MATCH_CONTAINS
+        if self.phone_match != misc.PHONE_MATCH_CONTAINS:
+            search_criteria = normalize_phone(search_criteria)
+        self.search_criteria = search_criteria
+
+    def matches(self, row)->bool:
+        """
+        Returns:
+            bool: True if the Entry matches the criterion.
+        """
+        if self.search_by == misc.SEARCH_BY_FAVORITE:
+            return row.favorite == (self.search_criteria == FAVORITE_MARK)
+        elif self.phone_match == misc.PHONE_MATCH_PREFIX:
+            digits = normalize_phone(row.phone)
+            return bool(digits) and digits.startswith(self.search_criteria)
+        elif self.phone_match == misc.PHONE_MATCH_SUFFIX:
+            digits = normalize_phone(row.phone)
+            return bool(digits) and digits.endswith(self.search_criteria)
+        return self.search_criteria in FIELD_GETTERS[self.search_by](row)
+
+    def __str__(self)->str:
+        if self.search_by == misc.SEARCH_BY_FAVORITE:
+            return "favorite" if self.search_criteria == FAVORITE_MARK else "not favorite"
+        operator = {misc.PHONE_MATCH_CONTAINS: "contains", misc.PHONE_MATCH_PREFIX: "starts with",
+                    misc.PHONE_MATCH_SUFFIX: "ends with"}[self.phone_match]
+        return f"{FIELD_LABELS[self.search_by]} {operator} {self.search_criteria!r}"
+
+
+class PlanStep:
+    """
+    One step of a query plan, as run.
+    """
+
+    def __init__(self, action:str, criteria:list, access:str, estimate:int, row_count:int, seconds:float):
+        """
+        Args:
+            action (str): What the step did: "lookup", "intersect", "filter", "skip", "union" or "scan".
+            criteria (list): The Criterion objects it evaluated.
+            access (str): How they were evaluated, one of the ACCESS_* constants.
+            estimate (int): The number of rows the planner expected the criteria to match.
+            row_count (int): The number of rows matching once the step was over.
+            seconds (float): The time the step took.
+        """
+        self.action = action
+        self.criteria = criteria
+        self.access = access
+        self.estimate = estimate
+        self.row_count = row_count
+        self.seconds = seconds
+
+    def __str__(self)->str:
+        criteria = " and ".join(str(criterion) for criterion in self.criteria) or "every row"
+        return (f"{self.action} {criteria} by {self.access}: estimated {self.estimate}, "
+                f"{self.row_count} rows, {self.seconds * 1000:.2f} ms")
+
+
+class QueryPlan:
+    """
+    Result of a compound query: the matching row ids, and the steps that found them.
+    """
+
+    def __init__(self, match:int):
+        self.match = match
+        self.row_ids = []
+        self.steps = []
+        self.planning_seconds = 0.0  # Time spent estimating the criteria
+        self.seconds = 0.0
+
+    def explain(self)->str:
+        """
+        Returns:
+            str: The planning time, one line per step, then the total.
+        """
+        lines = [f"0. plan {len(self.steps)} steps: {self.planning_seconds * 1000:.2f} ms"]
+        lines.extend(f"{number}. {step}" for number, step in enumerate(self.steps, 1))
+        lines.append(f"{len(self.row_ids)} results in {self.seconds * 1000:.2f} ms "
+                     f"({'all' if self.match == MATCH_ALL else 'any'} criteria)")
+        return "\n".join(lines)
+
+
+class QueryPlanner:
+    """
+    Run compound queries, criteria on several fields combined with AND or OR, through
+    the indexes of a directory.
+
+    Each criterion gets an estimate of the rows it matches and a cost: the favorite
+    bitmap and the phone index count their matches exactly, the n-gram postings give
+    the size of the rarest posting of the criteria, and criteria too short for the
+    postings have to scan every row. For AND, the cheapest criterion is looked up
+    first; every other one, most selective first, is then either looked up and
+    intersected with the candidates, or checked on each candidate, whichever touches
+    fewer rows. For OR, the lookups are merged. When a criterion needs a scan, every
+    criterion is checked in that one scan instead.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (directory.Directory): The directory whose indexes answer the queries.
+        """
+        self.store_index = directory.store_index
+        self.search_index = directory.search_index
+        self.phone_index = directory.phone_index
+        self.statistics = directory.field_statistics
+
+    def estimate(self, criterion:Criterion)->tuple:
+        """
+        Returns:
+            tuple: (access, estimate, cost), how the criterion is best evaluated, the number of rows
+                   it is expected to match, and the number of rows looking it up touches.
+        """
+        statistics = self.statistics
+        if criterion.search_by == misc.SEARCH_BY_FAVORITE:
+            favorite_count = statistics.favorite_count
+            if criterion.search_criteria != FAVORITE_MARK:
+                favorite_count = statistics.row_count - favorite_count
+            return ACCESS_FAVORITE_BITMAP, favorite_count, favorite_count
+        elif criterion.phone_match != misc.PHONE_MATCH_CONTAINS:
+            count = self.phone_index.count(criterion.search_criteria, criterion.phone_match)
+            return ACCESS_PHONE_INDEX, count, count
+        elif not criterion.search_criteria:
+            # Every row contains the empty text
+            return ACCESS_SCAN, statistics.row_count, statistics.row_count
+
+        filled_count = statistics.filled_counts[criterion.search_by]
+        posting_size = self.search_index.estimate_candidate_count(criterion.search_criteria, criterion.search_by)
+        if posting_size is None:
+            return ACCESS_SCAN, filled_count, statistics.row_count
+        return ACCESS_POSTINGS, min(posting_size, filled_count), posting_size
+
+    def lookup(self, criterion:Criterion, access:str)->set:
+        """
+        Returns:
+            set: The row ids of the rows matching the criterion, found through the given access.
+        """
+        if access == ACCESS_FAVORITE_BITMAP:
+            return set(self.search_index.get_favorite_row_ids(criterion.search_criteria == FAVORITE_MARK))
+        elif access == ACCESS_PHONE_INDEX:
+            return set(self.phone_index.search(criterion.search_criteria, criterion.phone_match))
+        elif access == ACCESS_POSTINGS:
+            is_match = self.search_index.is_match
+            return {row_id for row_id in self.search_index.get_candidates(criterion.search_criteria, criterion.search_by)
+                    if is_match(row_id, criterion.search_criteria, criterion.search_by)}
+        matches = criterion.matches
+        return set(compress(self.store_index.row_ids(), map(matches, self.store_index.rows())))
+
+    def run(self, criteria:list, match:int=MATCH_ALL)->QueryPlan:
+        """
+        Args:
+            criteria (list): Criterion objects.
+            match (int): MATCH_ALL to find the rows matching every criterion, MATCH_ANY for any of them.
+
+        Returns:
+            QueryPlan: The row ids of the matching rows in entry list order, with the steps that found them.
+        """
+        plan = QueryPlan(match)
+        start = time.perf_counter()
+        # (access, estimate, cost, criterion), most selective first
+        estimates = sorted((self.estimate(criterion) + (criterion,) for criterion in criteria),
+                           key=lambda estimate: estimate[1])
+        plan.planning_seconds = time.perf_counter() - start
+
+        if not estimates:
+            step_start = time.perf_counter()
+            row_ids = set(self.store_index.row_ids())
+            plan.steps.append(PlanStep("lookup", [], ACCESS_SCAN, len(row_ids), len(row_ids), time.perf_counter() - step_start))
+        elif any(access == ACCESS_SCAN for access, estimate, cost, criterion in estimates) \
+                and (match == MATCH_ANY or min(cost for access, estimate, cost, criterion in estimates) >= self.statistics.row_count):
+            row_ids = self._scan(plan, estimates, match)
+        elif match == MATCH_ALL:
+            row_ids = self._intersect(plan, estimates)
+        else:
+            row_ids = self._union(plan, estimates)
+
+        plan.row_ids = self.store_index.sort_row_ids(row_ids)
+        plan.seconds = time.perf_counter() - start
+        return plan
+
+    def _scan(self, plan:QueryPlan, estimates:list, match:int)->set:
+        # One pass over every row, checking the most selective criteria first, so AND fails and OR succeeds early
+        step_start = time.perf_counter()
+        if match == MATCH_ALL:
+            criteria = [criterion for access, estimate, cost, criterion in estimates]
+            is_match = lambda row: all(criterion.matches(row) for criterion in criteria)
+        else:
+            criteria = [criterion for access, estimate, cost, criterion in reversed(estimates)]
+            is_match = lambda row: any(criterion.matches(row) for criterion in criteria)
+        row_ids = set(compress(self.store_index.row_ids(), map(is_match, self.store_index.rows())))
+        estimate = min(estimate for access, estimate, cost, criterion in estimates) if match == MATCH_ALL \
+            else min(sum(estimate for access, estimate, cost, criterion in estimates), self.statistics.row_count)
+        plan.steps.append(PlanStep("scan", criteria, ACCESS_SCAN, estimate, len(row_ids), time.perf_counter() - step_start))
+        return row_ids
+
+    def _intersect(self, plan:QueryPlan, estimates:list)->set:
+        # The cheapest lookup gives the first candidates
+        estimates = sorted(estimates, key=lambda estimate: estimate[2])
+        access, estimate, cost, criterion = estimates[0]
+        step_start = time.perf_counter()
+        row_ids = self.lookup(criterion, access)
+        plan.steps.append(PlanStep("lookup", [criterion], access, estimate, len(row_ids), time.perf_counter() - step_start))
+
+        get_row = self.store_index.row
+        favorite_bitmap = self.search_index.favorite_bitmap
+        for access, estimate, cost, criterion in sorted(estimates[1:], key=lambda estimate: estimate[1]):
+            step_start = time.perf_counter()
+            if not row_ids:
+                action = "skip"
+            elif access == ACCESS_FAVORITE_BITMAP:
+                # One byte read per candidate
+                wanted = BITMAP_FAVORITE if criterion.search_criteria == FAVORITE_MARK else BITMAP_NOT_FAVORITE
+                row_ids = {row_id for row_id in row_ids if favorite_bitmap[row_id] == wanted}
+                action = "filter"
+            elif access != ACCESS_SCAN and cost < len(row_ids):
+                row_ids &= self.lookup(criterion, access)
+                action = "intersect"
+            else:
+                matches = criterion.matches
+                row_ids = {row_id for row_id in row_ids if matches(get_row(row_id))}
+                action, access = "filter", "candidate check"
+            plan.steps.append(PlanStep(action, [criterion], access, estimate, len(row_ids), time.perf_counter() - step_start))
+        return row_ids
+
+    def _union(self, plan:QueryPlan, estimates:list)->set:
+        row_ids = set()
+        for access, estimate, cost, criterion in estimates:
+            step_start = time.perf_counter()
+            row_ids |= self.lookup(criterion, access)
+            plan.steps.append(PlanStep("union", [criterion], access, estimate, len(row_ids), time.perf_counter() - step_start))
+        return row_ids
@@ -0,0 +1,242 @@
+#    Pyrectory (row_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from itertools import accumulate, repeat
+from operator import add
+
+# Extension of the row index file kept next to a directory file
+ROW_INDEX_EXTENSION = ".rowidx"
+
+# Row index file header: magic, directory file size, modification time in nanoseconds,
+# row count, content hash, offset array typecode, then padding to 8 bytes
+ROW_INDEX_MAGIC = b"PYRROWS1"
+ROW_INDEX_HEADER = struct.Struct("<8sQqQ16s1s7x")
+
+# Size of the blocks hashed at the start, middle and end of the directory file
+HASH_SAMPLE_SIZE = 64 * 1024
+
+# Size of the blocks the directory file is split into lines by
+SCAN_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def get_row_index_filepath(filepath:str)->str:
+    return filepath + ROW_INDEX_EXTENSION
+
+
+def get_content_hash(data)->bytes:
+    """
+    Hash the start, middle and end of a directory file, enough to tell a rewritten file
+    from the indexed one when its size and modification time were kept, without reading it whole.
+
+    Args:
+        data (bytes-like): Content of the directory file, usually memory-mapped.
+
+    Returns:
+        bytes: A 16 byte digest.
+    """
+    content_hash = hashlib.blake2b(digest_size=16)
+    middle = max(len(data) // 2 - HASH_SAMPLE_SIZE // 2, 0)
+    for start in 0, middle, max(len(data) - HASH_SAMPLE_SIZE, 0):
+        content_hash.update(data[start:start + HASH_SAMPLE_SIZE])
+    return content_hash.digest()
+
+
+def iter_blocks(data, block_size:int):
+    """
+    Cut the content of a directory file into blocks holding whole rows. Like
+    batch_validator.split_file(), a block ends after a newline with an even number of quotes before it.
+
+    Yields:
+        tuple: (start, block) for each block, start being its byte offset.
+    """
+    file_size = len(data)
+    start = 0
+    while start < file_size:
+        end = data.find(b"\n", min(start + block_size, file_size) - 1)
+        end = file_size if end == -1 else end + 1
+        block = data[start:end]
+        quote_count = block.count(b'"') if b'"' in block else 0
+        while quote_count % 2 and end < file_size:
+            next_end = data.find(b"\n", end)
+            next_end = file_size if next_end == -1 else next_end + 1
+            extra = data[end:next_end]
+            quote_count += extra.count(b'"')
+            block += extra
+            end = next_end
+        yield start, block
+        start = end
+
+
+def build_row_offsets(data)->array:
+    """
+    Find where each row of a directory file starts. Blank lines are rows, a newline
+    inside a quoted field does not start one.
+
+    Args:
+        data (bytes-like): Content of the directory file, usually memory-mapped.
+
+    Returns:
+        array: The byte offset of every row, then the file size.
+    """
+    offsets = array('I' if len(data) < 2**32 else 'Q')
+    for start, block in iter_blocks(data, SCAN_BLOCK_SIZE):
+        lines = block.split(b"\n")
+        if block.endswith(b"\n"):
+            # Nothing follows the last newline
+            lines.pop()
+        if b'"' not in block:
+            # Every line is a row, each starting one newline after the end of the previous one,
+            # the start of the next block comes last and is taken back
+            offsets.extend(accumulate(map(add, map(len, lines), repeat(1)), initial=start))
+            offsets.pop()
+            continue
+
+        position = start
+        quote_count = 0
+        for line in lines:
+            if quote_count % 2 == 0:
+                offsets.append(position)
+            quote_count += line.count(b'"')
+            position += len(line) + 1
+    offsets.append(len(data))
+    return offsets
+
+
+def write_row_index(filepath:str, offsets=None)->None:
+    """
+    Write the row index file of a directory file, atomically.
+
+    Args:
+        filepath (str): Path of the directory file.
+        offsets (array, optional): Its row offsets, as returned by build_row_offsets(). Found again if None.
+    """
+    with open(filepath, "rb") as csv_file:
+        stat = os.fstat(csv_file.fileno())
+        data = mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        try:
+            if offsets is None:
+                offsets = build_row_offsets(data)
+            content_hash = get_content_hash(data)
+        finally:
+            if stat.st_size:
+                data.close()
+
+    index_filepath = get_row_index_filepath(filepath)
+    temp_filepath = index_filepath + ".tmp"
+    with open(temp_filepath, "wb") as index_file:
+        index_file.write(ROW_INDEX_HEADER.pack(ROW_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, len(offsets) - 1,
+                                               content_hash, offsets.typecode.encode()))
+        offsets.tofile(index_file)
+    os.replace(temp_filepath, index_filepath)
+
+
+class RowIndex:
+    """
+    Byte offset of every row of a directory file, read from its row index file.
+
+    The row index file is memory-mapped, so offsets are only read from disk as they are
+    used. It is checked against the size, modification time and content hash of the
+    directory file it was written for; open() rebuilds a missing, stale or corrupt one by
+    scanning the directory file, then writes it again when possible.
+    """
+
+    def __init__(self, offsets, index_file=None, index_data=None, is_rebuilt:bool=False):
+        """
+        Args:
+            offsets (sequence): The byte offset of every row, then the file size.
+            index_file (file, optional): The row index file the offsets are mapped from, closed with the index.
+            index_data (mmap.mmap, optional): Its mapping, closed with the index.
+            is_rebuilt (bool): The offsets were found by scanning the directory file.
+        """
+        self.offsets = offsets
+        self.is_rebuilt = is_rebuilt
+        self._index_file = index_file
+        self._index_data = index_data
+
+    def __len__(self)->int:
+        return len(self.offsets) - 1
+
+    def close(self)->None:
+        if isinstance(self.offsets, memoryview):
+            self.offsets.release()
+        if self._index_data is not None:
+            self._index_data.close()
+            self._index_file.close()
+        self._index_data = self._index_file = None
+
+    @classmethod
+    def load(cls, filepath:str, data):
+        """
+        Args:
+            filepath (str): Path of the directory file.
+            data (bytes-like): Its content, usually memory-mapped.
+
+        Returns:
+            RowIndex: The row index read from the row index file, None if it is missing, stale or corrupt.
+        """
+        try:
+            index_file = open(get_row_index_filepath(filepath), "rb")
+        except OSError:
+            return None
+        try:
+            stat = os.stat(filepath)
+            index_data = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty row index file, or directory file gone
+            index_file.close()
+            return None
+
+        if len(index_data) >= ROW_INDEX_HEADER.size:
+            magic, file_size, mtime_ns, row_count, content_hash, typecode = ROW_INDEX_HEADER.unpack_from(index_data)
+            if magic == ROW_INDEX_MAGIC and file_size == stat.st_size == len(data) and mtime_ns == stat.st_mtime_ns \
+                    and typecode in (b"I", b"Q") and content_hash == get_content_hash(data) \
+                    and (len(index_data) - ROW_INDEX_HEADER.size) % array(typecode.decode()).itemsize == 0:
+                offsets = memoryview(index_data)[ROW_INDEX_HEADER.size:].cast(typecode.decode())
+                if len(offsets) == row_count + 1:
+                    return cls(offsets, index_file, index_data)
+                offsets.release()
+        index_data.close()
+        index_file.close()
+        return None
+
+    @classmethod
+    def open(cls, filepath:str, data):
+        """
+        Args:
+            filepath (str): Path of the directory file.
+            data (bytes-like): Its content, usually memory-mapped.
+
+        Returns:
+            RowIndex: The row index read from the row index file, or rebuilt if it is unusable.
+        """
+        row_index = cls.load(filepath, data)
+        if row_index is not None:
+            return row_index
+
+        offsets = build_row_offsets(data)
+        try:
+            write_row_index(filepath, offsets)
+        except OSError:
+            # Read-only directory, the index is rebuilt on every open
+            pass
+        return cls(offsets, is_rebuilt=True)
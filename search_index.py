@@ -0,0 +1,330 @@
+#    Pyrectory (search_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+from array import array
+from bisect import bisect_left
+from itertools import compress
+
+import misc
+from entry import FAVORITE_MARK, FIELD_GETTERS
+
+# Fields indexed for substring and prefix queries
+TEXT_FIELDS = (misc.SEARCH_BY_NAME, misc.SEARCH_BY_PHONE, misc.SEARCH_BY_EMAIL)
+
+# Length of the n-grams in the postings, shorter queries scan every row
+GRAM_LENGTH = 3
+
+# Rebuild the postings once they hold more stale row ids than live ones
+STALE_POSTINGS_RATIO = 1.0
+
+# Additions and removals a SortedKeyIndex buffers before merging them even if it is not queried, at least
+SORTED_KEY_BUFFER_MIN_SIZE = 4096
+
+# Values of the favorite bitmap, by row id
+BITMAP_NO_ROW = 0
+BITMAP_NOT_FAVORITE = 1
+BITMAP_FAVORITE = 2
+
+
+def get_grams(value:str)->set:
+    """
+    Returns:
+        set: The distinct n-grams of GRAM_LENGTH characters in the value.
+    """
+    return {value[i:i + GRAM_LENGTH] for i in range(len(value) - GRAM_LENGTH + 1)}
+
+
+class SortedKeyIndex:
+    """
+    Keys kept in sorted order with the row ids they belong to, answering prefix
+    queries with a binary search.
+
+    Additions are buffered and merged on the next query, removals are remembered
+    and filtered out until they are numerous enough to be worth purging, so loading
+    a whole directory does not shift the sorted list once per row. Buffers outgrowing
+    the sorted list are merged as they are written, so an index that is rarely queried
+    does not hold every change made since.
+    """
+
+    def __init__(self):
+        self._entries = []        # Sorted (key, row_id) tuples, may contain removed ones
+        self._pending = []        # (key, row_id) tuples added since the last merge
+        self._removed = set()     # (key, row_id) tuples removed but still in self._entries
+
+    def __len__(self)->int:
+        return len(self._entries) + len(self._pending) - len(self._removed)
+
+    def add(self, key:str, row_id:int)->None:
+        entry = (key, row_id)
+        if entry in self._removed:
+            self._removed.discard(entry)
+        else:
+            self._pending.append(entry)
+            self._merge_if_full()
+
+    def remove(self, key:str, row_id:int)->None:
+        self._removed.add((key, row_id))
+        self._merge_if_full()
+
+    def prefix(self, prefix:str)->list:
+        """
+        Args:
+            prefix (str): The prefix to look for.
+
+        Returns:
+            list: (key, row_id) tuples whose key starts with the prefix, in key order.
+        """
+        entries = self._get_entries()
+        matches = []
+        for position in range(bisect_left(entries, (prefix,)), len(entries)):
+            entry = entries[position]
+            if not entry[0].startswith(prefix):
+                break
+            matches.append(entry)
+        if self._removed:
+            matches = [entry for entry in matches if entry not in self._removed]
+        return matches
+
+    def count_prefix(self, prefix:str)->int:
+        """
+        Returns:
+            int: The number of keys starting with the prefix, counting removed ones not purged yet.
+        """
+        entries = self._get_entries()
+        return bisect_left(entries, (prefix + "\U0010ffff",)) - bisect_left(entries, (prefix,))
+
+    def _merge_if_full(self)->None:
+        if len(self._pending) + len(self._removed) > max(len(self._entries), SORTED_KEY_BUFFER_MIN_SIZE):
+            self._get_entries()
+
+    def _get_entries(self)->list:
+        if self._pending or len(self._removed) > len(self._entries) // 4:
+            # Merge the pending entries, and purge the removed ones while at it
+            if self._removed:
+                self._entries = [entry for entry in self._entries if entry not in self._removed]
+                self._pending = [entry for entry in self._pending if entry not in self._removed]
+                self._removed = set()
+            self._entries.extend(self._pending)
+            self._entries.sort()
+            self._pending = []
+        return self._entries
+
+
+class SearchIndex:
+    """
+    Indexes answering misc.search() queries without walking the entry list.
+
+    Each text field (name, phone, e-mail) gets n-gram postings for substring queries.
+    The favorite field is matched exactly, through a bitmap of the favorites by row id,
+    which the query planner reads too. Register with a StoreIndex to keep it in sync.
+
+    Postings are arrays of row ids, appended to in id order and never shrunk on removal:
+    every candidate is checked against the current row anyway, and the postings are
+    rebuilt once stale ids outnumber live ones.
+    """
+
+    def __init__(self, store_index):
+        """
+        Args:
+            store_index (store_index.StoreIndex): The store index this index is registered with,
+                                                  used to read rows back.
+        """
+        self.store_index = store_index
+        self._postings = {field: {} for field in TEXT_FIELDS}
+        self.favorite_bitmap = bytearray()  # One BITMAP_* value per row id
+        self._live_posting_count = 0
+        self._stale_posting_count = 0
+
+    def add(self, row_id:int, row:list)->None:
+        for field in TEXT_FIELDS:
+            value = FIELD_GETTERS[field](row)
+            postings = self._postings[field]
+            for gram in get_grams(value):
+                if gram not in postings:
+                    postings[gram] = array('q')
+                postings[gram].append(row_id)
+                self._live_posting_count += 1
+        if row_id >= len(self.favorite_bitmap):
+            self.favorite_bitmap.extend(bytes(row_id + 1 - len(self.favorite_bitmap)))
+        self.favorite_bitmap[row_id] = BITMAP_FAVORITE if row.favorite else BITMAP_NOT_FAVORITE
+
+    def remove(self, row_id:int, row:list)->None:
+        for field in TEXT_FIELDS:
+            value = FIELD_GETTERS[field](row)
+            gram_count = len(get_grams(value))
+            self._live_posting_count -= gram_count
+            self._stale_posting_count += gram_count
+        self.favorite_bitmap[row_id] = BITMAP_NO_ROW
+
+    def search(self, search_criteria:str, search_by:int)->list:
+        """
+        Find the rows matching a query, with the same rules as misc.search().
+
+        Args:
+            search_criteria (str): The criteria to search for.
+            search_by (int): The field to search by, one of the misc.SEARCH_BY_* constants.
+
+        Returns:
+            list: The row ids of the matching rows, in entry list order.
+        """
+        if search_by == misc.SEARCH_BY_FAVORITE:
+            return self.store_index.sort_row_ids(self._get_favorite_candidates(search_criteria))
+        elif not search_criteria:
+            return self.store_index.row_ids()
+        elif len(search_criteria) < GRAM_LENGTH:
+            # Too short for the postings, check every row
+            get_field = FIELD_GETTERS[search_by]
+            return [row_id for row_id, row in self.store_index.items() if search_criteria in get_field(row)]
+
+        # Only the rows containing the rarest n-gram of the query can match
+        candidates = self.get_candidates(search_criteria, search_by)
+        get_row = self.store_index.get_row
+        get_field = FIELD_GETTERS[search_by]
+        matches = []
+        for row_id in candidates:
+            row = get_row(row_id)
+            if row is not None and search_criteria in get_field(row):
+                matches.append(row_id)
+        return self.store_index.sort_row_ids(matches)
+
+    def get_candidates(self, search_criteria:str, search_by:int):
+        """
+        Get the rows that may match a query, for callers checking them with is_match() at their own pace.
+
+        Args:
+            search_criteria (str): The criteria to search for.
+            search_by (int): The field to search by, one of the misc.SEARCH_BY_* constants.
+
+        Returns:
+            Collection: Row ids, possibly unordered, possibly including rows that do not match or were removed.
+        """
+        if search_by == misc.SEARCH_BY_FAVORITE:
+            return self._get_favorite_candidates(search_criteria)
+        elif len(search_criteria) < GRAM_LENGTH:
+            return self.store_index.row_ids()
+
+        if self._stale_posting_count > self._live_posting_count * STALE_POSTINGS_RATIO:
+            self._rebuild_postings()
+        postings = self._postings[search_by]
+        rarest_posting = None
+        for gram in get_grams(search_criteria):
+            posting = postings.get(gram)
+            if posting is None:
+                return []
+            if rarest_posting is None or len(posting) < len(rarest_posting):
+                rarest_posting = posting
+        return set(rarest_posting)
+
+    def estimate_candidate_count(self, search_criteria:str, search_by:int)->int:
+        """
+        Get how many rows get_candidates() would return for a text field, without building them.
+
+        Returns:
+            int: The size of the rarest posting of the query, stale row ids included, None if the query is too
+                 short for the postings.
+        """
+        if len(search_criteria) < GRAM_LENGTH:
+            return None
+        postings = self._postings[search_by]
+        return min(len(postings.get(gram, ())) for gram in get_grams(search_criteria))
+
+    def is_match(self, row_id:int, search_criteria:str, search_by:int)->bool:
+        """
+        Returns:
+            bool: True if the row exists and matches the query, with the rules of misc.search().
+        """
+        row = self.store_index.get_row(row_id)
+        if row is None:
+            return False
+        elif search_by == misc.SEARCH_BY_FAVORITE:
+            return search_criteria == row.favorite_mark
+        return search_criteria in FIELD_GETTERS[search_by](row)
+
+    def get_favorite_row_ids(self, is_favorite:bool)->list:
+        """
+        Returns:
+            list: The row ids of the favorite entries, or of the other ones, in row id order.
+        """
+        wanted = BITMAP_FAVORITE if is_favorite else BITMAP_NOT_FAVORITE
+        # Turn the bitmap into ones for the wanted value and zeros elsewhere, compress() then picks the row ids
+        table = bytes(int(value == wanted) for value in range(256))
+        return list(compress(range(len(self.favorite_bitmap)), self.favorite_bitmap.translate(table)))
+
+    def search_rows(self, search_criteria:str, search_by:int)->list:
+        """
+        Like search(), but returns the rows themselves.
+
+        Returns:
+            list: The Entry of each matching row, in entry list order.
+        """
+        if search_by != misc.SEARCH_BY_FAVORITE and len(search_criteria) < GRAM_LENGTH:
+            # Every row is checked anyway, skip the round trip through the row ids
+            get_field = FIELD_GETTERS[search_by]
+            return [row for row in self.store_index.rows() if search_criteria in get_field(row)]
+        row = self.store_index.row
+        return [row(row_id) for row_id in self.search(search_criteria, search_by)]
+
+    def check_consistency(self, rows:list)->list:
+        """
+        Compare the index against a linear misc.search() over the rows, for every field,
+        with queries taken from the rows themselves.
+
+        Args:
+            rows (list): Every row of the entry list.
+
+        Returns:
+            list: A description of every mismatch found, empty if the index is consistent.
+        """
+        problems = []
+        queries = {row[field][:length] for row in rows[:4] for field in TEXT_FIELDS for length in (1, 4)}
+        for search_by in misc.SEARCH_BY_NAME, misc.SEARCH_BY_PHONE, misc.SEARCH_BY_EMAIL, misc.SEARCH_BY_FAVORITE:
+            for search_criteria in queries | {"", "☆"}:
+                expected = []
+                misc.search(search_criteria, search_by, rows, expected)
+                found = [row[:] for row in self.search_rows(search_criteria, search_by)]
+                if found != expected:
+                    problems.append(f"Search mismatch for {search_criteria!r} by {search_by}: "
+                                    f"{len(expected)} rows by scan, {len(found)} by index")
+
+        favorite_count = sum(1 for row in rows if row.favorite)
+        if self.favorite_bitmap.count(BITMAP_FAVORITE) != favorite_count \
+                or self.favorite_bitmap.count(BITMAP_NOT_FAVORITE) != len(rows) - favorite_count:
+            problems.append(f"Favorite bitmap mismatch: {favorite_count} favorites out of {len(rows)} rows in store, "
+                            f"{self.favorite_bitmap.count(BITMAP_FAVORITE)} out of "
+                            f"{len(self.favorite_bitmap) - self.favorite_bitmap.count(BITMAP_NO_ROW)} indexed")
+        return problems
+
+    def _get_favorite_candidates(self, search_criteria:str)->list:
+        # Only the favorite mark and the empty string are favorite values
+        if search_criteria not in ("", FAVORITE_MARK):
+            return []
+        return self.get_favorite_row_ids(search_criteria == FAVORITE_MARK)
+
+    def _rebuild_postings(self)->None:
+        self._postings = {field: {} for field in TEXT_FIELDS}
+        self._live_posting_count = 0
+        self._stale_posting_count = 0
+        for row_id in self.store_index.row_ids():
+            row = self.store_index.row(row_id)
+            for field in TEXT_FIELDS:
+                postings = self._postings[field]
+                for gram in get_grams(FIELD_GETTERS[field](row)):
+                    if gram not in postings:
+                        postings[gram] = array('q')
+                    postings[gram].append(row_id)
+                    self._live_posting_count += 1
@@ -0,0 +1,259 @@
+#    Pyrectory (snapshot.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import mmap
+import os
+import struct
+from array import array
+from itertools import accumulate
+from operator import add, sub
+
+import csv_func
+import row_index
+from entry import Entry, FAVORITE_MARK
+
+# Extension of the snapshot file kept next to a directory file
+SNAPSHOT_EXTENSION = ".snap"
+
+# Snapshot file header: magic, directory file size, modification time in nanoseconds,
+# row count, content hash, length of the directory file path, then padding to 8 bytes.
+# The path follows, then each text column, then the favorite bitset
+SNAPSHOT_MAGIC = b"PYRSNAP1"
+SNAPSHOT_HEADER = struct.Struct("<8sQqQ16sI4x")
+
+# Text column header: size of its UTF-8 text in bytes. The length of every field in
+# characters comes first (uint32 array), then the header, then the text of the fields
+# separated by FIELD_SEPARATOR. The lengths are what delimits the fields, the separator
+# lets str.split() cut them when no field contains it, which is much faster than slicing
+COLUMN_HEADER = struct.Struct("<Q")
+FIELD_SEPARATOR = "\0"
+
+# Attribute of the Entry records holding each text column, in file order
+TEXT_FIELD_NAMES = ("name", "phone", "email")
+
+
+def get_snapshot_filepath(filepath:str)->str:
+    return filepath + SNAPSHOT_EXTENSION
+
+
+def get_padding(size:int)->bytes:
+    """
+    Returns:
+        bytes: The zero bytes bringing a section of the given size to a multiple of 8 bytes.
+    """
+    return bytes(-size % 8)
+
+
+def write_snapshot(filepath:str, entries:list)->None:
+    """
+    Write the snapshot file of a directory file just written, atomically.
+
+    Args:
+        filepath (str): Path of the directory file.
+        entries (list): Its entries, as Entry records or lists of strings, in file order.
+    """
+    with open(filepath, "rb") as csv_file:
+        stat = os.fstat(csv_file.fileno())
+        data = mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        try:
+            content_hash = row_index.get_content_hash(data)
+        finally:
+            if stat.st_size:
+                data.close()
+
+    if entries and not isinstance(entries[0], Entry):
+        entries = [Entry.from_row(row) for row in entries]
+
+    path = os.path.abspath(filepath).encode("utf-8", "surrogateescape")
+    snapshot_filepath = get_snapshot_filepath(filepath)
+    temp_filepath = snapshot_filepath + ".tmp"
+    with open(temp_filepath, "wb") as snapshot_file:
+        snapshot_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, stat.st_size, stat.st_mtime_ns, len(entries),
+                                                 content_hash, len(path)))
+        snapshot_file.write(path + get_padding(len(path)))
+
+        for field_name in TEXT_FIELD_NAMES:
+            values = [getattr(entry, field_name) for entry in entries]
+            lengths = array('I', map(len, values))
+            text = FIELD_SEPARATOR.join(values).encode("utf-8")
+            lengths.tofile(snapshot_file)
+            snapshot_file.write(get_padding(len(lengths) * lengths.itemsize))
+            snapshot_file.write(COLUMN_HEADER.pack(len(text)))
+            snapshot_file.write(text + get_padding(len(text)))
+
+        # One bit per row, least significant first
+        bits = "".join(["1" if entry.favorite else "0" for entry in reversed(entries)])
+        snapshot_file.write(int(bits or "0", 2).to_bytes((len(entries) + 7) // 8, "little"))
+    os.replace(temp_filepath, snapshot_filepath)
+
+
+def update_snapshot(filepath:str, entries:list)->None:
+    """
+    Write the snapshot file of a directory file just written. The snapshot file is only a cache:
+    when it cannot be written, the directory file is parsed on the next load, as the stale
+    snapshot file left there no longer matches it.
+
+    Args:
+        filepath (str): Path of the directory file.
+        entries (list): Its entries, as Entry records or lists of strings, in file order.
+    """
+    try:
+        write_snapshot(filepath, entries)
+    except OSError:
+        pass
+
+
+def split_column(text:str, lengths:array)->list:
+    """
+    Cut the text of a column into its fields.
+
+    Raises:
+        ValueError: The lengths do not match the text.
+    """
+    fields = text.split(FIELD_SEPARATOR)
+    if len(fields) == len(lengths) and array('I', map(len, fields)) == lengths:
+        return fields
+
+    # Some field contains the separator, or no field at all
+    ends = list(map(add, accumulate(lengths), range(len(lengths))))
+    if (ends[-1] if ends else 0) != len(text):
+        raise ValueError("Field lengths do not match the column text")
+    starts = list(map(sub, ends, lengths))
+    return list(map(text.__getitem__, map(slice, starts, ends)))
+
+
+def read_columns(snapshot_data, row_count:int, offset:int)->list:
+    """
+    Read the columns of a snapshot file.
+
+    Args:
+        snapshot_data (mmap.mmap): Content of the snapshot file.
+        row_count (int): Number of rows.
+        offset (int): Where the first text column starts.
+
+    Returns:
+        list: The text columns as lists of strings, then the favorite column as a list of favorite marks.
+
+    Raises:
+        ValueError: The snapshot file is truncated or corrupt.
+    """
+    columns = []
+    with memoryview(snapshot_data) as view:
+        for _ in TEXT_FIELD_NAMES:
+            lengths = array('I')
+            lengths.frombytes(view[offset:offset + row_count * 4])
+            offset += row_count * 4 + len(get_padding(row_count * 4))
+            text_size, = COLUMN_HEADER.unpack_from(view, offset)
+            offset += COLUMN_HEADER.size
+            if len(lengths) != row_count or offset + text_size > len(view):
+                raise ValueError("Truncated snapshot file")
+            text = str(view[offset:offset + text_size], "utf-8")
+            offset += text_size + len(get_padding(text_size))
+
+            columns.append(split_column(text, lengths))
+
+        bitset = view[offset:offset + (row_count + 7) // 8]
+        if len(bitset) != (row_count + 7) // 8:
+            raise ValueError("Truncated snapshot file")
+        bits = format(int.from_bytes(bitset, "little"), "b").zfill(len(bitset) * 8)[::-1]
+        bitset.release()
+    columns.append([FAVORITE_MARK if bit == "1" else "" for bit in bits[:row_count]])
+    return columns
+
+
+def load_snapshot(filepath:str):
+    """
+    Read the snapshot file of a directory file, if it still matches the directory file.
+
+    Args:
+        filepath (str): Path of the directory file.
+
+    Returns:
+        list: The columns, as returned by read_columns(), None if the snapshot file is missing, stale or corrupt.
+    """
+    try:
+        with open(get_snapshot_filepath(filepath), "rb") as snapshot_file:
+            snapshot_data = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # Missing or empty snapshot file
+        return None
+    try:
+        with open(filepath, "rb") as csv_file:
+            stat = os.fstat(csv_file.fileno())
+            data = mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+    except OSError:
+        snapshot_data.close()
+        return None
+
+    try:
+        if len(snapshot_data) < SNAPSHOT_HEADER.size:
+            return None
+        magic, file_size, mtime_ns, row_count, content_hash, path_size = SNAPSHOT_HEADER.unpack_from(snapshot_data)
+        path = os.path.abspath(filepath).encode("utf-8", "surrogateescape")
+        if magic != SNAPSHOT_MAGIC or file_size != stat.st_size or mtime_ns != stat.st_mtime_ns \
+                or snapshot_data[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + path_size] != path \
+                or content_hash != row_index.get_content_hash(data):
+            return None
+        return read_columns(snapshot_data, row_count, SNAPSHOT_HEADER.size + path_size + len(get_padding(path_size)))
+    except (ValueError, struct.error):
+        return None
+    finally:
+        snapshot_data.close()
+        if stat.st_size:
+            data.close()
+
+
+def iter_content_snapshot(filepath:str):
+    """
+    Read the rows of a directory file from its snapshot file, without parsing the directory file.
+
+    Args:
+        filepath (str): Path of the directory file.
+
+    Returns:
+        generator: Yields (line_number, row, bytes_read) tuples like csv_func.iter_content_csv(), bytes_read
+                   being estimated from the share of rows read. None if the snapshot file cannot be used.
+    """
+    columns = load_snapshot(filepath)
+    if columns is None:
+        return None
+    return iter_columns(columns, os.path.getsize(filepath))
+
+
+def iter_columns(columns:list, file_size:int):
+    """
+    Yields:
+        tuple: (line_number, row, bytes_read) for each row of the columns read by read_columns(), the row being a tuple.
+    """
+    row_count = len(columns[0])
+    bytes_read = 0
+    # Rows are tuples: unlike lists, the garbage collector stops tracking them, a million of them would slow it down
+    for line_number, row in enumerate(zip(*columns), 1):
+        if line_number % csv_func.PROGRESS_INTERVAL == 0:
+            bytes_read = file_size * line_number // row_count
+        yield line_number, row, bytes_read
+
+
+def iter_directory_rows(filepath:str):
+    """
+    Returns:
+        generator: The rows of a directory file, from its snapshot file when it is up to date, parsed from the
+                   directory file otherwise. Yields (line_number, row, bytes_read) tuples like csv_func.iter_content_csv().
+    """
+    rows = iter_content_snapshot(filepath)
+    return rows if rows is not None else csv_func.iter_content_csv(filepath)
@@ -0,0 +1,139 @@
+#    Pyrectory (sort_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import locale
+
+import misc
+
+
+def get_collation_key(value:str)->str:
+    """
+    Returns:
+        str: A key comparing like the value would under the collation rules of the current
+             locale, case ignored. Plain string comparison of keys is much cheaper than collation.
+    """
+    return locale.strxfrm(value.casefold())
+
+
+# Sort key of each column, in the order of the misc.SEARCH_BY_* constants. Favorites come first
+SORT_KEY_FUNCTIONS = {
+    misc.SEARCH_BY_NAME: lambda entry: get_collation_key(entry.name),
+    misc.SEARCH_BY_PHONE: lambda entry: entry.phone,
+    misc.SEARCH_BY_EMAIL: lambda entry: get_collation_key(entry.email),
+    misc.SEARCH_BY_FAVORITE: lambda entry: not entry.favorite,
+}
+
+
+class SortKeyIndex:
+    """
+    Sort key of every row for each column, so sorting the entry list compares
+    precomputed keys instead of collating strings on every comparison.
+
+    The keys of a column are computed the first time it is sorted by, then kept up to
+    date as rows are added and removed. They are stored in lists indexed by row id.
+    Register with a StoreIndex to keep it in sync.
+    """
+
+    def __init__(self, store_index):
+        """
+        Args:
+            store_index (store_index.StoreIndex): The store index this index is registered with,
+                                                  used to read rows back and to find their positions.
+        """
+        self.store_index = store_index
+        self._keys = {}  # Column -> list of sort keys by row id, None for removed rows
+
+    def add(self, row_id:int, row)->None:
+        for column, keys in self._keys.items():
+            if row_id >= len(keys):
+                keys.extend([None] * (row_id + 1 - len(keys)))
+            keys[row_id] = SORT_KEY_FUNCTIONS[column](row)
+
+    def remove(self, row_id:int, row)->None:
+        for keys in self._keys.values():
+            keys[row_id] = None
+
+    def get_keys(self, column:int)->list:
+        """
+        Returns:
+            list: The sort key of every row for the column, by row id, None for removed rows.
+        """
+        keys = self._keys.get(column)
+        if keys is None:
+            # StoreIndex.items() would create a tuple per row, and the garbage collector would walk them
+            row_ids = self.store_index.row_ids()
+            keys = [None] * (max(row_ids, default=-1) + 1)
+            for row_id, key in zip(row_ids, map(SORT_KEY_FUNCTIONS[column], self.store_index.rows())):
+                keys[row_id] = key
+            self._keys[column] = keys
+        return keys
+
+    def get_order(self, column:int, is_descending:bool=False)->list:
+        """
+        Sort the rows by a column. Rows with equal keys keep their current order.
+
+        Returns:
+            list: The current position of each row, in sorted order, as Gtk.ListStore.reorder() takes it.
+        """
+        keys = self.get_keys(column)
+        position_keys = list(map(keys.__getitem__, self.store_index.row_ids()))
+        return sorted(range(len(position_keys)), key=position_keys.__getitem__, reverse=is_descending)
+
+    def find_position(self, column:int, row, is_descending:bool=False, skipped_position:int=None)->int:
+        """
+        Find where a row goes in rows sorted by a column, after the rows with an equal key.
+
+        Args:
+            column (int): The column the rows are sorted by.
+            row (Entry): The row to place.
+            is_descending (bool): The rows are sorted in descending order.
+            skipped_position (int, optional): Position of a row to leave out, like the row itself when it is moved.
+
+        Returns:
+            int: The position of the row, counted without the skipped one.
+        """
+        keys = self.get_keys(column)
+        key = SORT_KEY_FUNCTIONS[column](row)
+        row_id_at = self.store_index.row_id_at
+        low = 0
+        high = len(self.store_index) - (skipped_position is not None)
+        while low < high:
+            middle = (low + high) // 2
+            position = middle + (skipped_position is not None and middle >= skipped_position)
+            middle_key = keys[row_id_at(position)]
+            if (middle_key >= key) if is_descending else (middle_key <= key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def check_consistency(self, rows:list)->list:
+        """
+        Args:
+            rows (list): Every row of the entry list.
+
+        Returns:
+            list: A description of every mismatch found, empty if the index is consistent.
+        """
+        problems = []
+        for column, keys in self._keys.items():
+            get_key = SORT_KEY_FUNCTIONS[column]
+            expected_keys = sorted(get_key(row) for row in rows)
+            if sorted(key for key in keys if key is not None) != expected_keys:
+                problems.append(f"Sort key mismatch in column {column}")
+        return problems
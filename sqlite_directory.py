@@ -0,0 +1,252 @@
+#    Pyrectory (sqlite_directory.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+
+import sqlite3
+from itertools import islice
+
+import csv_func
+import misc
+from entry import Entry
+from fuzzy_index import FUZZY_MAX_DISTANCE, edit_distance
+from phone_index import normalize_phone
+
+# File name extensions of directories stored in SQLite rather than CSV
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+# Number of rows inserted per statement when importing
+IMPORT_BATCH_SIZE = 10_000
+
+# Queries shorter than this are not tokenized by the trigram index and scan the table
+FTS_MIN_LENGTH = 3
+
+# Columns holding each text field
+TEXT_COLUMNS = {misc.SEARCH_BY_NAME: "name", misc.SEARCH_BY_PHONE: "phone", misc.SEARCH_BY_EMAIL: "email"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    email TEXT NOT NULL,
+    favorite INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS entries_name ON entries (name);
+CREATE INDEX IF NOT EXISTS entries_phone ON entries (phone);
+CREATE INDEX IF NOT EXISTS entries_email ON entries (email);
+CREATE INDEX IF NOT EXISTS entries_favorite ON entries (id) WHERE favorite = 1;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    name, phone, email, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, name, phone, email) VALUES (new.id, new.name, new.phone, new.email);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, name, phone, email) VALUES ('delete', old.id, old.name, old.phone, old.email);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_fts_update AFTER UPDATE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, name, phone, email) VALUES ('delete', old.id, old.name, old.phone, old.email);
+    INSERT INTO entries_fts (rowid, name, phone, email) VALUES (new.id, new.name, new.phone, new.email);
+END;
+"""
+
+
+def is_sqlite_filepath(filepath:str)->bool:
+    """
+    Returns:
+        bool: True if the file name says the directory is stored in SQLite.
+    """
+    return filepath.lower().endswith(SQLITE_EXTENSIONS)
+
+
+class SqliteDirectory:
+    """
+    A directory stored in a SQLite database instead of a CSV file.
+
+    Names have a unique index, phones and e-mails a B-tree index each, and an FTS5
+    trigram table answers substring searches. Every change is its own transaction,
+    committed before the method returns, so there is nothing left to save.
+    Entries are identified by their id, which only grows, so ordering by id gives
+    the order they were added in.
+    """
+
+    def __init__(self, filepath:str):
+        """
+        Open the database, creating it if it does not exist.
+
+        Args:
+            filepath (str): Path of the database file.
+        """
+        self.filepath = filepath
+        self.connection = sqlite3.connect(filepath)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def close(self)->None:
+        self.connection.close()
+
+    def __len__(self)->int:
+        return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def iter_rows(self):
+        """
+        Yields:
+            tuple: (entry_id, row) for each entry in the order they were added, row being the fields as strings.
+        """
+        cursor = self.connection.execute("SELECT id, name, phone, email, favorite FROM entries ORDER BY id")
+        for entry_id, name, phone, email, favorite in cursor:
+            yield entry_id, Entry(name, phone, email, bool(favorite)).to_row()
+
+    def has_name(self, name:str)->bool:
+        return self.connection.execute("SELECT 1 FROM entries WHERE name = ?", (name,)).fetchone() is not None
+
+    def validate(self, name:str, phone:str, email:str, original_name:str=None)->dict:
+        """
+        Check an entry about to be added, or edited when original_name is given, like Directory.validate().
+
+        Returns:
+            dict: 'is_valid' (bool) and 'message_info' (str), as returned by misc.is_entry_info_valid().
+        """
+        taken_names = {name} if self.has_name(name) else set()
+        return misc.is_entry_info_valid(taken_names, original_name, name, phone, email, original_name is None)
+
+    def add(self, entry:Entry)->int:
+        """
+        Insert an entry, without validating it.
+
+        Returns:
+            int: The id of the entry.
+
+        Raises:
+            sqlite3.IntegrityError: If the name is already taken.
+        """
+        with self.connection:
+            cursor = self.connection.execute("INSERT INTO entries (name, phone, email, favorite) VALUES (?, ?, ?, ?)",
+                                             (entry.name, entry.phone, entry.email, entry.favorite))
+        return cursor.lastrowid
+
+    def edit(self, entry_id:int, entry:Entry)->None:
+        """
+        Replace an entry, without validating it.
+
+        Raises:
+            sqlite3.IntegrityError: If the new name is taken by another entry.
+        """
+        with self.connection:
+            self.connection.execute("UPDATE entries SET name = ?, phone = ?, email = ?, favorite = ? WHERE id = ?",
+                                    (entry.name, entry.phone, entry.email, entry.favorite, entry_id))
+
+    def remove(self, entry_id:int)->None:
+        with self.connection:
+            self.connection.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+
+    def import_rows(self, rows)->tuple:
+        """
+        Add rows read from a directory file, in a single transaction. Rows breaking the
+        rules of the add entry window, including name uniqueness, are skipped.
+
+        Args:
+            rows (iterable): (line_number, row) tuples.
+
+        Returns:
+            tuple: (entry_ids, errors), the ids given to the imported rows in order, and
+                   (line_number, message) tuples for the skipped ones.
+        """
+        names = {name for (name,) in self.connection.execute("SELECT name FROM entries")}
+        errors = []
+
+        def iter_valid_rows():
+            for line_number, row in rows:
+                message = misc.get_row_error(row, names)
+                if message:
+                    errors.append((line_number, message))
+                else:
+                    yield row[0], row[1], row[2], bool(row[3])
+
+        valid_rows = iter_valid_rows()
+        with self.connection:
+            first_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM entries").fetchone()[0] + 1
+            while True:
+                batch = list(islice(valid_rows, IMPORT_BATCH_SIZE))
+                if not batch:
+                    break
+                self.connection.executemany("INSERT INTO entries (name, phone, email, favorite) VALUES (?, ?, ?, ?)", batch)
+            entry_ids = [entry_id for (entry_id,) in
+                         self.connection.execute("SELECT id FROM entries WHERE id >= ? ORDER BY id", (first_id,))]
+        return entry_ids, errors
+
+    def import_csv(self, filepath:str)->tuple:
+        """
+        Add the entries of a CSV directory file, see import_rows().
+        """
+        return self.import_rows((line_number, row) for line_number, row, bytes_read
+                                in csv_func.iter_content_csv(filepath) if row)
+
+    def export_csv(self, filepath:str)->None:
+        """
+        Write every entry to a CSV directory file.
+        """
+        csv_func.write_content_csv(filepath, (row for entry_id, row in self.iter_rows()))
+
+    def search(self, search_criteria:str, search_by:int, phone_match:int=misc.PHONE_MATCH_CONTAINS, is_fuzzy:bool=False)->list:
+        """
+        Find the entries matching a query, with the same rules as Directory.search().
+
+        Returns:
+            list: The ids of the matching entries, closest first for a fuzzy search, in the order they were added otherwise.
+        """
+        if search_by == misc.SEARCH_BY_FAVORITE:
+            favorite = 1 if search_criteria else 0
+            cursor = self.connection.execute("SELECT id FROM entries WHERE favorite = ? ORDER BY id", (favorite,))
+        elif search_by == misc.SEARCH_BY_NAME and is_fuzzy:
+            return self._search_fuzzy(search_criteria)
+        elif search_by == misc.SEARCH_BY_PHONE and phone_match == misc.PHONE_MATCH_PREFIX:
+            # The phone index is used for a pattern with a constant prefix, entries without a phone never match
+            cursor = self.connection.execute("SELECT id FROM entries WHERE phone GLOB ? AND phone != '' ORDER BY id",
+                                             (normalize_phone(search_criteria) + "*",))
+        elif search_by == misc.SEARCH_BY_PHONE and phone_match == misc.PHONE_MATCH_SUFFIX:
+            cursor = self.connection.execute("SELECT id FROM entries WHERE phone GLOB ? AND phone != '' ORDER BY id",
+                                             ("*" + normalize_phone(search_criteria),))
+        elif len(search_criteria) < FTS_MIN_LENGTH:
+            column = TEXT_COLUMNS[search_by]
+            cursor = self.connection.execute(f"SELECT id FROM entries WHERE instr({column}, ?) > 0 ORDER BY id",
+                                             (search_criteria,))
+        else:
+            # The trigram index ignores case, instr() then keeps the exact matches
+            column = TEXT_COLUMNS[search_by]
+            fts_query = f'{column} : "{search_criteria.replace(chr(34), chr(34) * 2)}"'
+            cursor = self.connection.execute(
+                f"SELECT id FROM entries WHERE id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?) "
+                f"AND instr({column}, ?) > 0 ORDER BY id", (fts_query, search_criteria))
+        return [entry_id for (entry_id,) in cursor]
+
+    def _search_fuzzy(self, name:str, max_distance:int=FUZZY_MAX_DISTANCE)->list:
+        # Names too short or too long to be close enough are left out by SQLite
+        name = name.casefold()
+        cursor = self.connection.execute("SELECT id, name FROM entries WHERE length(name) BETWEEN ? AND ?",
+                                         (len(name) - max_distance, len(name) + max_distance))
+        matches = []
+        for entry_id, entry_name in cursor:
+            distance = edit_distance(name, entry_name.casefold(), max_distance)
+            if distance <= max_distance:
+                matches.append((distance, entry_id))
+        matches.sort()
+        return [entry_id for distance, entry_id in matches]
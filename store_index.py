@@ -0,0 +1,391 @@
+#    Pyrectory (store_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+from array import array
+from collections import Counter
+
+from entry import Entry
+
+# Compact the row id list once this many rows have been removed from its front
+FRONT_COMPACT_THRESHOLD = 4096
+
+
+class StoreIndex:
+    """
+    Mirror of the rows of an entry list, kept in sync through the row-inserted,
+    row-changed and row-deleted signals of a Gtk.ListStore.
+
+    Rows are kept as Entry records. Every row gets a row id when it is inserted. Row ids only grow, but rows
+    can be inserted anywhere, moved and reordered, so row ids do not follow the list order: sort_row_ids()
+    puts them back in it, through a map of row id to position. Sub-indexes registered
+    with add_index() are told about each row as it is added or removed, which lets
+    them answer queries without walking the list store.
+
+    The class never imports Gtk, the list store is only used through its signals,
+    so it can also be driven directly with insert(), update() and delete().
+    """
+
+    def __init__(self):
+        self._row_ids = []  # Row ids by position, starting at self._front
+        self._front = 0     # Number of dead slots at the start of self._row_ids
+        self._rows = {}     # Row id -> Entry copy of the row
+        self._positions = array('q')  # Row id -> index of the row in self._row_ids, dead slots included, -1 once removed
+        self._valid_positions = 0     # self._positions is up to date for the slots before this one
+        self._next_row_id = 0
+        self._indexes = []
+        self._handler_ids = []
+        self._reordered_handler_id = None
+        self._list_store = None
+
+    def __len__(self)->int:
+        return len(self._row_ids) - self._front
+
+    def add_index(self, index)->None:
+        """
+        Register a sub-index and feed it the rows already known.
+
+        Args:
+            index: Object with add(row_id, entry) and remove(row_id, entry) methods.
+        """
+        self._indexes.append(index)
+        for row_id in self.row_ids():
+            index.add(row_id, self._rows[row_id])
+
+    def attach(self, list_store)->None:
+        """
+        Start following a list store. The rows it already contains are indexed first.
+
+        Args:
+            list_store (Gtk.ListStore): The list store containing the entries.
+        """
+        self.detach()
+        self.clear()
+        for entry in list_store:
+            self.insert(len(self), entry[:])
+
+        self._list_store = list_store
+        self._handler_ids = [
+            list_store.connect("row-inserted", self._on_row_inserted),
+            list_store.connect("row-changed", self._on_row_changed),
+            list_store.connect("row-deleted", self._on_row_deleted),
+        ]
+        self._reordered_handler_id = list_store.connect("rows-reordered", self._on_rows_reordered)
+        self._handler_ids.append(self._reordered_handler_id)
+
+    def detach(self)->None:
+        """
+        Stop following the list store given to attach(), if any.
+        """
+        if self._list_store is not None:
+            for handler_id in self._handler_ids:
+                self._list_store.disconnect(handler_id)
+        self._list_store = None
+        self._handler_ids = []
+        self._reordered_handler_id = None
+
+    def clear(self)->None:
+        """
+        Forget every row, in this index and in the registered sub-indexes.
+        """
+        for row_id in self.row_ids():
+            self._remove_from_indexes(row_id, self._rows[row_id])
+        self._row_ids = []
+        self._front = 0
+        self._rows = {}
+        self._positions = array('q', [-1]) * self._next_row_id
+        self._valid_positions = 0
+
+    def insert(self, position:int, row:list)->int:
+        """
+        Record a row inserted at the given position.
+
+        Args:
+            position (int): Position of the new row.
+            row (list): Content of the new row, a list of fields or an Entry.
+
+        Returns:
+            int: The row id given to the new row.
+        """
+        row_id = self._next_row_id
+        self._next_row_id += 1
+        row = Entry.from_row(row)
+
+        slot = self._front + position
+        self._positions.append(slot)
+        if position == len(self):
+            if self._valid_positions == slot:
+                self._valid_positions += 1
+            self._row_ids.append(row_id)
+        else:
+            # The rows after it move one slot down
+            self._valid_positions = min(self._valid_positions, slot)
+            self._row_ids.insert(slot, row_id)
+        self._rows[row_id] = row
+        for index in self._indexes:
+            index.add(row_id, row)
+        return row_id
+
+    def update(self, position:int, row:list)->None:
+        """
+        Record a change to the row at the given position.
+
+        Args:
+            position (int): Position of the changed row.
+            row (list): New content of the row, a list of fields or an Entry.
+        """
+        row_id = self._row_ids[self._front + position]
+        row = Entry.from_row(row)
+        old_row = self._rows[row_id]
+        if old_row == row:
+            return
+
+        self._remove_from_indexes(row_id, old_row)
+        self._rows[row_id] = row
+        for index in self._indexes:
+            index.add(row_id, row)
+
+    def delete(self, position:int)->None:
+        """
+        Record the removal of the row at the given position.
+
+        Args:
+            position (int): Position of the removed row.
+        """
+        # Gtk.ListStore.clear() removes rows from the front one by one, so removing
+        # the first row only moves self._front instead of shifting the whole list
+        if position == 0:
+            row_id = self._row_ids[self._front]
+            self._row_ids[self._front] = None
+            self._front += 1
+            if self._front >= FRONT_COMPACT_THRESHOLD and self._front * 2 >= len(self._row_ids):
+                del self._row_ids[:self._front]
+                self._front = 0
+                self._valid_positions = 0
+        else:
+            row_id = self._row_ids.pop(self._front + position)
+            self._valid_positions = min(self._valid_positions, self._front + position)
+
+        self._positions[row_id] = -1
+        self._remove_from_indexes(row_id, self._rows.pop(row_id))
+
+    def reorder(self, new_order:list)->None:
+        """
+        Reorder the rows, and the list store followed, if any. Rows keep their row id,
+        so the sub-indexes are left untouched.
+
+        Args:
+            new_order (list): The current position of each row, in the new order.
+        """
+        row_ids = self.row_ids()
+        self._row_ids = list(map(row_ids.__getitem__, new_order))
+        self._front = 0
+        self._valid_positions = 0
+        if self._list_store is not None:
+            # The new order given by the rows-reordered signal cannot be read from Python
+            with self._list_store.handler_block(self._reordered_handler_id):
+                self._list_store.reorder(new_order)
+
+    def move(self, position:int, new_position:int)->None:
+        """
+        Move a row, and the row of the list store followed, if any.
+
+        Args:
+            position (int): Current position of the row.
+            new_position (int): Position of the row once moved, counted without it.
+        """
+        if new_position == position:
+            return
+        self._row_ids.insert(self._front + new_position, self._row_ids.pop(self._front + position))
+        self._valid_positions = min(self._valid_positions, self._front + min(position, new_position))
+        if self._list_store is not None:
+            list_store = self._list_store
+            treeiter = list_store.get_iter(position)
+            with list_store.handler_block(self._reordered_handler_id):
+                # The row now at the new position ends up after the moved row when moving up, before it when moving down
+                if new_position < position:
+                    list_store.move_before(treeiter, list_store.get_iter(new_position))
+                else:
+                    list_store.move_after(treeiter, list_store.get_iter(new_position))
+
+    def row_ids(self)->list:
+        """
+        Returns:
+            list: The row ids, in list store order.
+        """
+        return self._row_ids[self._front:]
+
+    def rows(self)->list:
+        """
+        Returns:
+            list: The Entry of every row, in list store order. The entries are
+                  replaced, never modified, when a row changes, so this is a snapshot.
+        """
+        rows = self._rows
+        return [rows[row_id] for row_id in self.row_ids()]
+
+    def items(self)->list:
+        """
+        Returns:
+            list: (row_id, entry) pairs, in list store order.
+        """
+        rows = self._rows
+        return [(row_id, rows[row_id]) for row_id in self.row_ids()]
+
+    def make_bitmap(self, row_ids)->bytearray:
+        """
+        Args:
+            row_ids (iterable): Row ids to mark.
+
+        Returns:
+            bytearray: One byte per row id given so far, 1 for the marked rows and 0 for the others.
+        """
+        bitmap = bytearray(self._next_row_id)
+        for row_id in row_ids:
+            bitmap[row_id] = 1
+        return bitmap
+
+    def sort_row_ids(self, row_ids)->list:
+        """
+        Args:
+            row_ids (iterable): Row ids, in any order.
+
+        Returns:
+            list: The row ids in list store order, the ones of removed rows left out.
+        """
+        positions = self._get_positions()
+        return sorted([row_id for row_id in row_ids if positions[row_id] >= 0], key=positions.__getitem__)
+
+    def position(self, row_id:int)->int:
+        """
+        Returns:
+            int: The position of the row with the given row id.
+        """
+        return self._get_positions()[row_id] - self._front
+
+    def row_id_at(self, position:int)->int:
+        """
+        Returns:
+            int: The row id of the row at the given position.
+        """
+        return self._row_ids[self._front + position]
+
+    def row(self, row_id:int)->list:
+        """
+        Returns:
+            Entry: The content of the row with the given row id.
+        """
+        return self._rows[row_id]
+
+    def get_row(self, row_id:int):
+        """
+        Returns:
+            Entry: The content of the row with the given row id, None if it was removed.
+        """
+        return self._rows.get(row_id)
+
+    def check_consistency(self, list_store)->list:
+        """
+        Compare this index and its sub-indexes against a full walk of the list store.
+
+        Args:
+            list_store (Gtk.ListStore): The list store containing the entries.
+
+        Returns:
+            list: A description of every mismatch found, empty if the index is consistent.
+        """
+        problems = []
+        store_rows = [Entry.from_row(entry[:]) for entry in list_store]
+        if len(store_rows) != len(self):
+            problems.append(f"Row count mismatch: {len(store_rows)} in store, {len(self)} indexed")
+
+        for position, (row_id, row) in enumerate(zip(self.row_ids(), store_rows)):
+            if self._rows[row_id] != row:
+                problems.append(f"Row {position} mismatch: {row} in store, {self._rows[row_id]} indexed")
+
+        for index in self._indexes:
+            problems.extend(index.check_consistency(store_rows))
+        return problems
+
+    def _get_positions(self)->array:
+        # Inserting, removing or moving a row in the middle shifts the slots after it, they are recomputed in one pass
+        row_ids = self._row_ids
+        if self._valid_positions < len(row_ids):
+            positions = self._positions
+            for slot in range(max(self._valid_positions, self._front), len(row_ids)):
+                positions[row_ids[slot]] = slot
+            self._valid_positions = len(row_ids)
+        return self._positions
+
+    def _remove_from_indexes(self, row_id:int, row:list)->None:
+        for index in self._indexes:
+            index.remove(row_id, row)
+
+    def _on_row_inserted(self, model, path, treeiter):
+        self.insert(path.get_indices()[0], model[treeiter][:])
+
+    def _on_row_changed(self, model, path, treeiter):
+        self.update(path.get_indices()[0], model[treeiter][:])
+
+    def _on_row_deleted(self, model, path):
+        self.delete(path.get_indices()[0])
+
+    def _on_rows_reordered(self, model, path, treeiter, new_order):
+        # Only emitted by reorder() and move(), which block this handler. Rebuild from scratch to be safe
+        list_store = self._list_store
+        self.detach()
+        self.attach(list_store)
+
+
+class NameIndex:
+    """
+    Multiset of the names in an entry list, used to check for name uniqueness
+    in constant time. Register it with StoreIndex.add_index() to keep it in sync.
+    """
+
+    def __init__(self):
+        self._name_counts = Counter()
+
+    def __contains__(self, name)->bool:
+        return name in self._name_counts
+
+    def __len__(self)->int:
+        return len(self._name_counts)
+
+    def add(self, row_id:int, row:list)->None:
+        self._name_counts[row.name] += 1
+
+    def remove(self, row_id:int, row:list)->None:
+        name = row.name
+        self._name_counts[name] -= 1
+        if self._name_counts[name] <= 0:
+            del self._name_counts[name]
+
+    def check_consistency(self, rows:list)->list:
+        """
+        Args:
+            rows (list): Every row of the entry list.
+
+        Returns:
+            list: A description of every mismatch found, empty if the index is consistent.
+        """
+        expected_counts = Counter(row.name for row in rows)
+        if expected_counts == self._name_counts:
+            return []
+        return [f"Name count mismatch for {name!r}: {expected_counts[name]} in store, {self._name_counts[name]} indexed"
+                for name in expected_counts.keys() | self._name_counts.keys()
+                if expected_counts[name] != self._name_counts[name]]
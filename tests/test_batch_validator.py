@@ -0,0 +1,77 @@
+#    Pyrectory (tests/test_batch_validator.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Validating a file in byte ranges on several processes must report what checking its
+# rows one by one reports, wherever the ranges end, with or without a row index file.
+
+import random
+
+import pytest
+
+import batch_validator
+import csv_func
+import misc
+from entry import FAVORITE_MARK
+
+ROW_COUNT = 400
+
+
+def make_rows(rng:random.Random)->list:
+    rows = []
+    for row_number in range(ROW_COUNT):
+        kind = rng.random()
+        if kind < 0.05:
+            rows.append([])
+        elif kind < 0.1:
+            rows.append(["short", "0123"])
+        else:
+            # Quoted newlines and delimiters, repeated and empty names, bad phones and e-mails
+            name = rng.choice(("", "a", "b;c", 'say "hi"', "line\nbreak", f"name{row_number}", f"name{row_number}"))
+            phone = rng.choice(("", "0123", "+33 1 23", "12ab"))
+            email = rng.choice(("", "x@ex.com", "not an e-mail"))
+            rows.append([name, phone, email, rng.choice(("", FAVORITE_MARK, "yes"))])
+    return rows
+
+
+def get_expected(filepath:str)->tuple:
+    report = []
+    row_count = 0
+    names = set()
+    for line_number, row, bytes_read in csv_func.iter_content_csv(filepath):
+        if not row:
+            continue
+        row_count += 1
+        message = misc.get_row_error(row, names)
+        if message:
+            report.append((line_number, message))
+    return report, row_count
+
+
+@pytest.mark.parametrize("seed", range(2))
+@pytest.mark.parametrize("with_row_index", (False, True), ids=("scan", "row_index"))
+@pytest.mark.parametrize("chunk_size", (1, 97, batch_validator.CHUNK_SIZE))
+def test_matches_rows_checked_one_by_one(tmp_path, seed, with_row_index, chunk_size):
+    filepath = str(tmp_path / "directory.csv")
+    csv_func.replace_content_csv(filepath, make_rows(random.Random(seed)), with_row_index=with_row_index)
+    assert batch_validator.validate_file(filepath, 2, chunk_size) == get_expected(filepath)
+
+
+def test_empty_file(tmp_path):
+    filepath = tmp_path / "directory.csv"
+    filepath.write_bytes(b"")
+    assert batch_validator.validate_file(str(filepath), 2) == ([], 0)
@@ -0,0 +1,100 @@
+#    Pyrectory (tests/test_cli.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Commands writing a directory file must be able to write it over their input: the rows
+# are all read before the file is replaced, and a failed command leaves the input as it was.
+
+import os
+
+import pytest
+
+import cli
+import csv_func
+import row_index
+from entry import FAVORITE_MARK
+
+ROWS = [["ann", "0123", "", ""], ["bob", "", "bob@ex.com", FAVORITE_MARK], ["ann", "4567", "", ""],
+        ["cy", "0129", "", ""], ["short"]] * 200
+
+
+@pytest.fixture(autouse=True)
+def restore_write_options(monkeypatch):
+    # main() sets them from the global options
+    monkeypatch.setattr(csv_func, "COMPRESSION_LEVEL", csv_func.COMPRESSION_LEVEL)
+    monkeypatch.setattr(csv_func, "WRITE_ROW_INDEX", csv_func.WRITE_ROW_INDEX)
+
+
+@pytest.fixture(params=(".csv", ".csv.gz", ".csv.xz"))
+def filepath(tmp_path, request):
+    filepath = str(tmp_path / ("directory" + request.param))
+    csv_func.replace_content_csv(filepath, ROWS)
+    return filepath
+
+
+def get_entries(filepath:str)->list:
+    return [row for row in csv_func.get_content_csv(filepath) if row]
+
+
+def test_dedupe_in_place(filepath):
+    assert cli.main(["dedupe", filepath, "-o", filepath]) == 0
+    assert get_entries(filepath) == [ROWS[0], ROWS[1], ROWS[3]]
+    assert os.listdir(os.path.dirname(filepath)) == [os.path.basename(filepath)]
+
+
+def test_search_in_place(filepath):
+    assert cli.main(["search", filepath, "012", "--by", "phone", "--phone-match", "prefix", "-o", filepath]) == 0
+    assert get_entries(filepath) == [ROWS[0], ROWS[3]] * 200
+
+
+def test_merge_in_place(filepath, tmp_path):
+    other_filepath = str(tmp_path / "other.csv")
+    csv_func.replace_content_csv(other_filepath, [["ann", "9", "", FAVORITE_MARK], ["dee", "8", "", ""]])
+    assert cli.main(["merge", other_filepath, filepath, "--policy", "favorite", "-o", filepath]) == 0
+    assert get_entries(filepath) == [["ann", "9", "", FAVORITE_MARK], ["dee", "8", "", ""], ROWS[1], ROWS[3]]
+
+
+def test_convert_in_place(tmp_path):
+    filepath = str(tmp_path / "export.csv")
+    with open(filepath, "w", encoding="utf-8") as csv_file:
+        csv_file.write("name,phone,e-mail\n" + "ann,0123,\n bob , ,bob@ex.com\n" * 100)
+    assert cli.main(["convert", filepath, "--skip-header", "-o", filepath]) == 0
+    assert get_entries(filepath) == [["ann", "0123", "", ""], ["bob", "", "bob@ex.com", ""]]
+
+
+def test_row_index_written_in_place(tmp_path):
+    filepath = str(tmp_path / "directory.csv")
+    csv_func.replace_content_csv(filepath, ROWS, with_row_index=True)
+    assert cli.main(["--row-index", "dedupe", filepath, "-o", filepath]) == 0
+    with open(filepath, "rb") as csv_file:
+        data = csv_file.read()
+    index = row_index.RowIndex.load(filepath, data)
+    assert index is not None and len(index) == 3
+    index.close()
+
+
+def test_failed_command_keeps_input(tmp_path):
+    filepath = str(tmp_path / "directory.csv")
+    csv_func.replace_content_csv(filepath, ROWS)
+    with open(filepath, "ab") as csv_file:
+        csv_file.write(b"\xff;1;;\n")
+    with open(filepath, "rb") as csv_file:
+        data = csv_file.read()
+    assert cli.main(["dedupe", filepath, "-o", filepath]) == 1
+    with open(filepath, "rb") as csv_file:
+        assert csv_file.read() == data
+    assert os.listdir(tmp_path) == ["directory.csv"]
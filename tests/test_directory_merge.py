@@ -0,0 +1,90 @@
+#    Pyrectory (tests/test_directory_merge.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Merging must keep, for each name, the entry its policy chooses, in the order names first
+# appear, whether the inputs are merged in memory or sorted on disk, and even when the
+# output replaces one of the inputs.
+
+import os
+import random
+
+import pytest
+
+import csv_func
+import directory_merge
+from entry import FAVORITE_MARK
+
+FILE_COUNT = 3
+ROW_COUNT = 80
+
+
+def make_rows(rng:random.Random, file_number:int)->list:
+    rows = []
+    for row_number in range(ROW_COUNT):
+        # Few names, so most appear in several rows and files
+        name = "name" + str(rng.randint(0, 40))
+        phone = str(rng.randint(0, 10 ** 6)) if rng.random() < 0.9 else ""
+        rows.append([name, phone, f"{file_number}-{row_number}@ex.com", FAVORITE_MARK if rng.random() < 0.3 else ""])
+    return rows
+
+
+def get_expected(inputs:list, policy:str)->list:
+    winners = {}
+    for rows in inputs:
+        for row in rows:
+            if directory_merge.get_invalid_row_message(row):
+                continue
+            if row[0] not in winners or directory_merge.is_better_entry(winners[row[0]], row, policy):
+                winners[row[0]] = row
+    return list(winners.values())
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("max_size", (directory_merge.HASH_JOIN_MAX_SIZE, 0), ids=("hash", "sort"))
+@pytest.mark.parametrize("policy", directory_merge.MERGE_POLICIES)
+@pytest.mark.parametrize("in_place", (False, True), ids=("new_output", "output_is_input"))
+def test_merge(tmp_path, monkeypatch, seed, max_size, policy, in_place):
+    # Several run files even for a few rows
+    monkeypatch.setattr(directory_merge, "RUN_ROW_COUNT", 17)
+    rng = random.Random(seed)
+    inputs = [make_rows(rng, file_number) for file_number in range(FILE_COUNT)]
+    # A row without phone or e-mail is dropped
+    inputs[1].insert(5, ["nobody", "", "", ""])
+    input_filepaths = []
+    for file_number, rows in enumerate(inputs):
+        input_filepaths.append(str(tmp_path / f"input{file_number}.csv"))
+        csv_func.replace_content_csv(input_filepaths[-1], rows)
+    output_filepath = input_filepaths[1] if in_place else str(tmp_path / "output.csv")
+
+    invalid_rows = []
+    counts = directory_merge.merge_directories(input_filepaths, output_filepath, policy,
+                                               lambda *invalid_row: invalid_rows.append(invalid_row),
+                                               max_size, str(tmp_path))
+
+    expected = get_expected(inputs, policy)
+    assert csv_func.get_content_csv(output_filepath) == expected
+    assert [(filepath, line_number) for filepath, line_number, message in invalid_rows] == [(input_filepaths[1], 6)]
+    assert counts == {"rows": FILE_COUNT * ROW_COUNT + 1, "invalid": 1,
+                      "duplicates": FILE_COUNT * ROW_COUNT - len(expected), "entries": len(expected)}
+    # Run files are removed, only the inputs and the output are left
+    assert sorted(os.listdir(tmp_path)) == sorted({os.path.basename(filepath) for filepath in input_filepaths + [output_filepath]})
+
+
+def test_unknown_policy(tmp_path):
+    with pytest.raises(ValueError):
+        directory_merge.merge_directories([], str(tmp_path / "output.csv"), "newest")
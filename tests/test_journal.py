@@ -0,0 +1,93 @@
+#    Pyrectory (tests/test_journal.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Replaying the journal must give the entries the changes left, keeping renamed entries
+# where they were, and give them again when replayed over a directory file that already
+# holds some or all of its records, as after an interrupted compaction.
+
+import os
+
+import pytest
+
+import csv_func
+import journal
+
+FILE_ROWS = [["ann", "0123", "", ""], ["bob", "", "bob@ex.com", "*"], ["cy", "4567", "", ""]]
+
+
+def replay(journal_:journal.Journal)->list:
+    return [row for line_number, row, bytes_read in journal_.replay(csv_func.iter_content_csv(journal_.filepath))]
+
+
+@pytest.fixture
+def directory_journal(tmp_path):
+    filepath = str(tmp_path / "directory.csv")
+    csv_func.replace_content_csv(filepath, FILE_ROWS)
+    return journal.Journal(filepath)
+
+
+def test_replay_applies_records(directory_journal):
+    directory_journal.append([journal.add_record(["dee", "89", "", ""]),
+                              journal.edit_record("bob", ["bob", "", "bob@ex.org", ""]),
+                              journal.remove_record("cy")])
+    assert replay(directory_journal) == [["ann", "0123", "", ""], ["bob", "", "bob@ex.org", ""], ["dee", "89", "", ""]]
+
+
+def test_renamed_entry_keeps_its_place(directory_journal):
+    directory_journal.append([journal.edit_record("ann", ["anne", "0123", "", ""]),
+                              journal.edit_record("anne", ["annie", "0123", "", "*"])])
+    assert replay(directory_journal) == [["annie", "0123", "", "*"], FILE_ROWS[1], FILE_ROWS[2]]
+
+
+@pytest.mark.parametrize("records, expected_rows", (
+    # Renamed, then its old name given to a new entry
+    ([journal.edit_record("ann", ["anne", "0123", "", ""]), journal.add_record(["ann", "99", "", ""])],
+     [["ann", "99", "", ""], FILE_ROWS[1], FILE_ROWS[2], ["anne", "0123", "", ""]]),
+    # Names swapped through a third one
+    ([journal.edit_record("ann", ["tmp", "0123", "", ""]), journal.edit_record("bob", ["ann", "", "bob@ex.com", "*"]),
+      journal.edit_record("tmp", ["bob", "0123", "", ""])],
+     [["ann", "", "bob@ex.com", "*"], ["bob", "0123", "", ""], FILE_ROWS[2]]),
+    # Renamed, then removed under its new name
+    ([journal.edit_record("cy", ["cyd", "4567", "", ""]), journal.remove_record("cyd"), journal.add_record(["cy", "1", "", ""])],
+     [FILE_ROWS[0], FILE_ROWS[1], ["cy", "1", "", ""]]),
+))
+def test_replay_is_idempotent(directory_journal, records, expected_rows):
+    directory_journal.append(records)
+    rows = replay(directory_journal)
+    assert rows == expected_rows
+
+    # Directory file written, but the compaction interrupted before the journal was deleted
+    directory_journal._rotate()
+    csv_func.replace_content_csv(directory_journal.filepath, rows)
+    assert os.path.exists(directory_journal.compacting_journal_filepath)
+    assert replay(directory_journal) == rows
+
+
+def test_compaction_keeps_interrupted_records(directory_journal):
+    # Records of an interrupted compaction, then of the session after it
+    directory_journal.append([journal.add_record(["dee", "89", "", ""])])
+    directory_journal._rotate()
+    directory_journal.append([journal.edit_record("dee", ["dean", "89", "", ""])])
+    rows = replay(directory_journal)
+    assert rows == FILE_ROWS + [["dean", "89", "", ""]]
+
+    directory_journal.compact(rows)
+    assert not os.path.exists(directory_journal.journal_filepath)
+    assert not os.path.exists(directory_journal.compacting_journal_filepath)
+    assert csv_func.get_content_csv(directory_journal.filepath) == rows
+    assert replay(directory_journal) == rows
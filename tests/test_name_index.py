@@ -0,0 +1,70 @@
+#    Pyrectory (tests/test_name_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# The name index must answer the uniqueness checks of the add and edit windows as
+# the scan of the entry list did, after any sequence of adds, edits and removals.
+
+import random
+
+import pytest
+
+import misc
+from directory import Directory
+
+NAMES = ("ann", "bob", "cy", "dee", "eve", "fox")
+OPERATION_COUNT = 300
+
+
+def check_names(directory:Directory)->None:
+    entry_list = [row[:] for row in directory.rows()]
+    for name in NAMES + ("",):
+        # Add, then edit of every entry keeping or changing its name
+        assert directory.validate(name, "0123", "") == misc.is_entry_info_valid(entry_list, None, name, "0123", "", True)
+        for row in entry_list:
+            assert directory.validate(name, "0123", "", row[0]) == \
+                   misc.is_entry_info_valid(entry_list, row[0], name, "0123", "", False)
+    assert directory.store_index.check_consistency(directory.rows()) == []
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_validate_matches_entry_list_scan(seed):
+    rng = random.Random(seed)
+    directory = Directory()
+    for operation_number in range(OPERATION_COUNT):
+        operation = rng.choice(("add", "add", "edit", "remove"))
+        row = [rng.choice(NAMES) + str(rng.randint(0, 3)), "0123", "", ""]
+        if operation == "add" or len(directory) == 0:
+            directory.add(row)
+        elif operation == "edit":
+            directory.edit(rng.randrange(len(directory)), row)
+        else:
+            directory.remove(rng.randrange(len(directory)))
+        if operation_number % 20 == 0:
+            check_names(directory)
+    check_names(directory)
+
+
+def test_name_kept_while_a_duplicate_remains():
+    # Files written by hand may hold the same name twice, removing one must not free the name
+    directory = Directory()
+    directory.add(["ann", "0123", "", ""])
+    directory.add(["ann", "4567", "", ""])
+    directory.remove(0)
+    assert not directory.validate("ann", "0123", "")["is_valid"]
+    directory.remove(0)
+    assert directory.validate("ann", "0123", "")["is_valid"]
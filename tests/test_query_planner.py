@@ -0,0 +1,106 @@
+#    Pyrectory (tests/test_query_planner.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Compound queries run by the query planner must find the rows a check of every
+# criterion on every row finds, whichever indexes the plan reads.
+
+import random
+from itertools import product
+
+import pytest
+
+import misc
+from directory import Directory
+from entry import FAVORITE_MARK
+from query_planner import MATCH_ALL, MATCH_ANY, Criterion
+
+ROW_COUNT = 300
+
+# Criteria of each field, the phone ones without digits included
+NAME_CRITERIA = ("", "a", "ab", "abc", "ba1")
+PHONE_CRITERIA = ("", "1", "12", "+", "-", "+3", "012")
+EMAIL_CRITERIA = ("", "@ex", "b1")
+
+
+def make_directory(seed:int)->Directory:
+    rng = random.Random(seed)
+    directory = Directory()
+    for row_number in range(ROW_COUNT):
+        name = "".join(rng.choice("abc") for _ in range(rng.randint(1, 5))) + str(row_number)
+        phone = "".join(rng.choice("0123") for _ in range(rng.randint(0, 6)))
+        email = f"{name}@ex.com" if rng.random() < 0.5 or not phone else ""
+        directory.add([name, phone, email, FAVORITE_MARK if rng.random() < 0.2 else ""])
+    # Row ids no longer follow the list order
+    directory.sort(misc.SEARCH_BY_NAME)
+    return directory
+
+
+def get_expected(directory:Directory, criteria:list, match:int)->list:
+    combine = all if match == MATCH_ALL else any
+    return [row_id for row_id, row in directory.store_index.items() if combine(criterion.matches(row) for criterion in criteria)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("match", (MATCH_ALL, MATCH_ANY))
+def test_query_matches_every_row_checked(seed, match):
+    directory = make_directory(seed)
+    phone_matches = (misc.PHONE_MATCH_CONTAINS, misc.PHONE_MATCH_PREFIX, misc.PHONE_MATCH_SUFFIX)
+    for name, phone, phone_match in product(NAME_CRITERIA, PHONE_CRITERIA, phone_matches):
+        for email, favorite in product(EMAIL_CRITERIA, (None, FAVORITE_MARK, "")):
+            criteria = [Criterion(misc.SEARCH_BY_PHONE, phone, phone_match)]
+            if name:
+                criteria.append(Criterion(misc.SEARCH_BY_NAME, name))
+            if email:
+                criteria.append(Criterion(misc.SEARCH_BY_EMAIL, email))
+            if favorite is not None:
+                criteria.append(Criterion(misc.SEARCH_BY_FAVORITE, favorite))
+            plan = directory.query(criteria, match)
+            assert plan.row_ids == get_expected(directory, criteria, match), plan.explain()
+
+
+@pytest.mark.parametrize("phone", ("+", "-", ""))
+@pytest.mark.parametrize("phone_match", (misc.PHONE_MATCH_PREFIX, misc.PHONE_MATCH_SUFFIX))
+def test_phone_criterion_without_digits(phone, phone_match):
+    directory = make_directory(0)
+    criterion = Criterion(misc.SEARCH_BY_PHONE, phone, phone_match)
+    plan = directory.query([criterion])
+    assert plan.row_ids == directory.phone_index.search(phone, phone_match)
+    assert plan.row_ids == [row_id for row_id, row in directory.store_index.items() if row.phone]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_query_after_changes(seed):
+    # Statistics and indexes follow adds, edits and removals
+    rng = random.Random(seed)
+    directory = make_directory(seed)
+    for operation_number in range(200):
+        operation = rng.choice(("add", "edit", "remove"))
+        row = [f"{rng.choice('abc')}x{operation_number}", rng.choice(("", "012", "123")), rng.choice(("", "e@ex.com")),
+               FAVORITE_MARK if rng.random() < 0.5 else ""]
+        if operation == "add":
+            directory.add(row)
+        elif operation == "edit":
+            directory.edit(rng.randrange(len(directory)), row)
+        else:
+            directory.remove(rng.randrange(len(directory)))
+    for name, phone, favorite in product(NAME_CRITERIA, PHONE_CRITERIA, ("", FAVORITE_MARK)):
+        criteria = [Criterion(misc.SEARCH_BY_NAME, name), Criterion(misc.SEARCH_BY_PHONE, phone, misc.PHONE_MATCH_PREFIX),
+                    Criterion(misc.SEARCH_BY_FAVORITE, favorite)]
+        for match in (MATCH_ALL, MATCH_ANY):
+            plan = directory.query(criteria, match)
+            assert plan.row_ids == get_expected(directory, criteria, match), plan.explain()
@@ -0,0 +1,130 @@
+#    Pyrectory (tests/test_row_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# The row index must find every row start, quoted newlines and blank lines included, and its
+# file must be ignored once the directory file changes: in size, in modification time, or in
+# content alone when both are kept.
+
+import os
+
+import pytest
+
+import csv_func
+import row_index
+from paged_csv import PagedCsvFile
+from row_index import RowIndex
+
+ROWS = [["ann", "0123", "", ""], [], ["multi\nline", "", "a@ex.com", "*"], ['quote "q"', "1", "", ""],
+        ["semi;colon", "2", "", ""], ["\n", "3", "", ""], ["last", "4", "", ""]]
+
+
+def get_row_starts(data:bytes)->list:
+    """
+    Returns:
+        list: Where each row starts, found line by line, then the file size.
+    """
+    # Every line start, nothing follows the last newline
+    starts = [0] + [position + 1 for position in range(len(data) - 1) if data[position] == ord("\n")]
+    row_starts = []
+    quote_count = 0
+    # A line starts a row when the quotes before it are even in number
+    for start, end in zip(starts, starts[1:] + [len(data)]):
+        if quote_count % 2 == 0:
+            row_starts.append(start)
+        quote_count += data[start:end].count(b'"')
+    return row_starts + [len(data)]
+
+
+def read_data(filepath:str)->bytes:
+    with open(filepath, "rb") as csv_file:
+        return csv_file.read()
+
+
+@pytest.fixture
+def filepath(tmp_path):
+    filepath = str(tmp_path / "directory.csv")
+    csv_func.replace_content_csv(filepath, ROWS * 20, with_row_index=True)
+    return filepath
+
+
+@pytest.mark.parametrize("scan_block_size", (1, 7, 64, row_index.SCAN_BLOCK_SIZE))
+@pytest.mark.parametrize("suffix", (b"", b"\n", b"tail;1;;"), ids=("newline_end", "blank_end", "no_newline_end"))
+def test_row_offsets(tmp_path, monkeypatch, scan_block_size, suffix):
+    monkeypatch.setattr(row_index, "SCAN_BLOCK_SIZE", scan_block_size)
+    filepath = str(tmp_path / "directory.csv")
+    csv_func.replace_content_csv(filepath, ROWS * 5)
+    with open(filepath, "ab") as csv_file:
+        csv_file.write(suffix)
+    data = read_data(filepath)
+    assert list(row_index.build_row_offsets(data)) == get_row_starts(data)
+
+
+def test_pages_read_every_row(filepath):
+    pages = PagedCsvFile(filepath, page_cache_size=2, page_row_count=3)
+    try:
+        assert not pages.row_index.is_rebuilt
+        assert [pages.get_row(row_number) for row_number in range(len(pages))] == csv_func.get_content_csv(filepath)
+    finally:
+        pages.close()
+
+
+def rewrite_same_size(filepath:str)->None:
+    # Same size, the first name changed, the modification time put back
+    stat = os.stat(filepath)
+    data = read_data(filepath)
+    with open(filepath, "wb") as csv_file:
+        csv_file.write(b"bob" + data[3:])
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def append_row(filepath:str)->None:
+    with open(filepath, "ab") as csv_file:
+        csv_file.write(b"new;5;;\n")
+
+
+def touch(filepath:str)->None:
+    stat = os.stat(filepath)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def truncate_index(filepath:str)->None:
+    index_filepath = row_index.get_row_index_filepath(filepath)
+    with open(index_filepath, "r+b") as index_file:
+        index_file.truncate(os.path.getsize(index_filepath) - 3)
+
+
+@pytest.mark.parametrize("change", (rewrite_same_size, append_row, touch, truncate_index))
+def test_stale_row_index_rebuilt(filepath, change):
+    assert RowIndex.load(filepath, read_data(filepath)) is not None
+    change(filepath)
+    data = read_data(filepath)
+    assert RowIndex.load(filepath, data) is None
+
+    # Rebuilt on open and written again, then read from its file
+    rebuilt = RowIndex.open(filepath, data)
+    assert rebuilt.is_rebuilt and list(rebuilt.offsets) == get_row_starts(data)
+    loaded = RowIndex.load(filepath, data)
+    assert loaded is not None and list(loaded.offsets) == get_row_starts(data)
+    loaded.close()
+
+
+def test_missing_row_index(tmp_path):
+    filepath = str(tmp_path / "directory.csv")
+    csv_func.replace_content_csv(filepath, ROWS, with_row_index=False)
+    assert not os.path.exists(row_index.get_row_index_filepath(filepath))
+    assert RowIndex.load(filepath, read_data(filepath)) is None
@@ -0,0 +1,113 @@
+#    Pyrectory (tests/test_search_index.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# Differential test of the search index: after random inserts, updates, deletes, moves and
+# reorders, misc.search() through the index must give the same rows, in the same order, as
+# the linear scan over the entry list.
+
+import random
+
+import pytest
+
+import misc
+from directory import Directory
+from entry import FAVORITE_MARK
+
+# Small alphabets, so random queries share n-grams with many rows
+NAME_CHARACTERS = "abcab "
+PHONE_CHARACTERS = "01210"
+
+OPERATION_COUNT = 400
+ROW_COUNT = 60
+
+
+def make_row(rng:random.Random, number:int)->list:
+    name = "".join(rng.choice(NAME_CHARACTERS) for _ in range(rng.randint(1, 8))) + str(number)
+    phone = "".join(rng.choice(PHONE_CHARACTERS) for _ in range(rng.randint(0, 7)))
+    email = f"{name.replace(' ', '')}@ex.com" if rng.random() < 0.7 or not phone else ""
+    return [name, phone, email, FAVORITE_MARK if rng.random() < 0.3 else ""]
+
+
+def get_queries(rng:random.Random, rows:list)->list:
+    queries = ["", FAVORITE_MARK, "a", "ab", "abc", "cab", "012", "101", "@ex", "zzz"]
+    for row in rng.sample(rows, min(len(rows), 3)):
+        for field in (misc.SEARCH_BY_NAME, misc.SEARCH_BY_PHONE, misc.SEARCH_BY_EMAIL):
+            start = rng.randint(0, len(row[field]))
+            queries.append(row[field][start:start + rng.randint(1, 5)])
+    return queries
+
+
+def check_search(rng:random.Random, directory:Directory)->None:
+    entry_list = [row[:] for row in directory.rows()]
+    for search_criteria in get_queries(rng, entry_list):
+        for search_by in (misc.SEARCH_BY_NAME, misc.SEARCH_BY_PHONE, misc.SEARCH_BY_EMAIL, misc.SEARCH_BY_FAVORITE):
+            expected = []
+            misc.search(search_criteria, search_by, entry_list, expected)
+            found = []
+            misc.search(search_criteria, search_by, entry_list, found, directory.search_index)
+            assert found == expected, (search_criteria, search_by)
+    assert directory.store_index.check_consistency(entry_list) == []
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_search_matches_linear_scan(seed):
+    rng = random.Random(seed)
+    directory = Directory()
+    row_number = 0
+    for row_number in range(ROW_COUNT):
+        directory.add(make_row(rng, row_number))
+
+    for operation_number in range(OPERATION_COUNT):
+        operation = rng.choice(("insert", "append", "update", "delete", "delete_first", "move", "sort", "shuffle"))
+        size = len(directory)
+        row_number += 1
+        if operation == "append" or size == 0:
+            directory.add(make_row(rng, row_number))
+        elif operation == "insert":
+            directory.store_index.insert(rng.randint(0, size), make_row(rng, row_number))
+        elif operation == "update":
+            directory.edit(rng.randrange(size), make_row(rng, row_number))
+        elif operation == "delete":
+            directory.remove(rng.randrange(size))
+        elif operation == "delete_first":
+            directory.remove(0)
+        elif operation == "move":
+            directory.store_index.move(rng.randrange(size), rng.randrange(size))
+        elif operation == "sort":
+            # Like a click on a column header
+            directory.sort(rng.choice((misc.SEARCH_BY_NAME, misc.SEARCH_BY_PHONE, misc.SEARCH_BY_EMAIL)), rng.random() < 0.5)
+        else:
+            new_order = list(range(size))
+            rng.shuffle(new_order)
+            directory.store_index.reorder(new_order)
+
+        if operation_number % 10 == 0:
+            check_search(rng, directory)
+    check_search(rng, directory)
+
+
+def test_search_after_clear():
+    rng = random.Random(0)
+    directory = Directory()
+    for row_number in range(ROW_COUNT):
+        directory.add(make_row(rng, row_number))
+    directory.sort(misc.SEARCH_BY_NAME, True)
+    directory.store_index.clear()
+    for row_number in range(ROW_COUNT):
+        directory.store_index.insert(0, make_row(rng, ROW_COUNT + row_number))
+    check_search(rng, directory)
@@ -0,0 +1,102 @@
+#    Pyrectory (tests/test_snapshot.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+# The snapshot file must give back the rows it was written with, and be ignored once the
+# directory file changes: in size, in modification time, in content alone when both are
+# kept, or in path. The rows are then parsed from the directory file.
+
+import os
+import shutil
+
+import pytest
+
+import csv_func
+import snapshot
+from entry import FAVORITE_MARK
+
+ROWS = [["ann", "0123", "", ""], ["bob", "", "bob@ex.com", FAVORITE_MARK], ["zoë ☎", "+33 1", "z@ex.com", FAVORITE_MARK],
+        ["null\0in name", "1", "", ""], ["", "", "", ""]] * 3
+
+
+def write_directory(filepath:str, rows:list)->None:
+    csv_func.replace_content_csv(filepath, rows)
+    snapshot.update_snapshot(filepath, rows)
+
+
+def read_rows(filepath:str)->list:
+    return [list(row) for line_number, row, bytes_read in snapshot.iter_directory_rows(filepath)]
+
+
+@pytest.fixture
+def filepath(tmp_path):
+    filepath = str(tmp_path / "directory.csv")
+    write_directory(filepath, ROWS)
+    return filepath
+
+
+@pytest.mark.parametrize("rows", (ROWS, ROWS[:1], [], [["a", "1", "", FAVORITE_MARK]] * 17), ids=("rows", "one", "none", "bitset"))
+def test_round_trip(tmp_path, rows):
+    filepath = str(tmp_path / "directory.csv")
+    write_directory(filepath, rows)
+    columns = snapshot.load_snapshot(filepath)
+    assert columns is not None
+    assert [list(row) for row in zip(*columns)] == rows
+    assert read_rows(filepath) == rows
+
+
+def rewrite_same_size(filepath:str)->None:
+    # Same size, the first name changed, the modification time put back
+    stat = os.stat(filepath)
+    with open(filepath, "rb") as csv_file:
+        data = csv_file.read()
+    with open(filepath, "wb") as csv_file:
+        csv_file.write(b"bob" + data[3:])
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def append_row(filepath:str)->None:
+    with open(filepath, "ab") as csv_file:
+        csv_file.write(b"new;5;;\n")
+
+
+def touch(filepath:str)->None:
+    stat = os.stat(filepath)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def truncate_snapshot(filepath:str)->None:
+    snapshot_filepath = snapshot.get_snapshot_filepath(filepath)
+    with open(snapshot_filepath, "r+b") as snapshot_file:
+        snapshot_file.truncate(os.path.getsize(snapshot_filepath) - 9)
+
+
+@pytest.mark.parametrize("change", (rewrite_same_size, append_row, touch, truncate_snapshot))
+def test_stale_snapshot_ignored(filepath, change):
+    assert snapshot.load_snapshot(filepath) is not None
+    change(filepath)
+    assert snapshot.load_snapshot(filepath) is None
+    assert read_rows(filepath) == csv_func.get_content_csv(filepath)
+
+
+def test_snapshot_of_another_path_ignored(filepath, tmp_path):
+    # Copied along with its directory file, the modification time kept
+    copy_filepath = str(tmp_path / "copy.csv")
+    shutil.copy2(filepath, copy_filepath)
+    shutil.copy2(snapshot.get_snapshot_filepath(filepath), snapshot.get_snapshot_filepath(copy_filepath))
+    assert snapshot.load_snapshot(copy_filepath) is None
+    assert read_rows(copy_filepath) == ROWS
@@ -0,0 +1,143 @@
+#    Pyrectory (ui_factory.py)
+#    Copyright (C) 2024 MrBeam89_
+#
+#    This file is part of Pyrectory
+#
+#    Pyrectory is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    Pyrectory is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with Pyrectory. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import xml.etree.ElementTree as ElementTree
+
+from gi.repository import Gtk
+
+# Properties holding a file name, relative to the Glade file
+FILE_PROPERTIES = ("icon", "logo")
+
+# Properties linking a dialog to its parent window -> setter applying them once both are built
+PARENT_PROPERTIES = {"transient-for": "set_transient_for", "attached-to": "set_attached_to"}
+
+
+class UiFactory:
+    """
+    Build windows from the Glade file, reading and splitting it only once.
+
+    The Glade file is cut into one small interface per top-level object, so building
+    a window only parses that window. Windows obtained with get_builder() are built
+    once, then hidden instead of destroyed when closed and shown again on next use.
+    """
+
+    def __init__(self, glade_filepath:str, handlers:dict):
+        """
+        Args:
+            glade_filepath (str): Path of the Glade file.
+            handlers (dict): Signal name -> handler, connected on every window built.
+        """
+        self.handlers = handlers
+        self._fragments, self._parents = split_glade_file(glade_filepath)
+        self._builders = {}
+
+    def build(self, window_id:str)->Gtk.Builder:
+        """
+        Build a new instance of a window, with its signals connected.
+
+        Args:
+            window_id (str): Id of the top-level object in the Glade file.
+
+        Returns:
+            Gtk.Builder: The builder holding the window and its children.
+        """
+        builder = Gtk.Builder()
+        builder.add_from_string(self._fragments[window_id])
+        builder.connect_signals(self.handlers)
+        return builder
+
+    def get_builder(self, window_id:str, hide_on_delete:bool=True)->Gtk.Builder:
+        """
+        Get the shared instance of a window, building it on first use.
+
+        Args:
+            window_id (str): Id of the top-level object in the Glade file.
+            hide_on_delete (bool): Hide the window instead of destroying it when it is closed.
+
+        Returns:
+            Gtk.Builder: The builder holding the window and its children.
+        """
+        builder = self._builders.get(window_id)
+        if builder is None:
+            builder = self.build(window_id)
+            window = builder.get_object(window_id)
+            if hide_on_delete:
+                window.connect("delete-event", lambda widget, event: widget.hide_on_delete())
+
+            for setter_name, parent_id in self._parents.get(window_id, []):
+                if parent_id in self._builders:
+                    getattr(window, setter_name)(self._builders[parent_id].get_object(parent_id))
+            self._builders[window_id] = builder
+        return builder
+
+    def get_object(self, window_id:str, object_id:str):
+        """
+        Get an object of the shared instance of a window.
+
+        Args:
+            window_id (str): Id of the top-level object holding the object.
+            object_id (str): Id of the object.
+
+        Returns:
+            GObject.Object: The object.
+        """
+        return self.get_builder(window_id).get_object(object_id)
+
+
+def split_glade_file(glade_filepath:str)->dict:
+    """
+    Cut a Glade file into one interface per top-level object.
+
+    Top-level objects referenced by another one (like the entry list, model of the
+    main window tree view) are included in the interface of the object using them.
+    Parent windows are not: the transient-for and attached-to properties are taken out and returned apart.
+
+    Args:
+        glade_filepath (str): Path of the Glade file.
+
+    Returns:
+        tuple: (fragments, parents), where fragments maps each top-level object id to the
+               Glade XML building only that object, and parents maps window ids to a list
+               of (setter name, parent window id) pairs.
+    """
+    glade_directory = os.path.dirname(os.path.abspath(glade_filepath))
+    interface = ElementTree.parse(glade_filepath).getroot()
+    requires = [ElementTree.tostring(element, encoding="unicode") for element in interface.iter("requires")]
+    toplevels = {element.get("id"): element for element in interface.findall("object")}
+
+    # Builder strings have no directory to resolve file names against
+    for element in interface.iter("property"):
+        if element.get("name") in FILE_PROPERTIES and element.text and not os.path.isabs(element.text):
+            element.text = os.path.join(glade_directory, element.text)
+
+    parents = {}
+    for toplevel_id, toplevel in toplevels.items():
+        for element in toplevel.findall("property"):
+            if element.get("name") in PARENT_PROPERTIES:
+                parents.setdefault(toplevel_id, []).append((PARENT_PROPERTIES[element.get("name")], element.text))
+                toplevel.remove(element)
+
+    fragments = {}
+    for toplevel_id, toplevel in toplevels.items():
+        referenced_ids = [element.text for element in toplevel.iter("property")
+                          if element.text in toplevels and element.text != toplevel_id]
+        objects = [ElementTree.tostring(toplevels[object_id], encoding="unicode")
+                   for object_id in dict.fromkeys(referenced_ids + [toplevel_id])]
+        fragments[toplevel_id] = f"<interface>{''.join(requires)}{''.join(objects)}</interface>"
+    return fragments, parents